@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+# Este arquivo torna o diretório 'benchmarks' um pacote, permitindo executar os
+# benchmarks a partir da raiz do xcam-rec, ex: python -m benchmarks.transcode_benchmark
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         logging_benchmark.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.0
+# @lastupdate:     2026-10-18
+# @description:    Micro-benchmark do logging. Mede (1) o custo de `format` do `ColorEmojiFormatter`
+#                  com formatadores em cache contra a versão que criava um `logging.Formatter` por
+#                  registro e (2) a latência de cada chamada `logger.info` feita por várias threads,
+#                  no modo direto e no modo em fila, com uma latência de escrita simulada no ficheiro
+#                  (como a do Google Drive montado por FUSE).
+# @modes:          - CLI: python -m benchmarks.logging_benchmark [--threads 8] [--records 500] [--delay-ms 2]
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from utils.logger import COLORS, EMOJIS, ColorEmojiFormatter, setup_logging, stop_logging
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class _UncachedFormatter(logging.Formatter):
+    """A formatação anterior à v1.3.0 do logger: um novo `logging.Formatter` por registro."""
+    def format(self, record):
+        color = COLORS.get(record.levelname, COLORS["RESET"])
+        emoji = EMOJIS.get(record.levelname, "")
+        log_fmt = f"{color}[%(asctime)s] {emoji}  %(message)s{COLORS['RESET']}"
+        return logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S').format(record)
+
+def bench_formatters(records: int) -> Dict[str, float]:
+    """Microssegundos por `format` de cada formatador."""
+    record = logging.LogRecord("bench", logging.INFO, __file__, 0, "📡 A procurar modelos online (%d)...", (1,), None)
+    results = {}
+    for name, formatter in (("sem cache", _UncachedFormatter()), ("com cache", ColorEmojiFormatter())):
+        started = time.perf_counter()
+        for _ in range(records):
+            formatter.format(record)
+        results[name] = (time.perf_counter() - started) / records * 1_000_000
+    return results
+
+def _slow_down_file_handlers(handlers: List[logging.Handler], delay: float):
+    """Acrescenta `delay` segundos a cada escrita dos handlers de ficheiro (latência simulada do Drive)."""
+    for handler in handlers:
+        if isinstance(handler, logging.FileHandler):
+            emit = handler.emit
+
+            def slow_emit(record, emit=emit):
+                time.sleep(delay)
+                emit(record)
+            handler.emit = slow_emit
+
+def bench_calls(use_queue: bool, threads: int, records: int, delay: float) -> Dict[str, float]:
+    """
+    Latência, em microssegundos, de cada `logger.info` feito por `threads` threads em simultâneo.
+
+    Returns:
+        Dict[str, float]: média, p50, p99 e máximo por chamada, e o tempo total até tudo estar escrito.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            listener = setup_logging("INFO", os.path.join(temp_dir, "bench.log"), use_queue=use_queue)
+            _slow_down_file_handlers(listener.handlers if listener else logging.getLogger().handlers, delay)
+            log = logging.getLogger("bench")
+            latencies: List[int] = []
+            lock = threading.Lock()
+
+            def worker(index: int):
+                local = []
+                for number in range(records):
+                    started = time.perf_counter_ns()
+                    log.info(f"📊 Etapa 'gravação' {index}: registro {number}")
+                    local.append(time.perf_counter_ns() - started)
+                with lock:
+                    latencies.extend(local)
+
+            started = time.perf_counter()
+            workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            # O tempo total inclui esvaziar a fila (no modo direto não há nada pendente).
+            stop_logging()
+            total = time.perf_counter() - started
+        finally:
+            logging.getLogger().handlers.clear()
+            sys.stdout = stdout
+
+    latencies.sort()
+    return {
+        "mean": sum(latencies) / len(latencies) / 1000,
+        "p50": latencies[len(latencies) // 2] / 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] / 1000,
+        "max": latencies[-1] / 1000,
+        "total": total,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark do logging do XCam Rec.")
+    parser.add_argument("--threads", type=int, default=8, help="Threads a registar em simultâneo.")
+    parser.add_argument("--records", type=int, default=500, help="Registros por thread.")
+    parser.add_argument("--delay-ms", type=float, default=2.0, help="Latência simulada de cada escrita no ficheiro.")
+    parser.add_argument("--format-records", type=int, default=50000, help="Registros do benchmark de formatação.")
+    args = parser.parse_args()
+
+    print("🧪 Formatação (µs por registro):")
+    for name, micros in bench_formatters(args.format_records).items():
+        print(f"   {name:<10} {micros:>8.2f}")
+
+    print(f"🧪 logger.info com {args.threads} threads x {args.records} registros, escrita a {args.delay_ms} ms (µs por chamada):")
+    print(f"   {'modo':<8} {'média':>10} {'p50':>10} {'p99':>10} {'máximo':>10} {'total':>9}")
+    for mode, use_queue in (("direto", False), ("fila", True)):
+        result = bench_calls(use_queue, args.threads, args.records, args.delay_ms / 1000)
+        print(
+            f"   {mode:<8} {result['mean']:>10.1f} {result['p50']:>10.1f} {result['p99']:>10.1f} "
+            f"{result['max']:>10.1f} {result['total']:>8.2f}s"
+        )
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do micro-benchmark do logging.
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         transcode_benchmark.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.0
+# @lastupdate:     2026-10-18
+# @description:    Pequeno benchmark dos perfis de codificação (`config.ENCODER_PRESETS`). Para cada
+#                  perfil, codifica um clipe de amostra com a mesma marca d'água usada em produção
+#                  (saída descartada com `-f null`) e reporta frames por segundo, velocidade em
+#                  relação ao tempo real e tempo total, para escolher o perfil adequado à máquina.
+# @modes:          - CLI: python -m benchmarks.transcode_benchmark <clipe.mp4> [--watermark logo.png]
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import argparse
+import subprocess
+import time
+from typing import Dict, Optional
+
+import config
+from utils.watermark import build_encoder_args, build_overlay_filter
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+def run_profile(clip: str, preset_name: str, watermark: Optional[str], seconds: Optional[int]) -> Dict[str, float]:
+    """
+    Codifica o clipe com um perfil e mede o desempenho.
+
+    Args:
+        clip (str): Caminho do clipe de amostra.
+        preset_name (str): Nome do perfil em `config.ENCODER_PRESETS`.
+        watermark (Optional[str]): Imagem da marca d'água (PNG). None = apenas codificar.
+        seconds (Optional[int]): Limita a duração codificada.
+
+    Returns:
+        Dict[str, float]: frames, fps, speed (x tempo real) e wall (segundos).
+    """
+    command = ["ffmpeg", "-nostats", "-loglevel", "error", "-progress", "pipe:1", "-i", clip]
+    if watermark:
+        command += ["-loop", "1", "-i", watermark, "-filter_complex", build_overlay_filter(), "-map", "[vout]"]
+    else:
+        command += ["-map", "0:v:0"]
+    command += build_encoder_args(preset_name)
+    if seconds:
+        command += ["-t", str(seconds)]
+    command += ["-an", "-f", "null", "-"]
+
+    started = time.monotonic()
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    wall = time.monotonic() - started
+
+    # O último bloco `-progress` contém o total de frames e o tempo de saída.
+    progress = {}
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition("=")
+        progress[key] = value
+    frames = int(progress.get("frame", 0) or 0)
+    out_seconds = int(progress.get("out_time_us", 0) or 0) / 1_000_000
+    return {
+        "frames": frames,
+        "fps": frames / wall if wall else 0.0,
+        "speed": out_seconds / wall if wall else 0.0,
+        "wall": wall,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de codificação do XCam Rec.")
+    parser.add_argument("clip", help="Clipe de amostra (ex: uma gravação de alguns minutos).")
+    parser.add_argument("--watermark", help="Imagem PNG da marca d'água (padrão: sem marca d'água).")
+    parser.add_argument("--profiles", nargs="*", help="Perfis a testar (padrão: todos os de ENCODER_PRESETS).")
+    parser.add_argument("--seconds", type=int, help="Codifica apenas os primeiros N segundos do clipe.")
+    args = parser.parse_args()
+
+    profiles = args.profiles or list(config.ENCODER_PRESETS)
+    print(f"{'perfil':<12} {'frames':>8} {'fps':>8} {'velocidade':>11} {'tempo':>8}")
+    for preset_name in profiles:
+        try:
+            result = run_profile(args.clip, preset_name, args.watermark, args.seconds)
+        except subprocess.CalledProcessError as e:
+            print(f"{preset_name:<12} falhou: {e.stderr.strip()}")
+            continue
+        print(
+            f"{preset_name:<12} {result['frames']:>8} {result['fps']:>8.1f} "
+            f"{result['speed']:>10.2f}x {result['wall']:>7.1f}s"
+        )
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do benchmark de perfis de codificação.
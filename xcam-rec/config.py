@@ -7,8 +7,8 @@
 # @titulo:         config.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.5.0
-# @lastupdate:     2025-08-27
+# @version:        1.26.0
+# @lastupdate:     2026-10-18
 # @description:    Este arquivo centraliza todas as configurações de caminhos, parâmetros e
 #                  variáveis de comportamento do módulo XCam Rec. Os valores definidos aqui
 #                  funcionam como **padrões (defaults)** e podem ser sobrescritos por
@@ -36,7 +36,14 @@ DEFAULT_EXECUTION_SETTINGS = {
     # serão automaticamente descartados para economizar espaço.
     # Exemplo: 420 segundos = 7 minutos.
     "MIN_DURATION_SECONDS": 420,
-    
+
+    # Número padrão de gravações em simultâneo (trabalhadores do agendador persistente).
+    "MAX_WORKERS": 5,
+
+    # Número máximo de transmissões à espera de um trabalhador livre. Quando a fila está cheia,
+    # as transmissões excedentes são ignoradas e tentadas de novo na verificação seguinte.
+    "MAX_QUEUE_SIZE": 100,
+
     # Parâmetros padrão para a requisição à API do XCam.
     "API_PARAMS": {
         "limit": 1000,      # Número máximo de resultados por página.
@@ -45,6 +52,61 @@ DEFAULT_EXECUTION_SETTINGS = {
     }
 }
 
+# --- Configurações de Gravação ---
+RECORDING_SETTINGS = {
+    # Modo de gravação:
+    # - "copy": grava o stream sem recodificar; a marca d'água e o poster são feitos depois,
+    #   em passagens separadas sobre o MP4 final (comportamento original).
+    # - "single_pass": aplica a marca d'água e grava o poster na própria invocação do FFmpeg
+    #   que captura o stream, descodificando cada transmissão uma única vez.
+    # - "segmented": como "copy", mas escreve blocos de `SEGMENT_SECONDS` que são unidos sem perdas
+    #   no fim. Se o FFmpeg ou a VM morrerem, perde-se no máximo o bloco em curso.
+    "MODE": "copy",
+
+    # Duração, em segundos, de cada bloco no modo "segmented".
+    "SEGMENT_SECONDS": 300,
+
+    # Preset de codificação (ver `ENCODER_PRESETS`) usado pelo modo "single_pass".
+    "ENCODER_PRESET": "fast",
+
+    # Instante, em segundos desde o início da gravação, do frame usado como poster.
+    "POSTER_AT_SECONDS": 7,
+}
+
+# Perfis de codificação de vídeo reutilizáveis (gravação em passagem única e marca d'água).
+# - "preset": preset do libx264 (ultrafast ... veryslow). Quanto mais rápido, menos CPU por vídeo.
+# - "crf": qualidade constante (menor = melhor). Ignorado se "bitrate" for definido.
+# - "bitrate": bitrate de vídeo alvo (ex: "2500k"), como alternativa ao CRF. None = usar CRF.
+# - "threads": threads do codificador por trabalho. 0 = automático (todos os núcleos).
+ENCODER_PRESETS = {
+    "ultrafast": {"video_codec": "libx264", "preset": "ultrafast", "crf": 24, "bitrate": None, "threads": 2},
+    "fast": {"video_codec": "libx264", "preset": "veryfast", "crf": 23, "bitrate": None, "threads": 2},
+    "balanced": {"video_codec": "libx264", "preset": "fast", "crf": 22, "bitrate": None, "threads": 4},
+    "quality": {"video_codec": "libx264", "preset": "medium", "crf": 20, "bitrate": None, "threads": 0},
+}
+
+# Orçamento global de threads de codificação partilhado pelas marcas d'água em simultâneo.
+# Cada trabalho reserva as threads do seu perfil (ou todos os núcleos, se "threads" for 0) e
+# espera quando o orçamento está esgotado. None = sem limite.
+TRANSCODE_CPU_BUDGET = None
+
+# --- Configurações do Pipeline de Processamento ---
+# Cada etapa (gravação -> pós-processamento -> upload) tem o seu próprio limite de concorrência.
+# A etapa de gravação usa `MAX_WORKERS` e `MAX_QUEUE_SIZE` acima.
+PIPELINE_SETTINGS = {
+    # Número de pós-processamentos (validação + marca d'água) em simultâneo.
+    # None = número de CPUs da máquina.
+    "POSTPROCESS_WORKERS": None,
+
+    # Número de uploads em simultâneo para o serviço de alojamento.
+    "UPLOAD_WORKERS": 2,
+
+    # Capacidade das filas entre etapas. Quando uma fila enche, a etapa anterior espera
+    # (contrapressão) em vez de acumular ficheiros sem limite.
+    "POSTPROCESS_QUEUE_SIZE": 20,
+    "UPLOAD_QUEUE_SIZE": 20,
+}
+
 # --- Configuração de Caminhos (Ambiente Google Colab) ---
 # Define o caminho base onde o Google Drive está montado no ambiente Colab.
 # Todos os outros caminhos de trabalho são construídos a partir desta base.
@@ -66,15 +128,85 @@ DRIVE_PERSISTENT_USER_PATH = "/content/drive/MyDrive/Projetos/XCam/XCam Drive/XC
 API_BASE_URL = "https://api.xcam.gay"
 # Chave de acesso à XCam API
 API_KEY = "99090882"
+# Afinação do cliente HTTP partilhado (`XCamAPIClient`).
+API_CLIENT_SETTINGS = {
+    # Ligações keep-alive mantidas abertas (o `main.py` ajusta ao número de trabalhadores de gravação).
+    "POOL_SIZE": 10,
+
+    # Novas tentativas para erros de rede e respostas 429/5xx, com espera de BACKOFF_FACTOR * 2^n segundos.
+    "RETRIES": 3,
+    "BACKOFF_FACTOR": 0.5,
+
+    # Validade (em segundos) e número máximo de respostas de liveInfo em cache.
+    "LIVE_INFO_TTL_SECONDS": 30,
+    "LIVE_INFO_CACHE_SIZE": 512,
+}
 
 # --- Configuração do Banco de Dados (Git-as-a-Database) ---
 # Caminho para o diretório que armazena os arquivos de metadados (rec.json), relativo à raiz do projeto.
 DB_PATH = "xcam-db/user/"
 
+# Índice global de todos os rec.json (ver `CatalogIndex` em utils/rec_manager.py), ao lado da
+# pasta dos utilizadores. LATEST_SIZE é o número de registros recentes do catálogo guardados no índice.
+CATALOG_SETTINGS = {
+    "PATH": "xcam-db/catalog.json",
+    "LATEST_SIZE": 50,
+}
+
+# Escrita dos rec.json (ver utils/rec_manager.py): cada vídeo é acrescentado ao log NDJSON do
+# utilizador e o rec.json é materializado quando o log acumula COMPACT_MAX_PENDING registros ou
+# quando o registro mais antigo por compactar tem COMPACT_INTERVAL_SECONDS.
+REC_STORE_SETTINGS = {
+    "COMPACT_MAX_PENDING": 20,
+    "COMPACT_INTERVAL_SECONDS": 300,
+
+    # Formato dos rec.json: "pretty" (indentado, o original) ou "compact" (sem espaços).
+    "FORMAT": "pretty",
+
+    # Paginação: o rec.json guarda os registros mais recentes e cada PAGE_SIZE registros mais
+    # antigos passam para um fragmento imutável `rec-<página>.json`. 0 mantém o histórico num só ficheiro.
+    # Para converter os ficheiros existentes (e ao mudar PAGE_SIZE): python -m utils.rec_manager migrate
+    "PAGE_SIZE": 0,
+}
+
 # --- Configuração da API de Upload ---
 # URL de upload para o serviço de armazenamento de vídeos de terceiros (ex: Hydrax/Abyss.to).
 ABYSS_UPLOAD_URL = "http://up.hydrax.net/0128263f78f0b426d617bb61c2a8ff43"
 
+# --- Configuração do Diário de Trabalhos ---
+# Registo persistente da etapa de cada gravação (ver utils/job_journal.py). Fica no Drive, ao lado
+# das gravações temporárias, para sobreviver à reciclagem da VM do Colab.
+JOB_JOURNAL_SETTINGS = {
+    "PATH": f"{DRIVE_BASE_PATH}/temp/jobs.sqlite3",
+
+    # Um upload falhado volta à fila após este intervalo, até MAX_UPLOAD_ATTEMPTS tentativas.
+    "UPLOAD_RETRY_SECONDS": 900,
+    "MAX_UPLOAD_ATTEMPTS": 5,
+}
+
+# Parâmetros do upload em streaming (ver utils/abyss_upload.py).
+UPLOAD_SETTINGS = {
+    # Tamanho de cada leitura do ficheiro: é o máximo de memória usado pelo corpo do pedido.
+    "READ_BLOCK_BYTES": 1024 * 1024,
+
+    # Timeouts de ligação e de leitura (sem resposta do servidor). Não limitam a duração total.
+    "CONNECT_TIMEOUT_SECONDS": 30,
+    "READ_TIMEOUT_SECONDS": 300,
+
+    # Tentativas seguidas sem progresso e backoff exponencial entre elas.
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_SECONDS": 5,
+    "BACKOFF_MAX_SECONDS": 120,
+
+    # Upload retomável por partes (Content-Range). Só ative se o endpoint o suportar; caso contrário
+    # o upload é feito de uma só vez.
+    "RESUMABLE": False,
+    "RESUME_CHUNK_BYTES": 64 * 1024 * 1024,
+
+    # Intervalo entre registos de progresso (débito e ETA) no log.
+    "PROGRESS_LOG_SECONDS": 30,
+}
+
 # --- Configurações de Logging ---
 # Define o nível de detalhe dos logs. Opções: "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL".
 LOG_LEVEL = "INFO"
@@ -82,11 +214,151 @@ LOG_LEVEL = "INFO"
 # Define o nome do ficheiro onde os logs de execução serão guardados.
 LOG_FILE = "xcam_recorder.log"
 
+# Modo e rotação do logging (ver utils/logger.py).
+LOGGING_SETTINGS = {
+    # As threads apenas enfileiram os registros; uma única thread formata e escreve no Drive.
+    "USE_QUEUE": True,
+
+    # Rotação do ficheiro de log por tamanho (bytes; 0 desativa) ou, em alternativa, por tempo
+    # (ex: "midnight"; None desativa), mantendo BACKUP_COUNT ficheiros antigos.
+    "ROTATE_MAX_BYTES": 10 * 1024 * 1024,
+    "ROTATE_WHEN": None,
+    "BACKUP_COUNT": 5,
+}
+
+# --- Configuração do Espaço da Pasta Temporária (ver utils/storage.py) ---
+# As capturas e as transcodificações só começam se a ocupação projetada couber na quota e no disco.
+STORAGE_SETTINGS = {
+    # Ocupação máxima da pasta temporária das gravações, em bytes. 0 usa apenas o espaço livre do disco.
+    "QUOTA_BYTES": 150 * 1024 ** 3,
+
+    # Espaço livre mínimo a manter no disco, em bytes (margem para as gravações em curso).
+    "MIN_FREE_BYTES": 5 * 1024 ** 3,
+
+    # Bitrate assumido para uma nova captura quando nenhuma gravação em curso o reporta.
+    "DEFAULT_BITRATE_KBPS": 3000,
+
+    # Os vídeos já publicados ficam na pasta até serem precisos para libertar espaço (os mais antigos
+    # primeiro) ou, se definido, até terem mais do que esta idade em segundos. None desativa a idade.
+    "EVICT_AFTER_SECONDS": None,
+
+    # Espera máxima por espaço para uma transcodificação da marca d'água, e intervalo entre tentativas.
+    "TRANSCODE_WAIT_SECONDS": 1800,
+    "RETRY_SECONDS": 30,
+
+    # Validade, em segundos, da medição da ocupação da pasta (percorrer o Drive é lento).
+    "SCAN_CACHE_SECONDS": 30,
+}
+
+# --- Configuração do Watchdog das Gravações (ver utils/ffmpeg_recorder.py) ---
+# Um FFmpeg preso num HLS que deixou de responder não escreve nada; o watchdog finaliza-o.
+WATCHDOG_SETTINGS = {
+    "ENABLED": True,
+
+    # Intervalo entre verificações do crescimento de cada gravação, em segundos.
+    "CHECK_INTERVAL_SECONDS": 15,
+
+    # Segundos sem crescimento (bytes do `-progress` e tamanho do ficheiro) até a gravação ser finalizada.
+    "STALL_SECONDS": 90,
+
+    # Prazo para o primeiro byte de uma gravação (ligação inicial à CDN), em segundos.
+    "STARTUP_SECONDS": 120,
+}
+
+# --- Configuração das Métricas (ver utils/metrics.py) ---
+METRICS_SETTINGS = {
+    # Ficheiro de eventos estruturados (um objeto JSON por linha). None desativa.
+    "EVENTS_PATH": f"{LOGS_PATH}/events.jsonl",
+
+    # Servidor HTTP local com as métricas no formato de texto do Prometheus (`/metrics`) e o estado
+    # ao vivo em JSON (`/status`). 0 ou None desativa; pode ser definido com `--metrics-port`.
+    "HTTP_HOST": "127.0.0.1",
+    "HTTP_PORT": 8787,
+}
+
+# --- Configuração do Estado ao Vivo (`/status`, ver utils/status.py) ---
+STATUS_SETTINGS = {
+    # Uma gravação sem progresso do FFmpeg há mais do que isto (segundos) é marcada como parada.
+    "STALE_SECONDS": 60,
+
+    # Número máximo de falhas recentes incluídas na resposta.
+    "RECENT_FAILURES": 20,
+}
+
+# --- Configuração da Cadência das Verificações ---
+# O intervalo entre verificações adapta-se à carga, partindo de `CHECK_INTERVAL_SECONDS`.
+POLL_SETTINGS = {
+    # Limites do intervalo adaptativo, em segundos.
+    "MIN_INTERVAL_SECONDS": 15,
+    "MAX_INTERVAL_SECONDS": 300,
+
+    # Fator de alongamento a cada verificação sem alterações ou com os gravadores saturados.
+    "BACKOFF_FACTOR": 1.5,
+
+    # Fração de entradas/saídas sobre as transmissões online a partir da qual se usa o intervalo mínimo.
+    "HIGH_CHURN_RATIO": 0.05,
+}
+
+# --- Configuração da Admissão (modelos prioritários) ---
+# Decide quais transmissões ficam com as vagas de gravação quando há mais online do que trabalhadores.
+ADMISSION_SETTINGS = {
+    # Utilizadores favoritos: recebem `ALLOWLIST_BONUS` e ignoram o filtro de países.
+    "ALLOWLIST": [],
+    "ALLOWLIST_BONUS": 10000,
+
+    # Utilizadores que nunca são gravados.
+    "BLOCKLIST": [],
+
+    # Se não estiver vazio, só são gravadas transmissões destes países (ex: ["br", "pt"]).
+    "COUNTRIES": [],
+
+    # Pontuação: espectadores * VIEWER_WEIGHT + duração média histórica (min) * HISTORY_MINUTE_WEIGHT
+    # + bónus por país (ex: {"br": 50}).
+    "VIEWER_WEIGHT": 1.0,
+    "HISTORY_MINUTE_WEIGHT": 2.0,
+    "COUNTRY_BONUS": {},
+
+    # Com as vagas cheias, transmissões abaixo desta pontuação não entram na fila.
+    "MIN_SCORE_WHEN_FULL": 0,
+
+    # Preempção: uma transmissão em espera interrompe a gravação em curso de menor pontuação se
+    # valer pelo menos PREEMPT_RATIO vezes mais. 0 desativa a preempção.
+    "PREEMPT_RATIO": 0,
+}
+
+# --- Configuração da Descoberta ---
+# Percorre todas as páginas de transmissões online (e não só a primeira) a cada verificação.
+DISCOVERY_SETTINGS = {
+    # Número máximo de páginas (de `API_PARAMS["limit"]` transmissões) por verificação.
+    "MAX_PAGES": 10,
+
+    # Páginas pedidas em simultâneo depois da primeira.
+    "PAGE_WORKERS": 4,
+}
+
+# --- Configuração da Reconexão ---
+# Sessão de gravação: após uma quebra do stream, reconecta enquanto houver tempo até à duração máxima.
+RECONNECT_SETTINGS = {
+    # Número máximo de reconexões seguidas sem conseguir gravar.
+    "MAX_ATTEMPTS": 3,
+
+    # Espera antes da primeira reconexão; dobra a cada falha seguida até `BACKOFF_MAX_SECONDS`.
+    "BACKOFF_SECONDS": 5,
+    "BACKOFF_MAX_SECONDS": 60,
+
+    # Não reconecta se faltarem menos do que estes segundos para a duração máxima.
+    "MIN_REMAINING_SECONDS": 30,
+}
+
 # --- Configuração da Marca d'Água ---
 # Caminho para o arquivo de imagem/SVG da marca d'água.
 WATERMARK_IMAGE_PATH = "/content/drive/MyDrive/Projetos/XCam/Conteúdo Social/XCam Social Mídias/logoGay.png"
 # Largura máxima da marca d'água ao ser inserida no vídeo (em pixels).
 WATERMARK_MAX_WIDTH = 180
+# Perfil de codificação (ver `ENCODER_PRESETS`) usado ao aplicar a marca d'água após a gravação.
+WATERMARK_ENCODER_PRESET = "fast"
+# Pasta local onde a marca d'água rasterizada e redimensionada é guardada (um PNG imutável por largura).
+ASSET_CACHE_PATH = "/content/xcam-assets"
 
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
@@ -101,6 +373,73 @@ WATERMARK_MAX_WIDTH = 180
 # ---------------------------------------------------------------------------------------------
 
 # @log de mudanças:
+# 2026-10-18 (v1.26.0):
+# - FEATURE: Adicionado o dicionário `STORAGE_SETTINGS` (quota da pasta temporária e remoção de vídeos publicados).
+#
+# 2026-10-18 (v1.25.0):
+# - FEATURE: Adicionado o dicionário `WATCHDOG_SETTINGS` (deteção de gravações paradas).
+#
+# 2026-10-18 (v1.24.0):
+# - FEATURE: Adicionado o dicionário `STATUS_SETTINGS` (estado ao vivo em `/status`); o servidor HTTP
+#   local das métricas passa a estar ativo por padrão (porta 8787, apenas em 127.0.0.1).
+#
+# 2026-10-18 (v1.23.0):
+# - FEATURE: Adicionado o dicionário `METRICS_SETTINGS` (eventos em JSON lines e endpoint de métricas).
+#
+# 2026-10-18 (v1.22.0):
+# - FEATURE: Adicionado o dicionário `LOGGING_SETTINGS` (logging em fila e rotação do ficheiro).
+#
+# 2026-10-18 (v1.21.0):
+# - FEATURE: `REC_STORE_SETTINGS` ganhou `FORMAT` (pretty/compact) e `PAGE_SIZE` (fragmentos de arquivo).
+#
+# 2026-10-18 (v1.20.0):
+# - FEATURE: Adicionado o dicionário `CATALOG_SETTINGS` (índice global do catálogo).
+#
+# 2026-10-18 (v1.19.0):
+# - FEATURE: Adicionado o dicionário `REC_STORE_SETTINGS` (compactação do log de registros em rec.json).
+#
+# 2026-10-18 (v1.18.0):
+# - FEATURE: Adicionado o dicionário `JOB_JOURNAL_SETTINGS` (diário persistente das gravações).
+#
+# 2026-10-18 (v1.17.0):
+# - FEATURE: Adicionado o dicionário `UPLOAD_SETTINGS` (upload em streaming, novas tentativas e retoma).
+#
+# 2026-10-18 (v1.16.0):
+# - FEATURE: Adicionado o dicionário `ADMISSION_SETTINGS` (modelos prioritários, filtros e preempção).
+#
+# 2026-10-18 (v1.15.0):
+# - FEATURE: Adicionado o dicionário `POLL_SETTINGS` (cadência adaptativa das verificações).
+#
+# 2026-10-18 (v1.14.0):
+# - FEATURE: Adicionado o dicionário `DISCOVERY_SETTINGS` (páginas por verificação e pedidos simultâneos).
+#
+# 2026-10-18 (v1.13.0):
+# - FEATURE: Adicionado o dicionário `API_CLIENT_SETTINGS` (pool, novas tentativas e cache de liveInfo).
+#
+# 2026-10-18 (v1.12.0):
+# - FEATURE: Adicionado o dicionário `RECONNECT_SETTINGS` (reconexão das sessões de gravação).
+#
+# 2026-10-18 (v1.11.0):
+# - FEATURE: Modo de gravação "segmented" e `RECORDING_SETTINGS["SEGMENT_SECONDS"]`.
+#
+# 2026-10-18 (v1.10.0):
+# - FEATURE: Adicionado `ASSET_CACHE_PATH` para a cache de assets da marca d'água.
+#
+# 2026-10-18 (v1.9.0):
+# - FEATURE: Os `ENCODER_PRESETS` passam a aceitar "bitrate" (alternativa ao CRF) e "threads".
+# - FEATURE: Adicionados `TRANSCODE_CPU_BUDGET` e `WATERMARK_ENCODER_PRESET`.
+#
+# 2026-10-18 (v1.8.0):
+# - FEATURE: Adicionados `RECORDING_SETTINGS` (modo "copy" ou "single_pass") e `ENCODER_PRESETS`.
+#
+# 2026-10-18 (v1.7.0):
+# - FEATURE: Adicionado o dicionário `PIPELINE_SETTINGS` com a concorrência e as filas das etapas
+#   de pós-processamento e upload.
+#
+# 2026-10-18 (v1.6.0):
+# - FEATURE: Adicionadas as chaves `MAX_WORKERS` e `MAX_QUEUE_SIZE` ao `DEFAULT_EXECUTION_SETTINGS`
+#   para o agendador persistente de gravações.
+#
 # 2025-08-27 (v1.5.0):
 # - FEATURE: Adicionada a configuração global da marca d'água (WATERMARK_IMAGE_PATH e WATERMARK_MAX_WIDTH).
 #
@@ -127,7 +466,5 @@ WATERMARK_MAX_WIDTH = 180
 # @roadmap futuro:
 # - Implementar um sistema para carregar configurações sensíveis (como tokens de API ou chaves de upload)
 #   a partir de variáveis de ambiente ou de um ficheiro .env, para maior segurança.
-# - Adicionar uma secção de "modelos prioritários" para garantir que certos streamers sejam
-#   verificados com maior frequência ou tenham limites de gravação diferentes.
 # - Criar uma função de inicialização que valide se os caminhos configurados existem e têm as
 #   permissões corretas no início da execução.
@@ -7,8 +7,8 @@
 # @titulo:         main.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.11.0
-# @lastupdate:     2025-08-27
+# @version:        1.31.2
+# @lastupdate:     2026-10-18
 # @description:    Script principal e orquestrador do módulo XCam Rec. Este script é responsável
 #                  por obter a lista de streamers online, implementar uma lógica de fallback
 #                  para encontrar a URL do stream, iniciar processos de gravação paralelos,
@@ -25,20 +25,42 @@ import re
 import shutil
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Any, Set, Optional
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, Any, Optional
+
+import pytz
 
 import config
 from utils.logger import setup_logging
-from utils.xcam_api import get_online_models, get_user_live_info
-from utils.ffmpeg_recorder import record_stream_and_capture_thumbnail
-from utils.video_utils import manage_recorded_file, get_video_duration
+from utils.metrics import METRICS, emit_event, start_metrics, stop_metrics
+from utils.status import register_status_route
+from utils.storage import StorageManager
+from utils.xcam_api import configure_api_client, get_user_live_info
+from utils.discovery import OnlineSnapshot, discover_online_models
+from utils.poller import AdaptivePoller
+from utils.admission import AdmissionPolicy
+from utils.ffmpeg_recorder import capture_thumbnail
+from utils.recording_session import record_session, recover_session_parts, session_output_for, stop_session
+from utils.video_utils import manage_recorded_file, probe_media
 from utils.abyss_upload import upload_video
-from utils.rec_manager import create_or_update_rec_json
+from utils.rec_manager import create_or_update_rec_json, get_rec_store
 from utils.watermark import add_watermark
+from utils.pipeline import BroadcastPipeline, RecordingJob
+from utils.progress import PROGRESS_TABLE
+from utils.segments import recover_segment_dirs
+from utils.job_journal import JobJournal, CAPTURING, CAPTURED, VALIDATED, WATERMARKED, UPLOADED, INDEXED, ABANDONED
 
 logger = logging.getLogger(__name__)
 
+# Métricas do ciclo de vida das gravações e da ocupação do pipeline (ver utils/metrics.py).
+_DISCARDS = METRICS.counter("xcam_recordings_discarded_total", "Gravações descartadas, por motivo.")
+_PUBLISHED = METRICS.counter("xcam_recordings_published_total", "Gravações publicadas e registadas no rec.json.")
+_ONLINE = METRICS.gauge("xcam_broadcasts_online", "Transmissões online na última verificação.")
+_STAGE_ACTIVE = METRICS.gauge("xcam_stage_active", "Trabalhadores ocupados em cada etapa do pipeline.")
+_STAGE_QUEUED = METRICS.gauge("xcam_stage_queued", "Trabalhos na fila de cada etapa do pipeline.")
+
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
 # ---------------------------------------------------------------------------------------------
@@ -46,184 +68,625 @@ logger = logging.getLogger(__name__)
 def _sanitize_filename(name: str) -> str:
     return re.sub(r'[^\w\-]', '', name)
 
-def _get_stream_url(broadcast: Dict[str, Any]) -> Optional[str]:
+def _get_stream_url(broadcast: Dict[str, Any], refresh: bool = False) -> Optional[str]:
+    # Com `refresh` (reconexão), a URL da listagem pode estar desatualizada: consulta primeiro o liveInfo.
     username = broadcast.get("username")
     primary_url = broadcast.get("preview", {}).get("src")
-    if primary_url:
+    if primary_url and not refresh:
         logger.info(f"📹 URL de stream principal encontrada para '{username}'.")
         return primary_url
-    logger.warning(f"⚠️ URL de stream principal em falta para '{username}'. A tentar obter URL de fallback...")
-    live_info = get_user_live_info(username)
+    if not refresh:
+        logger.warning(f"⚠️ URL de stream principal em falta para '{username}'. A tentar obter URL de fallback...")
+    live_info = get_user_live_info(username, use_cache=not refresh)
     if live_info:
         fallback_url = live_info.get("cdnURL") or live_info.get("edgeURL")
         if fallback_url:
             logger.info(f"📹 URL de stream de fallback ('{ 'cdnURL' if live_info.get('cdnURL') else 'edgeURL' }') encontrada para '{username}'.")
             return fallback_url
+    if primary_url:
+        logger.warning(f"⚠️ Sem URL atualizada para '{username}'. A reutilizar a URL principal.")
+        return primary_url
     logger.error(f"❌ Não foi possível obter uma URL de stream válida para '{username}' após todas as tentativas.")
     return None
 
-def process_broadcast_worker(
-    broadcast: Dict[str, Any],
-    min_duration: int,
+def _format_duration(seconds: int) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    parts = []
+    if hours > 0:
+        parts.append(f"{hours}h")
+    if minutes > 0:
+        parts.append(f"{minutes}m")
+    if seconds > 0 or not parts:
+        parts.append(f"{seconds}s")
+    return "".join(parts)
+
+def _discard_poster(job: RecordingJob):
+    if job.poster_path and os.path.exists(job.poster_path):
+        os.remove(job.poster_path)
+
+def _separate_job(job: RecordingJob, video_path: str, journal: Optional[JobJournal]) -> RecordingJob:
+    """Trabalho próprio, já registado como capturado, para uma parte da sessão de `job` que não foi possível unir."""
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    separate = RecordingJob(
+        username=job.username,
+        broadcast=job.broadcast,
+        video_path=video_path,
+        poster_path=os.path.join(config.TEMP_POSTERS_PATH, f"{base}.jpg"),
+        watermarked=job.watermarked
+    )
+    if not os.path.exists(separate.poster_path):
+        capture_thumbnail(video_path, separate.poster_path)
+    if journal:
+        journal.advance(separate, CAPTURED)
+    return separate
+
+def _discard_job(job: RecordingJob, journal: Optional[JobJournal], reason: str, detail: str):
+    """Descarta uma gravação: remove o poster, conta o motivo (`reason`) e fecha o registo no diário."""
+    _discard_poster(job)
+    _DISCARDS.inc(reason=reason)
+    emit_event("discarded", username=job.username, reason=reason, video=job.video_path)
+    if journal:
+        journal.discard(job, detail)
+
+# --- Etapa 1: Gravação (I/O leve, muitas em simultâneo) ---
+def record_broadcast(
+    job: RecordingJob,
     max_duration: int,
-    recording_set: Set[str],
-    watermark_path: str,
-    watermark_width: int
-):
-    username = broadcast.get("username")
+    single_pass: bool = False,
+    watermark_path: str = "",
+    watermark_width: int = 180,
+    segment_seconds: Optional[int] = None,
+    journal: Optional[JobJournal] = None,
+    is_online: Optional[Callable[[str], bool]] = None
+) -> Optional[RecordingJob]:
+    username = job.username
     if not username:
         logger.warning("⚠️ Transmissão sem username encontrada. A pular.")
-        return
+        return None
 
-    try:
-        stream_url = _get_stream_url(broadcast)
-        if not stream_url:
-            return
-
-        logger.info(f"▶️  Iniciando processamento para o streamer: {username}")
-        safe_filename_base = f"{_sanitize_filename(username)}_{int(time.time())}"
-        temp_video_path = os.path.join(config.TEMP_RECORDS_PATH, f"{safe_filename_base}.mp4")
-        temp_poster_path = os.path.join(config.TEMP_POSTERS_PATH, f"{safe_filename_base}.jpg")
-
-        record_successful = record_stream_and_capture_thumbnail(
-            username=username,
-            stream_url=stream_url,
-            output_path=temp_video_path,
-            thumbnail_path=temp_poster_path,
-            max_duration=max_duration
-        )
+    job.stream_url = _get_stream_url(job.broadcast)
+    if not job.stream_url:
+        return None
 
-        if not record_successful:
-            logger.error(f"❌ A gravação para {username} falhou.")
-            return
+    logger.info(f"▶️  Iniciando processamento para o streamer: {username}")
+    safe_filename_base = f"{_sanitize_filename(username)}_{int(time.time())}"
+    job.video_path = os.path.join(config.TEMP_RECORDS_PATH, f"{safe_filename_base}.mp4")
+    job.poster_path = os.path.join(config.TEMP_POSTERS_PATH, f"{safe_filename_base}.jpg")
 
-        file_is_valid = manage_recorded_file(
-            video_path=temp_video_path,
-            thumbnail_path=temp_poster_path,
-            min_duration=min_duration
-        )
-        if not file_is_valid:
-            return
-
-        # --- Adiciona marca d'água usando os argumentos recebidos ---
-        watermarked_video_path = temp_video_path.replace(".mp4", "_wm.mp4")
-        success = add_watermark(
-            input_video=temp_video_path,
-            output_video=watermarked_video_path,
-            watermark_image=watermark_path,
-            max_width=watermark_width
-        )
+    # No modo de passagem única, a marca d'água e o poster são gerados durante a própria captura.
+    job.watermarked = single_pass and bool(watermark_path)
+    if journal:
+        journal.start(job)
+
+    def resolve_stream_url(refresh: bool) -> Optional[str]:
+        if refresh:
+            job.stream_url = _get_stream_url(job.broadcast, refresh=True)
+        return job.stream_url
+
+    # A sessão reconecta após quebras do stream e une as partes num único ficheiro.
+    record_successful = record_session(
+        username=username,
+        resolve_stream_url=resolve_stream_url,
+        output_path=job.video_path,
+        thumbnail_path=job.poster_path,
+        max_duration=max_duration,
+        watermark_image=watermark_path if job.watermarked else None,
+        watermark_width=watermark_width,
+        encoder_preset=config.RECORDING_SETTINGS['ENCODER_PRESET'],
+        segment_seconds=segment_seconds,
+        on_separate=lambda video_path: job.separate_jobs.append(_separate_job(job, video_path, journal)),
+        is_online=is_online
+    )
+
+    if not record_successful:
+        logger.error(f"❌ A gravação para {username} falhou.")
+        _discard_job(job, journal, "capture_failed", "captura falhou")
+        return None
+    if journal:
+        journal.advance(job, CAPTURED)
+    return job
+
+# --- Etapa 2: Pós-processamento (validação, marca d'água e renomeação; pesado em CPU) ---
+def postprocess_recording(
+    job: RecordingJob,
+    min_duration: int,
+    watermark_path: str,
+    watermark_width: int,
+    journal: Optional[JobJournal] = None,
+    storage: Optional[StorageManager] = None
+) -> Optional[RecordingJob]:
+    username = job.username
+    # Uma única sondagem do ffprobe serve a validação, a marca d'água, o título e o rec.json.
+    job.media_info = probe_media(job.video_path)
+    file_is_valid = manage_recorded_file(
+        video_path=job.video_path,
+        thumbnail_path=job.poster_path,
+        min_duration=min_duration,
+        media_info=job.media_info
+    )
+    if not file_is_valid:
+        _discard_job(job, journal, "invalid", "gravação inválida ou abaixo da duração mínima")
+        return None
+    if journal:
+        journal.advance(job, VALIDATED)
+
+    # --- Adiciona marca d'água usando os argumentos recebidos (se a gravação ainda não a tiver) ---
+    if not job.watermarked:
+        watermarked_video_path = job.video_path.replace(".mp4", "_wm.mp4")
+        success = False
+        # A cópia com marca d'água duplica o ficheiro: só começa com espaço reservado para ela.
+        with _transcode_room(storage, job) as has_room:
+            if has_room:
+                success = add_watermark(
+                    input_video=job.video_path,
+                    output_video=watermarked_video_path,
+                    watermark_image=watermark_path,
+                    max_width=watermark_width,
+                    video_width=job.media_info.width
+                )
+            else:
+                logger.error(f"💽 Sem espaço para a marca d'água de {username} após a espera.")
         if success:
-            os.remove(temp_video_path)
-            temp_video_path = watermarked_video_path
+            original_video_path = job.video_path
+            job.video_path = watermarked_video_path
+            # O ficheiro com marca d'água é um ficheiro novo (codec, bitrate e tamanho mudam).
+            job.media_info = probe_media(job.video_path) or job.media_info.moved_to(job.video_path)
+            job.watermarked = True
+            # O diário passa a apontar para a cópia antes de o original ser apagado: uma interrupção
+            # aqui não deixa o trabalho sem vídeo.
+            if journal:
+                journal.advance(job, VALIDATED)
+            os.remove(original_video_path)
             logger.info(f"💧 Marca d'água adicionada ao vídeo de {username}.")
         else:
             logger.error(f"❌ Não foi possível adicionar marca d'água para {username}, prosseguindo com vídeo original.")
 
-        # --- Renomeia o arquivo de vídeo para o padrão correto antes do upload ---
-        from datetime import datetime
-        import pytz
-        now_sp = datetime.now(pytz.timezone('America/Sao_Paulo'))
-        formatted_date = now_sp.strftime('%d-%m-%Y')
-        formatted_time = now_sp.strftime('%H:%M')
-        duration_seconds = int(get_video_duration(temp_video_path))
-        def _format_duration(seconds: int) -> str:
-            seconds = int(seconds)
-            hours, remainder = divmod(seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            parts = []
-            if hours > 0:
-                parts.append(f"{hours}h")
-            if minutes > 0:
-                parts.append(f"{minutes}m")
-            if seconds > 0 or not parts:
-                parts.append(f"{seconds}s")
-            return "".join(parts)
-        formatted_duration = _format_duration(duration_seconds)
-        title = f"{username}_{formatted_date}_{formatted_time}_{formatted_duration}"
-        file_name = f"{title}.mp4"
-        final_video_path = os.path.join(config.TEMP_RECORDS_PATH, file_name)
-        os.rename(temp_video_path, final_video_path)
-        temp_video_path = final_video_path
+    # --- Renomeia o arquivo de vídeo para o padrão correto antes do upload ---
+    now_sp = datetime.now(pytz.timezone('America/Sao_Paulo'))
+    formatted_date = now_sp.strftime('%d-%m-%Y')
+    formatted_time = now_sp.strftime('%H:%M')
+    job.duration_seconds = int(job.media_info.duration)
+    formatted_duration = _format_duration(job.duration_seconds)
+    job.title = f"{username}_{formatted_date}_{formatted_time}_{formatted_duration}"
+    final_video_path = _titled_video_path(job.title)
+    # O título fica no diário antes da renomeação: a recuperação encontra o vídeo por qualquer dos nomes.
+    if journal:
+        journal.advance(job, VALIDATED)
+    os.rename(job.video_path, final_video_path)
+    job.video_path = final_video_path
+    job.media_info = job.media_info.moved_to(final_video_path)
+    if journal:
+        journal.advance(job, WATERMARKED)
+    return job
+
+def _titled_video_path(title: str) -> str:
+    return os.path.join(config.TEMP_RECORDS_PATH, f"{title}.mp4")
 
+def _locate_video(job: RecordingJob) -> Optional[str]:
+    """
+    O vídeo de um trabalho do diário no disco: o caminho registado ou, se o pós-processamento foi
+    interrompido durante a renomeação, o ficheiro com o título já registado.
+    """
+    if job.video_path and os.path.exists(job.video_path):
+        return job.video_path
+    if job.title and os.path.exists(_titled_video_path(job.title)):
+        return _titled_video_path(job.title)
+    return None
+
+@contextmanager
+def _transcode_room(storage: Optional[StorageManager], job: RecordingJob):
+    """Reserva (esperando, se necessário) o espaço da cópia transcodificada de `job`."""
+    if storage is None:
+        yield True
+        return
+    size = job.media_info.size or os.path.getsize(job.video_path)
+    with storage.reservation(job.video_path, size, config.STORAGE_SETTINGS['TRANSCODE_WAIT_SECONDS']) as reserved:
+        yield reserved
+
+# --- Etapa 3: Upload e metadados (pesado em rede, poucos em simultâneo) ---
+def upload_recording(job: RecordingJob, journal: Optional[JobJournal] = None) -> Optional[RecordingJob]:
+    username = job.username
+    # Se o upload falhar, o vídeo e o poster ficam no disco para a nova tentativa do diário.
+    # NÃO remover o arquivo .mp4 ao final do processamento! (mantém o vídeo na pasta)
+    if not job.video_slug:
         logger.info(f"📤 Iniciando upload do vídeo para {username}...")
-        upload_response = upload_video(temp_video_path)
+        upload_response = upload_video(job.video_path)
         if not upload_response or "id" not in upload_response:
             logger.error(f"❌ Falha no upload ou resposta inválida para {username}.")
-            return
+            if journal:
+                journal.fail(job, "upload falhou")
+            return None
 
-        video_slug = upload_response.get("id")
-        final_video_url = upload_response.get("url")
+        job.video_slug = upload_response.get("id")
+        job.video_url = upload_response.get("url")
+        if journal:
+            journal.advance(job, UPLOADED)
 
-        user_poster_dir = os.path.join(config.DRIVE_PERSISTENT_USER_PATH, username)
-        os.makedirs(user_poster_dir, exist_ok=True)
-        final_poster_path = os.path.join(user_poster_dir, f"{video_slug}.jpg")
-        shutil.move(temp_poster_path, final_poster_path)
-        final_poster_public_url = f"https://db.xcam.gay/user/{username}/{video_slug}.jpg"
+    user_poster_dir = os.path.join(config.DRIVE_PERSISTENT_USER_PATH, username)
+    os.makedirs(user_poster_dir, exist_ok=True)
+    final_poster_path = os.path.join(user_poster_dir, f"{job.video_slug}.jpg")
+    # Numa retoma após o upload, o poster pode já ter sido movido.
+    if job.poster_path and os.path.exists(job.poster_path):
+        shutil.move(job.poster_path, final_poster_path)
         logger.info(f"🖼️  Poster movido para o destino final: {final_poster_path}")
+    final_poster_public_url = f"https://db.xcam.gay/user/{username}/{job.video_slug}.jpg"
+
+    indexed = create_or_update_rec_json(
+        username=username,
+        video_id=job.video_slug,
+        upload_url=job.video_url,
+        poster_url=final_poster_public_url,
+        duration_seconds=job.duration_seconds
+    )
+    if not indexed:
+        logger.error(f"❌ Não foi possível registar o vídeo de {username} no rec.json.")
+        if journal:
+            journal.fail(job, "rec.json falhou")
+        return None
+    if journal:
+        journal.advance(job, INDEXED)
+    _PUBLISHED.inc()
+    emit_event("published", username=username, video=job.video_slug, duration_seconds=job.duration_seconds)
+    logger.info(f"✅ Processo para {username} concluído com sucesso.")
+    return job
 
-        create_or_update_rec_json(
-            username=username,
-            video_id=video_slug,
-            upload_url=final_video_url,
-            poster_url=final_poster_public_url,
-            duration_seconds=int(get_video_duration(temp_video_path))
+def _abandon_exhausted(journal: JobJournal):
+    """Fecha no diário os trabalhos sem mais tentativas, avisando uma única vez por trabalho."""
+    for job in journal.abandon_exhausted(config.JOB_JOURNAL_SETTINGS['MAX_UPLOAD_ATTEMPTS']):
+        logger.error(
+            f"❌ '{job.username}' esgotou as tentativas de publicação na etapa '{job.journal_stage}'. "
+            f"O vídeo fica em '{job.video_path}' para intervenção manual."
         )
-        logger.info(f"✅ Processo para {username} concluído com sucesso.")
+        emit_event("abandoned", username=job.username, stage=job.journal_stage, video=job.video_path)
 
-    finally:
-        # NÃO remover o arquivo .mp4 ao final do processamento! (mantém o vídeo na pasta)
-        # if os.path.exists(temp_video_path):
-        #     os.remove(temp_video_path)
-        if os.path.exists(temp_poster_path):
-            os.remove(temp_poster_path)
-        recording_set.remove(username)
-        logger.info(f"🧹 Tarefa para {username} finalizada e estado de gravação limpo.")
+def _resume_job(pipeline: BroadcastPipeline, job: RecordingJob, block: bool = True) -> bool:
+    """Entrega um trabalho à etapa seguinte à última concluída (ver `PipelineStage.submit`)."""
+    if job.journal_stage in (WATERMARKED, UPLOADED):
+        return pipeline.resume_upload(job, block=block)
+    return pipeline.resume(job, block=block)
+
+def _recover_jobs(pipeline: BroadcastPipeline, journal: JobJournal):
+    """
+    Retoma as gravações que uma execução anterior deixou por terminar: une os blocos de capturas
+    segmentadas interrompidas e entrega cada trabalho do diário à etapa seguinte à que concluiu.
+    """
+    recovered = set(recover_segment_dirs(config.TEMP_RECORDS_PATH))
+    # Os trabalhos sem mais tentativas não são retomados (o limite vale entre execuções).
+    _abandon_exhausted(journal)
+    pending = journal.pending()
+    journaled_paths = {job.video_path for job in pending}
+
+    # Os vídeos já enviados ficam na pasta; o `StorageManager` remove-os quando o espaço for preciso.
+    for job in pending:
+        if job.journal_stage == CAPTURING and job.video_path:
+            # A sessão grava `<base>.partN.mp4` e só os une em `<base>.mp4` no fim: as partes de uma
+            # captura interrompida (incluindo os blocos já unidos acima) são unidas agora. As que
+            # não foi possível unir seguem como gravações próprias (se ainda não estiverem no diário).
+            separate_paths = []
+            recover_session_parts(job.video_path, on_separate=separate_paths.append)
+            for video_path in separate_paths:
+                if video_path not in journaled_paths:
+                    logger.info(f"♻️ Parte por unir de '{job.username}' recuperada como gravação própria.")
+                    _resume_job(pipeline, _separate_job(job, video_path, journal))
+        if job.journal_stage == VALIDATED and job.watermarked and job.video_path and job.video_path.endswith("_wm.mp4"):
+            # Interrompido entre a marca d'água e a remoção do original: o original já não é preciso.
+            stale_original = job.video_path[:-len("_wm.mp4")] + ".mp4"
+            if os.path.exists(stale_original) and _locate_video(job):
+                os.remove(stale_original)
+        if job.journal_stage != UPLOADED:
+            job.video_path = _locate_video(job) or job.video_path
+        # Após o upload, só falta o rec.json: o vídeo local já pode ter sido removido pela quota.
+        if job.journal_stage != UPLOADED and (not job.video_path or not os.path.exists(job.video_path)):
+            logger.warning(f"⚠️ O vídeo de '{job.username}' ({job.journal_stage}) já não existe. A descartar o trabalho.")
+            _discard_job(job, journal, "missing", "vídeo em falta na recuperação")
+            continue
+        if job.journal_stage == CAPTURING:
+            # A captura foi interrompida: as partes legíveis foram unidas acima (a parte em curso
+            # num MP4 cortado a meio não tem o átomo `moov` e foi descartada).
+            job.journal_stage = CAPTURED
+            journal.advance(job, CAPTURED)
+        if job.journal_stage != UPLOADED and job.poster_path and not os.path.exists(job.poster_path):
+            capture_thumbnail(job.video_path, job.poster_path)
+        recovered.discard(job.video_path)
+        logger.info(f"♻️ Trabalho de '{job.username}' recuperado na etapa '{job.journal_stage}'. A retomar.")
+        _resume_job(pipeline, job)
+
+    # Capturas parciais anteriores ao diário: seguem para o pós-processamento como antes.
+    resumed = set()
+    leftovers = sorted(recovered)
+    # A lista cresce durante o ciclo: as partes que não foi possível unir entram como capturas próprias.
+    for video_path in leftovers:
+        session_output = session_output_for(video_path)
+        if session_output is not None:
+            # Parte de uma sessão sem registo no diário: as partes são unidas no MP4 da sessão.
+            if session_output in resumed or not recover_session_parts(session_output, on_separate=leftovers.append):
+                continue
+            video_path = session_output
+        if video_path in resumed or video_path in journaled_paths:
+            continue
+        if not os.path.exists(video_path):
+            continue
+        resumed.add(video_path)
+        base = os.path.splitext(os.path.basename(video_path))[0]
+        job = RecordingJob(
+            username=base.rsplit("_", 1)[0],
+            broadcast={},
+            video_path=video_path,
+            poster_path=os.path.join(config.TEMP_POSTERS_PATH, f"{base}.jpg")
+        )
+        if not os.path.exists(job.poster_path):
+            capture_thumbnail(video_path, job.poster_path)
+        journal.advance(job, CAPTURED)
+        logger.info(f"♻️ Captura parcial de '{job.username}' recuperada. A retomar o pós-processamento.")
+        pipeline.resume(job)
 
 def main(args: argparse.Namespace):
-    setup_logging(log_level=config.LOG_LEVEL, log_file=os.path.join(config.LOGS_PATH, config.LOG_FILE))
+    started_at = time.time()
+    logging_settings = config.LOGGING_SETTINGS
+    setup_logging(
+        log_level=config.LOG_LEVEL,
+        log_file=os.path.join(config.LOGS_PATH, config.LOG_FILE),
+        use_queue=logging_settings['USE_QUEUE'],
+        max_bytes=logging_settings['ROTATE_MAX_BYTES'],
+        when=logging_settings['ROTATE_WHEN'],
+        backup_count=logging_settings['BACKUP_COUNT']
+    )
+    # Eventos em JSON lines e, se configurado, o endpoint local das métricas.
+    metrics_settings = dict(config.METRICS_SETTINGS)
+    if args.metrics_port is not None:
+        metrics_settings['HTTP_PORT'] = args.metrics_port
+    metrics_server = start_metrics(metrics_settings)
 
     # Recupera argumentos de watermark
     watermark_path = args.watermark_path or getattr(config, "WATERMARK_IMAGE_PATH", "")
     watermark_width = args.watermark_width or getattr(config, "WATERMARK_MAX_WIDTH", 180)
+    recording_mode = args.recording_mode or config.RECORDING_SETTINGS['MODE']
+
+    # Concorrência de cada etapa do pipeline
+    pipeline_settings = config.PIPELINE_SETTINGS
+    record_workers = args.workers or config.DEFAULT_EXECUTION_SETTINGS['MAX_WORKERS']
+    postprocess_workers = args.postprocess_workers or pipeline_settings['POSTPROCESS_WORKERS'] or os.cpu_count() or 1
+    upload_workers = args.upload_workers or pipeline_settings['UPLOAD_WORKERS']
 
     logger.info("🚀 Iniciando o XCam REC Engine...")
     logger.info(f"    - Duração Mínima: {args.min_duration}s | Duração Máxima: {args.max_duration}s")
     logger.info(f"    - Marca d'água: {watermark_path} | Largura: {watermark_width}px")
+    logger.info(f"    - Modo de gravação: {recording_mode}")
+    logger.info(f"    - Trabalhadores: Gravação {record_workers} | Pós-processamento {postprocess_workers} | Upload {upload_workers}")
 
     os.makedirs(config.TEMP_RECORDS_PATH, exist_ok=True)
     os.makedirs(config.TEMP_POSTERS_PATH, exist_ok=True)
-    currently_recording = set()
-
-    while True:
-        try:
-            logger.info(f"📡 A procurar modelos online (Página: {args.page}, Limite: {args.limit})...")
-            online_models = get_online_models(page=args.page, limit=args.limit, country=args.country)
-            if not online_models:
-                logger.info("💤 Nenhum modelo online encontrado nesta verificação.")
-            else:
-                logger.info(f"🟢 Encontrados {len(online_models)} modelos online. A verificar tarefas...")
-                with ThreadPoolExecutor(max_workers=args.workers) as executor:
-                    for model in online_models:
-                        username = model.get("username")
-                        if username and username not in currently_recording:
-                            currently_recording.add(username)
-                            logger.info(f"➕ Adicionando {username} à fila de gravação.")
-                            executor.submit(
-                                process_broadcast_worker,
-                                model,
-                                args.min_duration,
-                                args.max_duration,
-                                currently_recording,
-                                watermark_path,
-                                watermark_width
-                            )
-        except Exception as e:
-            logger.critical(f"🔥 Erro crítico no loop principal: {e}", exc_info=True)
-
-        check_interval = config.DEFAULT_EXECUTION_SETTINGS['CHECK_INTERVAL_SECONDS']
-        logger.info(f"⏳ A aguardar {check_interval} segundos para a próxima verificação.")
-        time.sleep(check_interval)
+
+    # Diário persistente das gravações: o que ficar por terminar é retomado no arranque seguinte.
+    journal_settings = config.JOB_JOURNAL_SETTINGS
+    journal = JobJournal(journal_settings['PATH'])
+
+    # Quota da pasta temporária: adia capturas e transcodificações sem espaço e remove os vídeos já
+    # publicados (registados como terminados no diário) quando o espaço for preciso.
+    storage = StorageManager(config.TEMP_RECORDS_PATH, config.STORAGE_SETTINGS, evictable=journal.uploaded_files)
+
+    # Uma única sessão HTTP keep-alive para a API, com uma ligação por trabalhador de gravação.
+    api_client = configure_api_client(pool_size=max(record_workers, config.API_CLIENT_SETTINGS['POOL_SIZE']))
+
+    # Cadência adaptativa das verificações (o `--check-interval` define o intervalo normal).
+    poll_settings = config.POLL_SETTINGS
+    poller = AdaptivePoller(
+        base_interval=args.check_interval or config.DEFAULT_EXECUTION_SETTINGS['CHECK_INTERVAL_SECONDS'],
+        min_interval=poll_settings['MIN_INTERVAL_SECONDS'],
+        max_interval=poll_settings['MAX_INTERVAL_SECONDS'],
+        backoff_factor=poll_settings['BACKOFF_FACTOR'],
+        high_churn_ratio=poll_settings['HIGH_CHURN_RATIO']
+    )
+
+    # Último retrato da listagem online: a descoberta atualiza-o e as sessões consultam-no antes de reconectar.
+    snapshot = OnlineSnapshot()
+
+    # O pipeline vive durante toda a execução: as gravações decorrem nos trabalhadores da etapa de
+    # gravação e seguem para as etapas de pós-processamento e upload, cada uma com o seu limite,
+    # enquanto este loop continua a procurar novas transmissões a cada intervalo.
+    pipeline = BroadcastPipeline(
+        record=partial(
+            record_broadcast,
+            max_duration=args.max_duration,
+            single_pass=(recording_mode == "single_pass"),
+            watermark_path=watermark_path,
+            watermark_width=watermark_width,
+            segment_seconds=config.RECORDING_SETTINGS['SEGMENT_SECONDS'] if recording_mode == "segmented" else None,
+            journal=journal,
+            is_online=snapshot.is_online
+        ),
+        postprocess=partial(
+            postprocess_recording,
+            min_duration=args.min_duration,
+            watermark_path=watermark_path,
+            watermark_width=watermark_width,
+            journal=journal,
+            storage=storage
+        ),
+        upload=partial(upload_recording, journal=journal),
+        record_workers=record_workers,
+        postprocess_workers=postprocess_workers,
+        upload_workers=upload_workers,
+        record_queue=config.DEFAULT_EXECUTION_SETTINGS['MAX_QUEUE_SIZE'],
+        postprocess_queue=pipeline_settings['POSTPROCESS_QUEUE_SIZE'],
+        upload_queue=pipeline_settings['UPLOAD_QUEUE_SIZE'],
+        on_record_start=poller.note_record_started,
+        # Uma gravação que termina liberta uma vaga: antecipa a verificação seguinte.
+        on_record_end=lambda username: poller.wake()
+    )
+    pipeline.start()
+    if metrics_server is not None:
+        # Estado ao vivo em JSON: gravações ativas, trabalhos em cada etapa, filas e falhas recentes.
+        status_settings = config.STATUS_SETTINGS
+        register_status_route(
+            metrics_server,
+            pipeline=pipeline,
+            extra={"poller": poller.stats, "journal": journal.counts, "storage": storage.stats},
+            stale_seconds=status_settings['STALE_SECONDS'],
+            recent_failures=status_settings['RECENT_FAILURES'],
+            started_at=started_at
+        )
+        host, port = metrics_server.address[:2]
+        logger.info(f"🩺 Estado ao vivo em http://{host}:{port}/status")
+    # Registros acrescentados aos logs por uma execução anterior chegam já ao rec.json.
+    rec_store = get_rec_store()
+    rec_store.compact_all()
+    # O índice global reindexa os rec.json alterados fora deste processo (ex: `git pull`).
+    rec_store.catalog.sync()
+    _recover_jobs(pipeline, journal)
+
+    # Descoberta: todas as páginas (até ao limite), comparadas com o retrato da verificação anterior.
+    api_params = config.DEFAULT_EXECUTION_SETTINGS['API_PARAMS']
+    start_page = args.page or api_params['page']
+    page_limit = args.limit or api_params['limit']
+    max_pages = args.max_pages or config.DISCOVERY_SETTINGS['MAX_PAGES']
+    admission = AdmissionPolicy()
+
+    try:
+        while True:
+            poller.poll_started()
+            try:
+                logger.info(f"📡 A procurar modelos online (Páginas: {start_page}-{start_page + max_pages - 1}, Limite: {page_limit})...")
+                discovery = discover_online_models(
+                    limit=page_limit,
+                    country=args.country or api_params['country'] or None,
+                    start_page=start_page,
+                    max_pages=max_pages,
+                    max_workers=config.DISCOVERY_SETTINGS['PAGE_WORKERS']
+                )
+                logger.info(
+                    f"🔭 Descoberta: {len(discovery.broadcasts)} transmissões em {discovery.pages} páginas "
+                    f"({discovery.failed_pages} falhadas) | {discovery.payload_bytes / 1024:.0f} KB | "
+                    f"análise JSON {discovery.parse_seconds * 1000:.0f} ms | total {discovery.elapsed_seconds:.2f}s"
+                )
+                if discovery.pages and discovery.failed_pages == discovery.pages:
+                    logger.warning("⚠️ Nenhuma página da API respondeu. O retrato anterior é mantido.")
+                else:
+                    diff = snapshot.update(discovery.broadcasts, complete=discovery.complete)
+                    _ONLINE.set(len(snapshot))
+                    logger.info(
+                        f"🟢 {len(snapshot)} online | +{len(diff.online)} entradas | -{len(diff.offline)} saídas | "
+                        f"{len(diff.changed)} alteradas"
+                    )
+                    # Despacha o delta (entradas novas primeiro) e volta a tentar os online que ficaram
+                    # sem gravação (fila cheia na entrada ou sessão anterior já terminada).
+                    new_usernames = {broadcast['username'] for broadcast in diff.online}
+                    poller.note_discovered(new_usernames)
+                    poller.forget(diff.offline)
+                    retries = [b for b in snapshot.idle(pipeline.scheduler.is_tracked) if b['username'] not in new_usernames]
+                    record_stats = pipeline.scheduler.stats()
+                    # Disco quase cheio mesmo após remover os vídeos já enviados: a gravação de menor
+                    # pontuação é finalizada agora, em vez de todas falharem com o disco cheio.
+                    shortfall = storage.shortfall()
+                    running = pipeline.scheduler.running_scores()
+                    if shortfall and running:
+                        victim = min(running, key=running.get)
+                        logger.warning(
+                            f"💽 Faltam {shortfall / 1048576:.0f} MiB de espaço livre. "
+                            f"A finalizar a gravação de '{victim}' para proteger as restantes."
+                        )
+                        stop_session(victim)
+                    if not diff.online and not retries:
+                        logger.info("💤 Nenhuma transmissão nova para gravar nesta verificação.")
+                    else:
+                        # A política de admissão ordena as candidatas e decide exclusões e preempções,
+                        # sem admitir mais do que o agendador aceita (trabalhadores mais fila).
+                        in_pool = record_stats['active'] + record_stats['queued']
+                        plan = admission.plan(
+                            diff.online + retries,
+                            running=pipeline.scheduler.running_scores(),
+                            free_slots=record_stats['workers'] - in_pool,
+                            max_admit=max(record_stats['workers'] + record_stats['capacity'] - in_pool, 0) if record_stats['capacity'] else None
+                        )
+                        # Só começam as capturas cuja ocupação projetada cabe na quota; as restantes
+                        # ficam para a verificação seguinte (e, sem espaço, não há preempções).
+                        in_flight = max(record_stats['active'] + record_stats['queued'] - len(PROGRESS_TABLE.snapshot()), 0)
+                        budget = storage.capture_budget(args.max_duration, in_flight)
+                        if len(plan.admit) > budget:
+                            deferred = len(plan.admit) - budget
+                            plan.admit = plan.admit[:budget]
+                            plan.preempt = []
+                            storage.note_deferred("capture", deferred)
+                            logger.warning(f"💽 {deferred} capturas adiadas por falta de espaço na pasta temporária.")
+                        for username in plan.preempt:
+                            logger.info(f"🔀 A interromper a gravação de '{username}' para dar a vaga a uma transmissão mais valiosa.")
+                            stop_session(username)
+                        if plan.skipped:
+                            logger.info(f"🚫 {len(plan.skipped)} transmissões ignoradas pela política de admissão.")
+                        pipeline.dispatch(plan.admit, scores=plan.scores)
+
+                    record_stats = pipeline.scheduler.stats()
+                    poller.adjust(
+                        online=len(snapshot),
+                        events=len(diff.online) + len(diff.offline) + len(diff.changed),
+                        free_slots=record_stats['workers'] - record_stats['active'] - record_stats['queued']
+                    )
+
+                for stage, stats in pipeline.stats().items():
+                    _STAGE_ACTIVE.set(stats['active'], stage=stage)
+                    _STAGE_QUEUED.set(stats['queued'], stage=stage)
+                    logger.info(
+                        f"📊 Etapa '{stats['name']}': {stats['active']}/{stats['workers']} trabalhadores ocupados "
+                        f"({stats['saturation']:.0%}) | Fila: {stats['queued']}/{stats['capacity'] or '∞'} | "
+                        f"Concluídas: {stats['completed']} | Rejeitadas: {stats['rejected']} | "
+                        f"Esperas por vaga: {stats.get('blocked', 0)} ({stats.get('blocked_seconds', 0)}s)"
+                    )
+                logger.info(PROGRESS_TABLE.summary_line())
+
+                # Uploads falhados voltam à fila após o intervalo configurado. Com a fila da etapa cheia,
+                # o trabalho fica para a verificação seguinte, sem bloquear este ciclo.
+                deferred_retries = 0
+                for job in journal.retryable(journal_settings['UPLOAD_RETRY_SECONDS'], journal_settings['MAX_UPLOAD_ATTEMPTS']):
+                    if not _resume_job(pipeline, job, block=False):
+                        journal.requeue(job)
+                        deferred_retries += 1
+                        continue
+                    logger.info(f"🔁 A repetir o upload de '{job.username}' ({job.title or os.path.basename(job.video_path)}).")
+                if deferred_retries:
+                    logger.info(f"🚧 {deferred_retries} novas tentativas adiadas: fila cheia. Ficam para a próxima verificação.")
+                _abandon_exhausted(journal)
+                rec_store.compact_due()
+                storage.evict_expired()
+                storage_stats = storage.stats()
+                logger.info(
+                    f"💽 Pasta temporária: {storage_stats['used_bytes'] / 1024 ** 3:.1f} GB ocupados | "
+                    f"{storage_stats['free_bytes'] / 1024 ** 3:.1f} GB livres | "
+                    f"{storage_stats['pending_bytes'] / 1024 ** 3:.1f} GB previstos | "
+                    f"{storage_stats['evicted_bytes'] / 1024 ** 3:.1f} GB removidos"
+                )
+                rec_stats = rec_store.stats()
+                logger.info(f"🗃️ rec.json: {rec_stats['records']} registros acrescentados | {rec_stats['writes']} reescritas")
+                journal_counts = journal.counts()
+                logger.info(
+                    f"📒 Diário: {journal_counts.get(INDEXED, 0)} publicadas | "
+                    f"{sum(journal_counts.get(stage, 0) for stage in (CAPTURING, CAPTURED, VALIDATED, WATERMARKED, UPLOADED))} em curso | "
+                    f"{journal_counts['failed']} à espera de nova tentativa | "
+                    f"{journal_counts.get(ABANDONED, 0)} abandonadas"
+                )
+                api_stats = api_client.stats()
+                logger.info(
+                    f"🗂️ Cache de liveInfo: {api_stats['hits']} acertos | {api_stats['misses']} pedidos | "
+                    f"{api_stats['coalesced']} partilhados | {api_stats['cached']} em cache"
+                )
+            except Exception as e:
+                logger.critical(f"🔥 Erro crítico no loop principal: {e}", exc_info=True)
+
+            poll_stats = poller.stats()
+            latency = (
+                f"última {poll_stats['latency_last']:.1f}s | média {poll_stats['latency_avg']:.1f}s | p95 {poll_stats['latency_p95']:.1f}s"
+                if poll_stats['latency_last'] is not None else "sem medições"
+            )
+            logger.info(f"⏱️ Latência descoberta → gravação: {latency}")
+            logger.info(f"⏳ Próxima verificação em {poll_stats['interval']:.0f}s ({poll_stats['reason']}).")
+            if poller.wait():
+                logger.info("⚡ Vaga de gravação libertada. A antecipar a verificação.")
+    finally:
+        pipeline.shutdown(wait=False)
+        rec_store.compact_all()
+        journal.close()
+        stop_metrics()
 
 # ---------------------------------------------------------------------------------------------
 # 4. RODAPÉ / FIM DO CÓDIGO
@@ -231,18 +694,155 @@ def main(args: argparse.Namespace):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="XCam REC - Gravador Modular de Transmissões.")
-    parser.add_argument('--page', type=int, help='Número da página da API a ser consultada.')
+    parser.add_argument('--page', type=int, help='Primeira página da API a ser consultada.')
     parser.add_argument('--limit', type=int, help='Número máximo de transmissões por página.')
+    parser.add_argument('--check-interval', type=int, help='Intervalo normal, em segundos, entre verificações da API.')
+    parser.add_argument('--max-pages', type=int, help='Número máximo de páginas da API percorridas em cada verificação.')
     parser.add_argument('--workers', type=int, help='Número de gravações paralelas (threads).')
+    parser.add_argument('--postprocess-workers', type=int, help='Número de pós-processamentos (marca d\'água) em paralelo.')
+    parser.add_argument('--upload-workers', type=int, help='Número de uploads em paralelo.')
     parser.add_argument('--max-duration', type=int, help='Duração máxima de cada gravação em segundos.')
     parser.add_argument('--min-duration', type=int, help='Duração mínima para que uma gravação seja mantida.')
     parser.add_argument('--country', type=str, help='Filtra por código de país (ex: br, us).')
     parser.add_argument('--watermark-path', type=str, help='Caminho para a imagem/SVG da marca d\'água.')
     parser.add_argument('--watermark-width', type=int, help='Largura máxima da marca d\'água em pixels.')
+    parser.add_argument('--metrics-port', type=int, help='Porta do servidor local de métricas (/metrics) e estado (/status); 0 desativa.')
+    parser.add_argument('--recording-mode', choices=['copy', 'single_pass', 'segmented'], help='Modo de gravação: "copy" (marca d\'água depois), "single_pass" (durante a captura) ou "segmented" (blocos unidos no fim).')
     args = parser.parse_args()
     main(args)
 
 # @log de mudanças:
+# 2026-10-18 (v1.31.2):
+# - CORREÇÃO: Os trabalhos que esgotaram `MAX_UPLOAD_ATTEMPTS` são fechados no diário (`ABANDONED`),
+#   com um único aviso para intervenção manual, em vez de ganharem uma nova tentativa a cada arranque.
+#
+# 2026-10-18 (v1.31.1):
+# - CORREÇÃO: As sessões de gravação recebem `is_online` (o retrato da descoberta) e não reconectam a
+#   um utilizador que terminou a transmissão.
+#
+# 2026-10-18 (v1.31.0):
+# - CORREÇÃO: As partes de uma sessão que não foi possível unir seguem como gravações próprias
+#   (`_separate_job`, registadas no diário), na gravação e na recuperação, em vez de só a primeira
+#   parte ser publicada e as restantes ficarem esquecidas no disco.
+#
+# 2026-10-18 (v1.30.5):
+# - CORREÇÃO: O pós-processamento regista no diário a cópia com marca d'água antes de apagar o
+#   original e o título antes de renomear; na recuperação, um vídeo já renomeado é encontrado pelo
+#   título, em vez de o trabalho ser descartado como "vídeo em falta" e o ficheiro ficar esquecido.
+#
+# 2026-10-18 (v1.30.4):
+# - CORREÇÃO: A quota só remove vídeos já enviados (`JobJournal.uploaded_files`), nunca os de
+#   gravações descartadas; um trabalho já enviado é retomado mesmo que o vídeo local já não exista.
+#
+# 2026-10-18 (v1.30.3):
+# - CORREÇÃO: As novas tentativas do diário são entregues sem esperar por vaga; com a fila cheia,
+#   voltam ao diário (`requeue`) para a verificação seguinte, em vez de bloquearem o ciclo principal.
+#
+# 2026-10-18 (v1.30.2):
+# - CORREÇÃO: A admissão só admite as transmissões que cabem nos trabalhadores e na fila de gravação;
+#   as restantes ficam para a verificação seguinte, em vez de um aviso de fila cheia por cada uma.
+#
+# 2026-10-18 (v1.30.1):
+# - CORREÇÃO: Na recuperação, as partes `<base>.partN.mp4` de uma captura interrompida são unidas no
+#   MP4 registado no diário, em vez de o trabalho ser descartado como "vídeo em falta" e as partes
+#   ficarem esquecidas na pasta temporária.
+#
+# 2026-10-18 (v1.30.0):
+# - FEATURE: Quota da pasta temporária (`StorageManager`, utils/storage.py): as capturas só são
+#   despachadas se a ocupação projetada couber, a marca d'água espera por espaço para a sua cópia e,
+#   com o disco quase cheio, a gravação de menor pontuação é finalizada.
+# - REFACTOR: Os vídeos já publicados deixam de ser apagados no arranque; são removidos pelo
+#   `StorageManager` (os mais antigos primeiro) quando o espaço é preciso.
+#
+# 2026-10-18 (v1.29.0):
+# - FEATURE: Estado ao vivo em JSON (`/status`, utils/status.py) no servidor local das métricas:
+#   gravações ativas, trabalhos em cada etapa, filas, cadência, diário e falhas recentes.
+#
+# 2026-10-18 (v1.28.0):
+# - FEATURE: Camada de métricas (utils/metrics.py): eventos em JSON lines, contadores de descartes e
+#   publicações, ocupação e fila de cada etapa, e o endpoint local opcional (`--metrics-port`).
+#
+# 2026-10-18 (v1.27.0):
+# - FEATURE: O logging é configurado a partir de `LOGGING_SETTINGS` (modo em fila e rotação).
+#
+# 2026-10-18 (v1.26.0):
+# - FEATURE: O índice global do catálogo é sincronizado no arranque.
+#
+# 2026-10-18 (v1.25.0):
+# - FEATURE: Os registros do rec.json são acrescentados a um log por utilizador; o loop principal
+#   compacta os logs vencidos e todos são compactados no arranque e no encerramento.
+#
+# 2026-10-18 (v1.24.0):
+# - CORREÇÃO: Uma falha ao gravar o rec.json deixa o trabalho como falhado no diário (nova tentativa
+#   sem repetir o upload), em vez de o dar como concluído.
+#
+# 2026-10-18 (v1.23.0):
+# - FEATURE: Diário persistente das gravações (`JobJournal`, SQLite): cada etapa concluída fica
+#   registada e, no arranque, `_recover_jobs` retoma as gravações por terminar a partir dessa etapa
+#   (substitui `_resume_partial_captures`). Os vídeos já publicados são apagados no arranque.
+# - FEATURE: Uploads falhados voltam à fila após `UPLOAD_RETRY_SECONDS`; o upload tem o seu próprio
+#   limite de trabalhadores (`--upload-workers`), independente das gravações.
+# - CORREÇÃO: Um upload falhado já não apaga o poster, necessário para a nova tentativa.
+#
+# 2026-10-18 (v1.22.0):
+# - FEATURE: As candidatas de cada verificação passam pela `AdmissionPolicy` (utils/admission.py):
+#   são despachadas por ordem de pontuação (espectadores, país, favoritos e histórico do rec.json),
+#   as de pontuação baixa são ignoradas com as vagas cheias e a preempção interrompe, se ativada,
+#   a gravação em curso menos valiosa.
+#
+# 2026-10-18 (v1.21.0):
+# - FEATURE: O `time.sleep` fixo foi substituído pelo `AdaptivePoller` (utils/poller.py): o intervalo
+#   encurta com vagas livres e muita rotatividade, alonga-se quando saturado ou calmo, é contado a
+#   partir do início de cada verificação e é antecipado quando uma gravação liberta uma vaga.
+# - FEATURE: Novo argumento `--check-interval` (o intervalo da CLI deixava de ser respeitado).
+# - FEATURE: O log mostra o intervalo efetivo e a latência entre a descoberta e o início da gravação.
+#
+# 2026-10-18 (v1.20.0):
+# - FEATURE: A descoberta percorre todas as páginas da API em simultâneo (até `--max-pages`) e compara
+#   cada retrato com o anterior (`OnlineSnapshot`). Só o delta (entradas novas, mais os online que
+#   ficaram sem gravação) é despachado; o tamanho da resposta e o custo da análise são registados.
+#
+# 2026-10-18 (v1.19.0):
+# - FEATURE: O cliente da API (`XCamAPIClient`) é configurado no arranque com o pool dimensionado para
+#   os trabalhadores de gravação, e as estatísticas da cache de liveInfo são registadas a cada ciclo.
+#   As reconexões ignoram a cache de liveInfo para obter uma URL atualizada.
+#
+# 2026-10-18 (v1.18.0):
+# - FEATURE: A gravação corre numa sessão com reconexão (`record_session`): após uma quebra, a URL é
+#   resolvida de novo (`_get_stream_url(refresh=True)` consulta primeiro o liveInfo) e as partes são
+#   unidas num único vídeo, em vez de a transmissão ser abandonada até à próxima verificação.
+#
+# 2026-10-18 (v1.17.0):
+# - FEATURE: `--recording-mode segmented` grava em blocos unidos sem perdas no fim. No arranque, as
+#   capturas parciais deixadas por uma execução interrompida são unidas e retomadas no pós-processamento.
+#
+# 2026-10-18 (v1.16.0):
+# - REFACTOR: O pós-processamento sonda cada ficheiro uma única vez (`probe_media`) e passa o
+#   `MediaInfo` à validação, à marca d'água, ao título e ao rec.json (antes eram até 4 ffprobe por vídeo).
+#
+# 2026-10-18 (v1.15.0):
+# - FEATURE: Novo argumento `--recording-mode` (padrão em `config.RECORDING_SETTINGS`). No modo
+#   "single_pass", a marca d'água e o poster são gerados durante a captura e a etapa de
+#   pós-processamento deixa de recodificar o vídeo.
+#
+# 2026-10-18 (v1.14.0):
+# - FEATURE: O loop principal regista uma linha agregada com o progresso de todas as gravações
+#   (`PROGRESS_TABLE.summary_line()`), no lugar das barras de progresso individuais.
+#
+# 2026-10-18 (v1.13.0):
+# - REFACTOR: `process_broadcast_worker` foi dividido nas etapas `record_broadcast`,
+#   `postprocess_recording` e `upload_recording`, executadas pelo `BroadcastPipeline`
+#   (utils/pipeline.py) com pools e filas limitadas independentes por etapa.
+# - FEATURE: Novos argumentos `--postprocess-workers` e `--upload-workers`.
+# - FEATURE: O log periódico mostra ocupação, fila e contrapressão de cada etapa.
+#
+# 2026-10-18 (v1.12.0):
+# - REFACTOR: O `ThreadPoolExecutor` recriado a cada verificação foi substituído pelo
+#   `RecordingScheduler` persistente (utils/scheduler.py). O loop deixa de esperar que todas as
+#   gravações terminem e continua a procurar transmissões a cada `CHECK_INTERVAL_SECONDS`.
+# - FEATURE: Log periódico da profundidade da fila e da saturação dos trabalhadores.
+# - CORREÇÃO: O bloco `finally` do trabalhador já não falha quando a URL do stream não é encontrada.
+#
 # 2025-08-27 (v1.11.0):
 # - Ajuste: Não remover mais o arquivo .mp4 final ao término do processamento.
 # - Manter apenas a remoção do .jpg temporário de thumbnail.
@@ -7,13 +7,19 @@
 # @titulo:         abyss_upload.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.7.0
-# @lastupdate:     2025-07-14
+# @version:        1.9.1
+# @lastupdate:     2026-10-18
 # @description:    Este módulo é responsável por fazer o upload de VÍDEOS para o serviço
-#                  de alojamento Hydrax/Abyss.to. A lógica de upload foi refatorada para
-#                  utilizar a biblioteca `requests` do Python, eliminando a dependência
-#                  externa do comando `curl` e tornando o módulo mais robusto e integrado.
-# @modes:          - Upload de Ficheiros via HTTP POST.
+#                  de alojamento Hydrax/Abyss.to. O corpo multipart é gerado em streaming, lendo o
+#                  ficheiro em blocos de tamanho fixo (memória limitada, sem carregar gravações de
+#                  vários GB), com novas tentativas e backoff exponencial em falhas de rede e erros 5xx.
+#                  Se o endpoint suportar uploads retomáveis (`Content-Range`), o ficheiro é enviado em
+#                  partes e uma falha retoma a partir do último byte confirmado pelo servidor. O
+#                  progresso regista o débito e a estimativa de tempo restante (ETA).
+# @modes:          - Upload Multipart em Streaming com Memória Limitada.
+#                  - Novas Tentativas com Backoff Exponencial.
+#                  - Upload Retomável por Partes (Content-Range), se suportado.
+#                  - Débito e ETA do Upload.
 
 # ---------------------------------------------------------------------------------------------
 # 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
@@ -24,28 +30,305 @@ import os                           # Usado para interações com o sistema de a
 import requests                     # Biblioteca principal para realizar requisições HTTP em Python.
 import json                         # Para analisar a resposta JSON do serviço de upload.
 import logging                      # Biblioteca padrão para logging.
-from typing import Optional, Dict, Any # Tipos para anotações, melhorando a clareza do código.
+import hashlib                      # Para o identificador estável de um upload retomável.
+import time                         # Relógio monotónico do débito, do ETA e do backoff.
+import uuid                         # Para a fronteira (boundary) do corpo multipart.
+from typing import Optional, Dict, Any, Iterator # Tipos para anotações, melhorando a clareza do código.
 
 # --- Importações de Módulos do Projeto ---
-from config import ABYSS_UPLOAD_URL # Importa a URL de upload do nosso arquivo de configuração central.
+from utils.metrics import METRICS, emit_event
+from config import ABYSS_UPLOAD_URL, UPLOAD_SETTINGS # Importa a URL e os parâmetros de upload do nosso arquivo de configuração central.
 
 # --- Variáveis Globais ---
 # Inicializa um logger específico para este módulo.
 logger = logging.getLogger(__name__)
 
-# Define um timeout mais longo para uploads, pois ficheiros grandes podem demorar. (Valor em segundos)
-UPLOAD_TIMEOUT = 300
+# Estado HTTP com que um endpoint retomável confirma uma parte sem concluir o upload.
+RESUME_INCOMPLETE_STATUS = 308
 
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
 # ---------------------------------------------------------------------------------------------
 
-def upload_video(file_path: str) -> Optional[Dict[str, Any]]:
+class _RetryableUploadError(Exception):
+    """Falha passageira (rede, timeout ou erro 5xx/429): o upload pode ser tentado de novo."""
+
+
+# Métricas dos uploads (ver utils/metrics.py).
+_UPLOADS = METRICS.counter("xcam_uploads_total", "Uploads terminados, por resultado.")
+_UPLOAD_RETRIES = METRICS.counter("xcam_upload_retries_total", "Novas tentativas de upload após falhas de rede ou do servidor.")
+_UPLOAD_BYTES = METRICS.counter("xcam_upload_bytes_total", "Bytes de vídeo publicados com sucesso.")
+_UPLOAD_SECONDS = METRICS.histogram("xcam_upload_seconds", "Duração de cada upload concluído, em segundos.")
+_UPLOAD_THROUGHPUT = METRICS.histogram(
+    "xcam_upload_throughput_mib_per_second", "Débito médio de cada upload concluído, em MiB/s.",
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 50, 100)
+)
+
+
+class UploadProgress:
+    """Bytes enviados, débito e ETA de um upload, com registo periódico no log."""
+
+    def __init__(self, file_name: str, total: int, log_interval: float):
+        self.file_name = file_name
+        self.total = total
+        self.sent = 0
+        self.log_interval = log_interval
+        self.started = time.monotonic()
+        self._last_log = self.started
+
+    def advance(self, size: int):
+        self.sent += size
+        now = time.monotonic()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logger.info(f"📶 Upload de '{self.file_name}': {self.describe()}")
+
+    def rewind(self, offset: int):
+        """Volta ao byte `offset` (nova tentativa ou retoma a partir do confirmado pelo servidor)."""
+        self.sent = offset
+
+    @property
+    def throughput(self) -> float:
+        """Débito médio desde o início, em bytes por segundo."""
+        elapsed = time.monotonic() - self.started
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Segundos estimados até ao fim, ao débito médio atual."""
+        throughput = self.throughput
+        return (self.total - self.sent) / throughput if throughput > 0 else None
+
+    def describe(self) -> str:
+        percent = self.sent / self.total * 100 if self.total else 100.0
+        eta = f"{self.eta:.0f}s" if self.eta is not None else "?"
+        return (
+            f"{self.sent / 1048576:.1f}/{self.total / 1048576:.1f} MiB ({percent:.0f}%) | "
+            f"{self.throughput / 1048576:.2f} MiB/s | ETA {eta}"
+        )
+
+
+def _read_blocks(file_path: str, start: int, length: int, block_size: int, progress: UploadProgress) -> Iterator[bytes]:
+    """Lê `length` bytes do ficheiro a partir de `start`, em blocos de no máximo `block_size`."""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            progress.advance(len(block))
+            yield block
+
+
+class _MultipartBody:
     """
-    Realiza o upload de um ficheiro de VÍDEO para o serviço de alojamento usando a biblioteca `requests`.
+    Corpo multipart/form-data gerado em streaming. O tamanho é conhecido à partida (`__len__`),
+    pelo que o `requests` envia um `Content-Length` e itera os blocos sem os guardar em memória.
+    """
+
+    def __init__(self, file_path: str, field: str, file_name: str, block_size: int, progress: UploadProgress):
+        self.boundary = uuid.uuid4().hex
+        self.file_path = file_path
+        self.file_size = os.path.getsize(file_path)
+        self.block_size = block_size
+        self.progress = progress
+        self.head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{file_name}"\r\n'
+            f'Content-Type: video/mp4\r\n\r\n'
+        ).encode('utf-8')
+        self.tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self) -> int:
+        return len(self.head) + self.file_size + len(self.tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.head
+        yield from _read_blocks(self.file_path, 0, self.file_size, self.block_size, self.progress)
+        yield self.tail
+
+
+class _FileRange:
+    """Um intervalo de bytes do ficheiro como corpo de pedido em streaming (upload retomável)."""
+
+    def __init__(self, file_path: str, start: int, length: int, block_size: int, progress: UploadProgress):
+        self.args = (file_path, start, length, block_size, progress)
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        return _read_blocks(*self.args)
+
+
+def _check_status(response: requests.Response):
+    """Converte erros passageiros do servidor (5xx, 429) em `_RetryableUploadError`."""
+    if response.status_code >= 500 or response.status_code == 429:
+        raise _RetryableUploadError(f"HTTP {response.status_code}")
+
+
+def _parse_response(response: requests.Response, file_name: str) -> Optional[Dict[str, Any]]:
+    """Normaliza a resposta final do serviço para {'id', 'url'} (None se indicar erro)."""
+    try:
+        # Levanta uma exceção para códigos de erro HTTP (4xx ou 5xx).
+        response.raise_for_status()
+        response_data = response.json()
+    except requests.exceptions.HTTPError as e:
+        logger.error(f"❌ Erro HTTP durante o upload de '{file_name}': {e}")
+        return None
+    except json.JSONDecodeError:
+        # Captura erros que ocorrem se a resposta do servidor não for um JSON válido.
+        logger.error(f"❌ Resposta inesperada (não-JSON) do serviço de upload para '{file_name}': {response.text}")
+        return None
+
+    # Verifica se a resposta da API indica sucesso e contém os dados esperados ('slug').
+    if response_data.get("status") is True and "slug" in response_data:
+        # Normaliza a resposta para o formato que o resto da nossa aplicação espera.
+        base_url = response_data.get("urlIframe", "").split('?')[0]
+        return {
+            "id": response_data.get("slug"),
+            "url": base_url
+        }
+    # Se o status não for 'true' ou faltarem chaves, a API retornou um erro lógico.
+    logger.error(f"❌ O serviço de upload retornou um erro ou uma resposta inesperada: {response.text}")
+    return None
+
+
+def _committed_offset(response: requests.Response) -> Optional[int]:
+    """Lê o último byte confirmado do cabeçalho `Range: bytes=0-N` de uma resposta 308 (None sem o cabeçalho)."""
+    header = response.headers.get("Range", "")
+    if header.startswith("bytes=") and "-" in header:
+        return int(header.rsplit("-", 1)[1]) + 1
+    return None
+
+
+class _ResumableUpload:
+    """
+    Upload retomável por partes, no protocolo `Content-Range` (o mesmo dos uploads retomáveis de
+    serviços como o Google Drive): cada parte é enviada com `Content-Range: bytes a-b/total`, o
+    servidor responde 308 com o intervalo confirmado e, na última parte, com a resposta final.
+    Um pedido vazio com `Content-Range: bytes */total` consulta quanto já foi confirmado.
+    """
+
+    def __init__(self, session: requests.Session, url: str, file_path: str, settings: Dict[str, Any], progress: UploadProgress):
+        stat = os.stat(file_path)
+        self.session = session
+        self.url = url
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.total = stat.st_size
+        self.settings = settings
+        self.progress = progress
+        self.timeout = (settings["CONNECT_TIMEOUT_SECONDS"], settings["READ_TIMEOUT_SECONDS"])
+        # Identificador estável: a mesma gravação retoma o mesmo upload, mesmo após reiniciar o processo.
+        upload_key = f"{self.file_name}:{stat.st_size}:{stat.st_mtime_ns}"
+        self.headers = {
+            "X-Upload-Id": hashlib.sha1(upload_key.encode("utf-8")).hexdigest(),
+            "X-Upload-Filename": self.file_name,
+        }
+        self.result: Optional[requests.Response] = None
+        # Só depois de uma resposta 308 se sabe que o endpoint é retomável.
+        self.confirmed = False
+
+    def query_offset(self) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: Os bytes já confirmados pelo servidor, ou None se o endpoint não for retomável.
+        """
+        response = self.session.post(
+            self.url,
+            data=b"",
+            headers={**self.headers, "Content-Range": f"bytes */{self.total}"},
+            timeout=self.timeout
+        )
+        _check_status(response)
+        if response.status_code == RESUME_INCOMPLETE_STATUS:
+            self.confirmed = True
+            # Na consulta, um 308 sem `Range` significa que nada foi confirmado ainda.
+            return _committed_offset(response) or 0
+        if self.confirmed and response.ok:
+            # A última parte chegou ao servidor, mas a resposta perdeu-se: o upload já está concluído.
+            self.result = response
+            return self.total
+        return None
+
+    def send_from(self, offset: int) -> Optional[int]:
+        """
+        Envia a parte que começa em `offset`.
+
+        Returns:
+            Optional[int]: O novo byte confirmado, ou None quando o upload terminou (ver `result`).
+
+        Raises:
+            _RetryableUploadError: Se o servidor responder 308 sem confirmar nada além de `offset`.
+        """
+        length = min(self.settings["RESUME_CHUNK_BYTES"], self.total - offset)
+        self.progress.rewind(offset)
+        response = self.session.post(
+            self.url,
+            data=_FileRange(self.file_path, offset, length, self.settings["READ_BLOCK_BYTES"], self.progress),
+            headers={
+                **self.headers,
+                "Content-Type": "application/octet-stream",
+                "Content-Range": f"bytes {offset}-{offset + length - 1}/{self.total}",
+            },
+            timeout=self.timeout
+        )
+        _check_status(response)
+        if response.status_code == RESUME_INCOMPLETE_STATUS:
+            self.confirmed = True
+            committed = _committed_offset(response)
+            if committed is None or committed <= offset:
+                # Sem progresso: conta como falha (backoff e MAX_ATTEMPTS) e o offset volta a ser
+                # consultado ao servidor, em vez de repetir a mesma parte sem fim ou recomeçar do zero.
+                raise _RetryableUploadError(f"HTTP 308 sem progresso a partir de {offset} bytes")
+            return committed
+        self.result = response
+        return None
+
+
+def _backoff(attempt: int, settings: Dict[str, Any]) -> float:
+    return min(settings["BACKOFF_SECONDS"] * (2 ** (attempt - 1)), settings["BACKOFF_MAX_SECONDS"])
+
+
+def _report_upload(progress: UploadProgress, result: str, attempts: int):
+    """Regista o resultado de um upload nas métricas e no fluxo de eventos."""
+    elapsed = time.monotonic() - progress.started
+    _UPLOADS.inc(result=result)
+    if result == "ok":
+        _UPLOAD_BYTES.inc(progress.total)
+        _UPLOAD_SECONDS.observe(elapsed)
+        _UPLOAD_THROUGHPUT.observe(progress.total / elapsed / 1048576 if elapsed > 0 else 0.0)
+    emit_event(
+        "upload", file=progress.file_name, result=result, bytes=progress.total,
+        seconds=round(elapsed, 3), attempts=attempts
+    )
+
+
+def upload_video(
+    file_path: str,
+    upload_url: Optional[str] = None,
+    settings: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Realiza o upload de um ficheiro de VÍDEO para o serviço de alojamento.
+
+    O corpo é enviado em streaming (memória limitada a um bloco de `READ_BLOCK_BYTES`). Falhas de
+    rede, timeouts e respostas 5xx/429 são repetidas até `MAX_ATTEMPTS` vezes seguidas, com backoff
+    exponencial. Com `RESUMABLE` ativo e um endpoint compatível, cada nova tentativa continua a
+    partir do último byte confirmado em vez de reenviar o ficheiro inteiro.
 
     Args:
         file_path (str): O caminho completo para o ficheiro de vídeo que será enviado.
+        upload_url (Optional[str], optional): Substitui `config.ABYSS_UPLOAD_URL` (ex: um servidor local de testes).
+        settings (Optional[Dict[str, Any]], optional): Substitui `config.UPLOAD_SETTINGS`.
 
     Returns:
         Optional[Dict[str, Any]]: Um dicionário normalizado com 'id' e 'url', ou None em caso de falha.
@@ -55,63 +338,104 @@ def upload_video(file_path: str) -> Optional[Dict[str, Any]]:
         logger.error(f"❌ Ficheiro de vídeo para upload não encontrado: {file_path}")
         return None
 
-    # Obtém o nome do ficheiro a partir do caminho completo.
+    settings = settings or UPLOAD_SETTINGS
+    upload_url = upload_url or ABYSS_UPLOAD_URL
     file_name = os.path.basename(file_path)
-    logger.info(f"☁️  Preparando para fazer o upload de '{file_name}'...")
+    progress = UploadProgress(file_name, os.path.getsize(file_path), settings["PROGRESS_LOG_SECONDS"])
+    logger.info(f"☁️  Preparando para fazer o upload de '{file_name}' ({progress.total / 1048576:.1f} MiB)...")
 
-    try:
-        # Utiliza um bloco `with` para garantir que o ficheiro seja fechado automaticamente.
-        # O ficheiro é aberto em modo de leitura binária ('rb'), que é essencial para uploads.
-        with open(file_path, 'rb') as f:
-            # Constrói o payload para a requisição multipart/form-data.
-            # O formato é um dicionário onde a chave 'file' corresponde ao nome do campo no formulário.
-            # O valor é uma tupla contendo (nome_do_ficheiro, objeto_do_ficheiro, tipo_mime).
-            files = {'file': (file_name, f, 'video/mp4')}
-            
-            # Realiza a requisição POST para a URL de upload com os ficheiros e um timeout adequado.
-            response = requests.post(ABYSS_UPLOAD_URL, files=files, timeout=UPLOAD_TIMEOUT)
-            
-            # Levanta uma exceção para códigos de erro HTTP (4xx ou 5xx).
-            response.raise_for_status()
-
-        # Analisa a resposta JSON do servidor.
-        response_data = response.json()
-        
-        # Verifica se a resposta da API indica sucesso e contém os dados esperados ('slug').
-        if response_data.get("status") is True and "slug" in response_data:
-            # Normaliza a resposta para o formato que o resto da nossa aplicação espera.
-            base_url = response_data.get("urlIframe", "").split('?')[0]
-            
-            normalized_response = {
-                "id": response_data.get("slug"),
-                "url": base_url
-            }
-            
-            logger.info(f"✅ Upload de '{file_name}' concluído com sucesso. ID do vídeo: {normalized_response['id']}")
-            return normalized_response
-        else:
-            # Se o status não for 'true' ou faltarem chaves, a API retornou um erro lógico.
-            logger.error(f"❌ O serviço de upload retornou um erro ou uma resposta inesperada: {response.text}")
-            return None
-
-    except requests.exceptions.RequestException as e:
-        # Captura todos os erros relacionados com a biblioteca requests (ex: timeout, falha de conexão).
-        logger.error(f"❌ Erro de rede ou HTTP durante o upload de '{file_name}': {e}")
-        return None
-    except json.JSONDecodeError:
-        # Captura erros que ocorrem se a resposta do servidor não for um JSON válido.
-        logger.error(f"❌ Resposta inesperada (não-JSON) do serviço de upload para '{file_name}': {response.text}")
-        return None
-    except Exception as e:
-        # Captura qualquer outra exceção inesperada para evitar que o programa quebre.
-        logger.error(f"❌ Ocorreu uma exceção inesperada durante o upload de '{file_name}': {e}", exc_info=True)
-        return None
+    with requests.Session() as session:
+        response = None
+        resumable = _ResumableUpload(session, upload_url, file_path, settings, progress) if settings["RESUMABLE"] else None
+        offset = 0
+        failures = 0
+        attempts = 1
+        while response is None:
+            try:
+                if resumable is not None:
+                    offset = resumable.query_offset()
+                    if offset is None:
+                        logger.info(f"ℹ️ O endpoint não suporta uploads retomáveis. A enviar '{file_name}' de uma só vez.")
+                        resumable = None
+                        continue
+                    while resumable.result is None:
+                        committed = resumable.send_from(offset)
+                        if committed is not None:
+                            # Progresso confirmado: as falhas seguidas voltam a zero.
+                            failures = 0
+                            offset = committed
+                    response = resumable.result
+                else:
+                    progress.rewind(0)
+                    body = _MultipartBody(file_path, 'file', file_name, settings["READ_BLOCK_BYTES"], progress)
+                    response = session.post(
+                        upload_url,
+                        data=body,
+                        headers={'Content-Type': body.content_type},
+                        timeout=(settings["CONNECT_TIMEOUT_SECONDS"], settings["READ_TIMEOUT_SECONDS"])
+                    )
+                    _check_status(response)
+            except (_RetryableUploadError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response = None
+                failures += 1
+                if failures >= settings["MAX_ATTEMPTS"]:
+                    logger.error(f"❌ Upload de '{file_name}' falhou após {failures} tentativas seguidas: {e}")
+                    _report_upload(progress, "error", attempts)
+                    return None
+                wait = _backoff(failures, settings)
+                logger.warning(
+                    f"🔁 Falha no upload de '{file_name}' ({e}). Tentativa {failures + 1}/{settings['MAX_ATTEMPTS']} "
+                    f"em {wait:.0f}s" + (f", a retomar a partir de {offset / 1048576:.1f} MiB." if resumable else ".")
+                )
+                time.sleep(wait)
+                attempts += 1
+                _UPLOAD_RETRIES.inc()
+            except requests.exceptions.RequestException as e:
+                # Outros erros da biblioteca requests (ex: URL inválida) não melhoram com novas tentativas.
+                logger.error(f"❌ Erro de rede ou HTTP durante o upload de '{file_name}': {e}")
+                _report_upload(progress, "error", attempts)
+                return None
+            except Exception as e:
+                # Captura qualquer outra exceção inesperada para evitar que o programa quebre.
+                logger.error(f"❌ Ocorreu uma exceção inesperada durante o upload de '{file_name}': {e}", exc_info=True)
+                _report_upload(progress, "error", attempts)
+                return None
+
+    normalized_response = _parse_response(response, file_name)
+    if normalized_response:
+        elapsed = time.monotonic() - progress.started
+        logger.info(
+            f"✅ Upload de '{file_name}' concluído com sucesso em {elapsed:.0f}s "
+            f"({progress.throughput / 1048576:.2f} MiB/s). ID do vídeo: {normalized_response['id']}"
+        )
+    _report_upload(progress, "ok" if normalized_response else "error", attempts)
+    return normalized_response
 
 # ---------------------------------------------------------------------------------------------
 # 4. RODAPÉ / FIM DO CÓDIGO
 # ---------------------------------------------------------------------------------------------
 
 # @log de mudanças:
+# 2026-10-18 (v1.9.1):
+# - CORREÇÃO: No upload retomável, um 308 que não avança o intervalo confirmado (ou que chega sem o
+#   cabeçalho `Range`) conta como falha passageira, com backoff e `MAX_ATTEMPTS`, em vez de repetir a
+#   mesma parte sem pausa para sempre ou de recomeçar o upload do byte 0.
+#
+# 2026-10-18 (v1.9.0):
+# - FEATURE: Cada upload regista o resultado, as novas tentativas, os bytes, a duração e o débito nas
+#   métricas (`xcam_upload_*`) e no fluxo de eventos (evento "upload").
+#
+# 2026-10-18 (v1.8.0):
+# - FEATURE: O corpo multipart é gerado em streaming (`_MultipartBody`), lendo o ficheiro em blocos de
+#   `READ_BLOCK_BYTES`, em vez de depender do `files=` do `requests`.
+# - FEATURE: Novas tentativas com backoff exponencial em falhas de rede, timeouts e respostas 5xx/429.
+# - FEATURE: Upload retomável por partes (`Content-Range`) quando `UPLOAD_SETTINGS["RESUMABLE"]` está
+#   ativo e o endpoint o suporta; caso contrário, o upload é feito de uma só vez.
+# - FEATURE: `UploadProgress` regista o débito e o ETA durante o upload.
+# - FEATURE: `upload_video` aceita `upload_url` e `settings` (ex: testes contra um servidor HTTP local).
+# - REFACTOR: O timeout único de 300s foi substituído por timeouts de ligação e de leitura
+#   (`UPLOAD_SETTINGS`), que não limitam a duração total do upload.
+#
 # 2025-07-14 (v1.7.0):
 # - REFACTOR CRÍTICO: O método de upload foi completamente reescrito para usar a biblioteca `requests`
 #   em vez de um subprocesso `curl`, eliminando dependências externas e melhorando o tratamento de erros.
@@ -124,7 +448,4 @@ def upload_video(file_path: str) -> Optional[Dict[str, Any]]:
 # - CORREÇÃO CRÍTICA: Ajustada a lógica de parsing da resposta da API de upload.
 
 # @roadmap futuro:
-# - Implementar uma lógica de "retry" com backoff exponencial para o upload, tornando-o mais
-#   resiliente a falhas de rede intermitentes.
-# - Investigar o uso de bibliotecas como `tqdm` para exibir uma barra de progresso do upload
-#   no console, monitorizando o stream de dados da requisição.
+# - Limitar a largura de banda dos uploads para não competir com as gravações em curso.
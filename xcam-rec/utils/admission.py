@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         admission.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.2
+# @lastupdate:     2026-10-18
+# @description:    Política de admissão das gravações. Quando há mais transmissões online do que
+#                  trabalhadores, decide quais ficam com as vagas: cada transmissão recebe uma
+#                  pontuação (espectadores, país, lista de favoritos e histórico de sessões longas no
+#                  rec.json do utilizador), as de pontuação mais alta saem primeiro da fila, as de
+#                  pontuação baixa são ignoradas com as vagas cheias e, se configurado, uma gravação de
+#                  pontuação muito inferior é interrompida para dar lugar a uma mais valiosa.
+# @modes:          - Pontuação de Transmissões (API + Histórico do rec.json).
+#                  - Lista de Favoritos e de Bloqueio.
+#                  - Regras de Exclusão e Preempção com as Vagas Cheias.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import json         # Para ler os ficheiros rec.json.
+import logging      # Para registar eventos importantes de forma padronizada.
+import os           # Para os caminhos e o mtime dos ficheiros rec.json.
+import threading    # Lock da cache do histórico, partilhada entre threads.
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from utils.rec_manager import parse_duration
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class RecordingHistory:
+    """
+    Histórico de gravações por utilizador, lido de `<DB_PATH>/<username>/rec.json`.
+
+    Cada ficheiro só é relido quando o seu mtime muda.
+    """
+
+    def __init__(self, db_path: str = config.DB_PATH):
+        self.db_path = db_path
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Dict[str, Any]:
+        """
+        Args:
+            username (str): O utilizador.
+
+        Returns:
+            Dict[str, Any]: `records` (número de gravações) e `avg_seconds` (duração média).
+        """
+        path = os.path.join(self.db_path, username, "rec.json")
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return {"records": 0, "avg_seconds": 0.0}
+
+        with self._lock:
+            cached = self._cache.get(username)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                videos = json.load(f).get("videos", [])
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Não foi possível ler o histórico de '{username}': {e}")
+            videos = []
+        durations = [parse_duration(video.get("tempo", "")) for video in videos]
+        history = {
+            "records": len(videos),
+            "avg_seconds": sum(durations) / len(durations) if durations else 0.0,
+        }
+        with self._lock:
+            self._cache[username] = (mtime, history)
+        return history
+
+
+@dataclass
+class AdmissionPlan:
+    """Decisão de admissão de uma verificação."""
+    admit: List[Dict[str, Any]] = field(default_factory=list)
+    scores: Dict[str, float] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    preempt: List[str] = field(default_factory=list)
+
+
+class AdmissionPolicy:
+    """
+    Política de admissão padrão, configurada por `config.ADMISSION_SETTINGS`.
+
+    Para outra política, basta criar uma subclasse e substituir `score` (e, se necessário, `plan`).
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, history: Optional[RecordingHistory] = None):
+        """
+        Args:
+            settings (Optional[Dict[str, Any]], optional): Substitui `config.ADMISSION_SETTINGS`.
+            history (Optional[RecordingHistory], optional): Fonte do histórico de gravações.
+        """
+        self.settings = settings or config.ADMISSION_SETTINGS
+        self.history = history or RecordingHistory()
+        self.allowlist = {name.lower() for name in self.settings["ALLOWLIST"]}
+        self.blocklist = {name.lower() for name in self.settings["BLOCKLIST"]}
+
+    def score(self, broadcast: Dict[str, Any]) -> Optional[float]:
+        """
+        Pontua uma transmissão. None significa que nunca deve ser gravada.
+
+        Args:
+            broadcast (Dict[str, Any]): A transmissão devolvida pela API.
+
+        Returns:
+            Optional[float]: A pontuação (maior é mais valiosa), ou None para excluir.
+        """
+        settings = self.settings
+        username = (broadcast.get("username") or "").lower()
+        if username in self.blocklist:
+            return None
+        country = (broadcast.get("country") or "").lower()
+        countries = [c.lower() for c in settings["COUNTRIES"]]
+        if countries and country not in countries and username not in self.allowlist:
+            return None
+
+        viewers = broadcast.get("viewers") or 0
+        history = self.history.get(broadcast.get("username"))
+        score = viewers * settings["VIEWER_WEIGHT"]
+        score += history["avg_seconds"] / 60 * settings["HISTORY_MINUTE_WEIGHT"]
+        score += settings["COUNTRY_BONUS"].get(country, 0)
+        if username in self.allowlist:
+            score += settings["ALLOWLIST_BONUS"]
+        return score
+
+    def plan(
+        self,
+        candidates: List[Dict[str, Any]],
+        running: Dict[str, float],
+        free_slots: int,
+        max_admit: Optional[int] = None
+    ) -> AdmissionPlan:
+        """
+        Decide, para as transmissões candidatas, quais despachar, quais ignorar e quais gravações
+        em curso interromper.
+
+        Args:
+            candidates (List[Dict[str, Any]]): Transmissões a despachar nesta verificação.
+            running (Dict[str, float]): Pontuação das gravações em curso (`RecordingScheduler.running_scores`).
+            free_slots (int): Trabalhadores de gravação livres (descontando a fila).
+            max_admit (Optional[int], optional): Vagas do agendador (trabalhadores livres mais a fila que
+                resta). As candidatas além delas são ignoradas nesta verificação. None = sem limite.
+
+        Returns:
+            AdmissionPlan: As transmissões admitidas (por ordem de pontuação), as ignoradas e as gravações a interromper.
+        """
+        settings = self.settings
+        plan = AdmissionPlan()
+        ranked = []
+        for broadcast in candidates:
+            score = self.score(broadcast)
+            if score is None:
+                plan.skipped.append(broadcast.get("username"))
+            else:
+                ranked.append((score, broadcast))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+
+        # As primeiras `free_slots` transmissões entram já; as restantes só com pontuação suficiente
+        # e enquanto houver lugar na fila (o agendador rejeitaria as outras uma a uma).
+        waiting = []
+        for index, (score, broadcast) in enumerate(ranked):
+            if max_admit is not None and len(plan.admit) >= max_admit:
+                plan.skipped.append(broadcast.get("username"))
+                continue
+            if index >= free_slots and score < settings["MIN_SCORE_WHEN_FULL"]:
+                plan.skipped.append(broadcast.get("username"))
+                continue
+            plan.admit.append(broadcast)
+            plan.scores[broadcast["username"]] = score
+            if index >= free_slots:
+                waiting.append(score)
+
+        # Preempção: a melhor transmissão em espera substitui a pior gravação em curso, se valer mais.
+        ratio = settings["PREEMPT_RATIO"]
+        if ratio:
+            victims = sorted(running.items(), key=lambda item: item[1])
+            for score, (username, victim_score) in zip(waiting, victims):
+                if score < max(victim_score, 1) * ratio:
+                    break
+                plan.preempt.append(username)
+        return plan
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.2):
+# - CORREÇÃO: `plan` aceita `max_admit` (vagas livres mais o lugar que resta na fila) e ignora as
+#   candidatas além dele; com `MIN_SCORE_WHEN_FULL` 0 eram todas admitidas e o agendador rejeitava
+#   centenas por verificação, com um aviso cada.
+#
+# 2026-10-18 (v1.0.1):
+# - REFACTOR: A duração dos registos é interpretada por `rec_manager.parse_duration`.
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `admission.py` com `RecordingHistory`, `AdmissionPolicy` e `AdmissionPlan`.
+
+# @roadmap futuro:
+# - Considerar as tags e o género da transmissão na pontuação.
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         discovery.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.1.0
+# @lastupdate:     2026-10-18
+# @description:    Descoberta completa das transmissões online. Percorre todas as páginas da API (em
+#                  simultâneo, até um limite configurável) em vez de apenas a primeira, e compara o
+#                  resultado com o retrato anterior para produzir eventos de entrada (online), saída
+#                  (offline) e alteração (changed). O loop principal despacha apenas esse delta.
+# @modes:          - Busca Concorrente de Todas as Páginas.
+#                  - Diferença Incremental Entre Retratos (online/offline/changed).
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import logging      # Para registar eventos importantes de forma padronizada.
+import math         # Para calcular o número de páginas a partir do total.
+import time         # Para medir a duração de cada descoberta.
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.xcam_api import XCamAPIClient, get_api_client
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+@dataclass
+class DiscoveryResult:
+    """Resultado de uma descoberta: as transmissões de todas as páginas e o seu custo."""
+    broadcasts: List[Dict[str, Any]] = field(default_factory=list)
+    pages: int = 0
+    failed_pages: int = 0
+    payload_bytes: int = 0
+    parse_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        """False se alguma página falhou (o retrato não deve ser usado para detetar saídas)."""
+        return self.pages > 0 and self.failed_pages == 0
+
+
+@dataclass
+class BroadcastDiff:
+    """Diferença entre dois retratos consecutivos das transmissões online."""
+    online: List[Dict[str, Any]] = field(default_factory=list)
+    offline: List[str] = field(default_factory=list)
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def discover_online_models(
+    limit: int = 1000,
+    country: Optional[str] = None,
+    start_page: int = 1,
+    max_pages: int = 10,
+    max_workers: int = 4,
+    client: Optional[XCamAPIClient] = None
+) -> DiscoveryResult:
+    """
+    Busca todas as páginas de transmissões online, até `max_pages`.
+
+    A primeira página indica o total de páginas; as restantes são pedidas em simultâneo. Se a
+    API não indicar o total, as páginas seguintes são pedidas enquanto vierem cheias.
+
+    Args:
+        limit (int, optional): Transmissões por página.
+        country (Optional[str], optional): Código do país (ex: 'br', 'us').
+        start_page (int, optional): A primeira página a buscar.
+        max_pages (int, optional): Número máximo de páginas por descoberta.
+        max_workers (int, optional): Pedidos de páginas em simultâneo.
+        client (Optional[XCamAPIClient], optional): Cliente a usar (padrão: o partilhado).
+
+    Returns:
+        DiscoveryResult: As transmissões (sem duplicados, pela ordem das páginas) e o custo da descoberta.
+    """
+    client = client or get_api_client()
+    started = time.monotonic()
+    result = DiscoveryResult()
+    pages: Dict[int, List[Dict[str, Any]]] = {}
+
+    def collect(page: int, data: Optional[Dict[str, Any]]):
+        result.pages += 1
+        if data is None:
+            result.failed_pages += 1
+            return
+        pages[page] = data["items"]
+        result.payload_bytes += data["payload_bytes"]
+        result.parse_seconds += data["parse_seconds"]
+
+    first = client.get_online_page(page=start_page, limit=limit, country=country)
+    collect(start_page, first)
+    if first is not None:
+        total_pages = first["total_pages"]
+        if total_pages is None and first["total"] is not None:
+            total_pages = math.ceil(first["total"] / limit) if limit else 1
+        last_page = start_page + max_pages - 1
+
+        if total_pages is not None:
+            remaining = list(range(start_page + 1, min(total_pages, last_page) + 1))
+            if remaining:
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(remaining))), thread_name_prefix="discovery") as executor:
+                    for page, data in zip(remaining, executor.map(
+                        lambda p: client.get_online_page(page=p, limit=limit, country=country), remaining
+                    )):
+                        collect(page, data)
+        else:
+            # Sem metadados de paginação: avança página a página enquanto vierem cheias.
+            page, data = start_page, first
+            while data is not None and len(data["items"]) >= limit and page < last_page:
+                page += 1
+                data = client.get_online_page(page=page, limit=limit, country=country)
+                collect(page, data)
+
+    seen = set()
+    for page in sorted(pages):
+        for broadcast in pages[page]:
+            username = broadcast.get("username")
+            if username and username not in seen:
+                seen.add(username)
+                result.broadcasts.append(broadcast)
+    result.elapsed_seconds = time.monotonic() - started
+    return result
+
+
+def _stream_fingerprint(broadcast: Dict[str, Any]) -> Optional[str]:
+    """O que, numa transmissão, conta como alteração: a URL do stream."""
+    return (broadcast.get("preview") or {}).get("src")
+
+
+class OnlineSnapshot:
+    """
+    Último retrato conhecido das transmissões online e a diferença para o retrato seguinte.
+    """
+
+    def __init__(self):
+        self._current: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def update(self, broadcasts: List[Dict[str, Any]], complete: bool = True) -> BroadcastDiff:
+        """
+        Substitui o retrato e retorna a diferença para o anterior.
+
+        Args:
+            broadcasts (List[Dict[str, Any]]): As transmissões da nova descoberta.
+            complete (bool, optional): Se False (alguma página falhou), os utilizadores ausentes
+                                       não são dados como offline e continuam no retrato.
+
+        Returns:
+            BroadcastDiff: Entradas, saídas e alterações desde o retrato anterior.
+        """
+        diff = BroadcastDiff()
+        current = {b["username"]: b for b in broadcasts if b.get("username")}
+        for username, broadcast in current.items():
+            previous = self._current.get(username)
+            if previous is None:
+                diff.online.append(broadcast)
+            elif _stream_fingerprint(previous) != _stream_fingerprint(broadcast):
+                diff.changed.append(broadcast)
+
+        for username, broadcast in self._current.items():
+            if username in current:
+                continue
+            if complete:
+                diff.offline.append(username)
+            else:
+                current[username] = broadcast
+        self._current = current
+        return diff
+
+    def is_online(self, username: str) -> bool:
+        """Indica se o utilizador está no último retrato (usado pelas sessões antes de reconectar)."""
+        return username in self._current
+
+    def idle(self, is_busy: Callable[[str], bool]) -> List[Dict[str, Any]]:
+        """
+        Transmissões online que não estão a ser tratadas (ex: a gravação anterior atingiu a
+        duração máxima ou a fila estava cheia quando o utilizador entrou).
+
+        Args:
+            is_busy (Callable[[str], bool]): Indica se um utilizador já está em gravação ou na fila.
+
+        Returns:
+            List[Dict[str, Any]]: As transmissões a despachar de novo.
+        """
+        return [broadcast for username, broadcast in self._current.items() if not is_busy(username)]
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.1.0):
+# - FEATURE: `OnlineSnapshot.is_online` (as sessões de gravação confirmam-no antes de reconectar).
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `discovery.py` com `discover_online_models` e `OnlineSnapshot`.
+
+# @roadmap futuro:
+# - Usar os eventos "offline" para terminar mais cedo as sessões de gravação.
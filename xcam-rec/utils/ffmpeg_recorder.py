@@ -7,13 +7,16 @@
 # @titulo:         ffmpeg_recorder.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        2.1.0
-# @lastupdate:     2025-07-14
+# @version:        2.8.1
+# @lastupdate:     2026-10-18
 # @description:    Módulo unificado para interagir com o FFmpeg. Orquestra a gravação de
-#                  streams HLS, monitoriza o progresso em tempo real com uma barra de status
-#                  detalhada e, ao final, captura uma miniatura (thumbnail) do vídeo gravado.
+#                  streams HLS, publica o progresso estruturado (`-progress`) numa tabela de estado
+#                  partilhada e, ao final, captura uma miniatura (thumbnail) do vídeo gravado.
 #                  Este módulo combina as funcionalidades de gravação e captura de imagem.
 # @modes:          - Gravação de Stream HLS com Monitorização de Progresso.
+#                  - Motor Assíncrono (asyncio) que supervisiona vários FFmpeg num único loop.
+#                  - Gravação em Passagem Única (marca d'água e poster durante a captura).
+#                  - Gravação Segmentada (blocos MPEG-TS unidos sem perdas no fim).
 #                  - Captura de Miniatura de Vídeo.
 
 # ---------------------------------------------------------------------------------------------
@@ -21,64 +24,45 @@
 # ---------------------------------------------------------------------------------------------
 
 import os               # Usado para interações com o sistema operacional, como criar diretórios.
-import re               # Módulo de expressões regulares, para analisar a saída do FFmpeg.
 import subprocess       # Biblioteca principal para executar e gerenciar processos externos.
 import logging          # Para registar eventos importantes de forma padronizada.
-import math             # Para cálculos matemáticos (arredondamento) no progresso.
-from typing import Optional # Para anotações de tipo, melhorando a clareza do código.
+import asyncio          # Event loop que supervisiona todos os processos FFmpeg de gravação.
+import signal           # SIGINT para finalizar um FFmpeg parado à espera da rede.
+import threading        # Thread dedicada ao event loop e lock do motor partilhado.
+import concurrent.futures # Futures devolvidos às threads que aguardam uma gravação.
+import time             # Relógio monotónico da duração de cada processo FFmpeg.
+from collections import deque # Guarda apenas as últimas linhas de erro de cada FFmpeg.
+from typing import Any, Dict, List, Optional, Set # Para anotações de tipo, melhorando a clareza do código.
+
+import config
+from utils.metrics import METRICS, emit_event
+from utils.progress import PROGRESS_TABLE, ProgressTable
+from utils.watermark import build_encoder_args, build_overlay_filter, get_watermark_asset
+from utils.segments import SegmentWatcher, build_segment_output_args, finalize_segments, segments_dir_for
 
 # Inicializa um logger específico para este módulo, permitindo um controlo granular dos logs.
 logger = logging.getLogger(__name__)
 
-# ---------------------------------------------------------------------------------------------
-# 3. CORPO
-# ---------------------------------------------------------------------------------------------
+# Número de linhas finais do stderr do FFmpeg guardadas para diagnóstico em caso de erro.
+STDERR_TAIL_LINES = 20
 
-def _format_seconds(seconds: float) -> str:
-    """
-    Formata um total de segundos para o formato de tempo legível HH:MM:SS.
-    Função auxiliar interna para a barra de progresso.
+# Margem (em segundos) dada ao FFmpeg além da duração máxima antes de ser parado pelo temporizador.
+STOP_GRACE_SECONDS = 30
 
-    Args:
-        seconds (float): O número total de segundos a ser formatado.
+# Métricas dos processos FFmpeg de gravação (ver utils/metrics.py).
+_RECORDING_SECONDS = METRICS.histogram("xcam_recording_seconds", "Duração de cada processo FFmpeg de gravação, em segundos.")
+_RECORDING_EXITS = METRICS.counter("xcam_recording_exits_total", "Processos FFmpeg de gravação terminados, por resultado.")
+_RECORDED_BYTES = METRICS.counter("xcam_recorded_bytes_total", "Bytes escritos pelas gravações.")
+_ACTIVE_RECORDINGS = METRICS.gauge("xcam_recordings_active", "Processos FFmpeg de gravação em curso.")
+_RECORDING_STALLS = METRICS.counter("xcam_recording_stalls_total", "Gravações paradas pelo watchdog por falta de crescimento.")
 
-    Returns:
-        str: A string de tempo formatada (ex: "01:23:45").
-    """
-    # Converte os segundos para inteiros para os cálculos.
-    seconds = int(seconds)
-    # Calcula as horas.
-    h = seconds // 3600
-    # Calcula os minutos restantes.
-    m = (seconds % 3600) // 60
-    # Calcula os segundos restantes.
-    s = seconds % 60
-    # Retorna a string formatada com zeros à esquerda para garantir dois dígitos.
-    return f"{h:02d}:{m:02d}:{s:02d}"
-
-def _log_progress(username: str, elapsed_seconds: float, total_seconds: int):
-    """
-    Exibe o progresso da gravação de cada transmissão em tempo real no console.
-    Função auxiliar interna para a gravação.
+# Motor de gravação partilhado pelo processo (criado sob demanda por `get_recorder_engine`).
+_engine = None
+_engine_lock = threading.Lock()
 
-    Args:
-        username (str): O nome do utilizador para identificação no log.
-        elapsed_seconds (float): O tempo de gravação já decorrido.
-        total_seconds (int): A duração total esperada da gravação.
-    """
-    # Calcula a percentagem concluída, garantindo que não ultrapasse 100%.
-    percent = min((elapsed_seconds / total_seconds) * 100, 100)
-    # Formata o tempo decorrido para um formato legível.
-    tempo_decorrido = _format_seconds(elapsed_seconds)
-    # Calcula os minutos totais gravados.
-    minutos_gravados = math.floor(elapsed_seconds / 60)
-    # Calcula os minutos restantes, garantindo que não seja negativo.
-    minutos_restantes = max(0, math.ceil((total_seconds - elapsed_seconds) / 60))
-    
-    # Imprime a linha de progresso formatada.
-    # O `end='\r'` faz com que o cursor volte ao início da linha, permitindo que a
-    # próxima impressão sobrescreva a atual, criando o efeito de atualização em tempo real.
-    print(f"⏱️  [{username}] Gravados: {minutos_gravados} min | Restantes: {minutos_restantes} min | Tempo total: {tempo_decorrido} — 📊 {percent:.1f}% concluído", end='\r')
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
 
 def capture_thumbnail(video_path: str, thumbnail_path: str, timestamp: str = "00:00:07") -> bool:
     """
@@ -130,50 +114,412 @@ def capture_thumbnail(video_path: str, thumbnail_path: str, timestamp: str = "00
         logger.error(f"❌ Ocorreu uma exceção inesperada durante a captura do thumbnail: {e}")
         return False
 
-def record_stream_and_capture_thumbnail(username: str, stream_url: str, output_path: str, thumbnail_path: str, max_duration: int) -> bool:
+def _build_record_command(stream_url: str, output_path: str, max_duration: int) -> List[str]:
     """
-    Orquestra o processo completo: grava um stream e, se bem-sucedido, captura um thumbnail.
+    Constrói o comando FFmpeg para a gravação de um stream HLS sem recodificação.
+
+    Args:
+        stream_url (str): A URL do stream (m3u8).
+        output_path (str): O caminho do ficheiro MP4 de saída.
+        max_duration (int): A duração máxima da gravação em segundos.
+
+    Returns:
+        List[str]: O comando pronto a ser executado.
     """
-    logger.info(f"🎥 Preparando para gravar '{username}' com duração máxima de {max_duration}s.")
-    
-    # Constrói o comando FFmpeg para a gravação do stream.
-    command = [
+    return [
         'ffmpeg',
         '-i', stream_url,
         '-t', str(max_duration),
         '-c', 'copy',
         '-bsf:a', 'aac_adtstoasc',
+        # Progresso estruturado (chave=valor) no stdout; o stderr fica reservado aos erros.
+        '-nostats',
+        '-loglevel', 'error',
+        '-progress', 'pipe:1',
         '-y',
         output_path
     ]
 
-    try:
-        # Inicia o processo FFmpeg, redirecionando stderr para um pipe para ler o progresso.
-        process = subprocess.Popen(command, stderr=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding='utf-8')
+def _build_segmented_command(stream_url: str, segments_dir: str, max_duration: int, segment_seconds: int) -> List[str]:
+    """
+    Constrói o comando FFmpeg para gravar o stream sem recodificação em blocos MPEG-TS de duração
+    fixa (muxer `segment`), em vez de um único MP4.
+
+    Args:
+        stream_url (str): A URL do stream (m3u8).
+        segments_dir (str): A pasta onde os blocos são escritos.
+        max_duration (int): A duração máxima da gravação em segundos.
+        segment_seconds (int): A duração de cada bloco em segundos.
+
+    Returns:
+        List[str]: O comando pronto a ser executado.
+    """
+    return [
+        'ffmpeg',
+        '-i', stream_url,
+        '-t', str(max_duration),
+        '-c', 'copy',
+        '-nostats',
+        '-loglevel', 'error',
+        '-progress', 'pipe:1',
+        '-y',
+        *build_segment_output_args(segments_dir, segment_seconds)
+    ]
+
+def _build_single_pass_command(
+    stream_url: str,
+    output_path: str,
+    max_duration: int,
+    watermark_image: str,
+    thumbnail_path: str,
+    watermark_width: int = 180,
+    encoder_preset: Optional[str] = None,
+    poster_at: int = 7
+) -> List[str]:
+    """
+    Constrói o comando FFmpeg de passagem única: grava o stream já com a marca d'água aplicada e
+    escreve o poster na mesma invocação, descodificando o stream uma única vez.
+
+    Args:
+        stream_url (str): A URL do stream (m3u8).
+        output_path (str): O caminho do ficheiro MP4 de saída.
+        max_duration (int): A duração máxima da gravação em segundos.
+        watermark_image (str): Caminho da imagem (PNG) da marca d'água.
+        thumbnail_path (str): O caminho do poster (JPG) a gerar.
+        watermark_width (int, optional): Largura máxima da marca d'água em pixels.
+        encoder_preset (Optional[str], optional): Nome do preset em `config.ENCODER_PRESETS`.
+        poster_at (int, optional): Segundo da gravação usado como poster.
+
+    Returns:
+        List[str]: O comando pronto a ser executado.
+    """
+    return [
+        'ffmpeg',
+        '-i', stream_url,
+        # A imagem é repetida indefinidamente; o `overlay` termina com o stream (shortest=1).
+        '-loop', '1',
+        '-i', watermark_image,
+        '-filter_complex', build_overlay_filter(max_width=watermark_width, poster_at=poster_at),
+        '-nostats',
+        '-loglevel', 'error',
+        '-progress', 'pipe:1',
+        # Saída 1: o vídeo com marca d'água (o áudio é copiado sem recodificar).
+        '-map', '[vout]',
+        '-map', '0:a?',
+        *build_encoder_args(encoder_preset),
+        '-c:a', 'copy',
+        '-bsf:a', 'aac_adtstoasc',
+        '-t', str(max_duration),
+        '-y',
+        output_path,
+        # Saída 2: um único frame a partir de `poster_at` segundos, como poster.
+        '-map', '[poster]',
+        '-frames:v', '1',
+        '-q:v', '2',
+        '-y',
+        thumbnail_path
+    ]
+
+class AsyncRecorderEngine:
+    """
+    Motor de gravação baseado em `asyncio` que supervisiona vários processos FFmpeg a partir de
+    um único event loop (a correr numa thread dedicada).
+
+    Cada gravação é uma corrotina: o processo é lançado com `asyncio.create_subprocess_exec`,
+    a saída de progresso é lida sem bloquear nenhuma thread e a duração máxima é garantida por
+    um temporizador do loop, que pede ao FFmpeg para terminar ('q') e, se necessário, mata-o.
+    O progresso vem do canal estruturado `-progress` e é publicado numa `ProgressTable`.
+
+    Um watchdog no mesmo loop acompanha o crescimento de cada gravação (bytes reportados pelo
+    `-progress` e tamanho do ficheiro de saída). Um FFmpeg preso à espera de um HLS que deixou de
+    responder não escreve nada; ao fim de `STALL_SECONDS` sem crescimento recebe SIGINT, que
+    interrompe a leitura da rede e fecha o MP4 corretamente, e é morto se não sair a tempo. A vaga
+    volta a ficar livre e a sessão (utils/recording_session.py) reconecta se ainda houver tempo.
+    """
 
-        # Expressão regular para encontrar a informação de tempo na saída do FFmpeg (ex: time=00:01:23.45).
-        time_pattern = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
+    def __init__(
+        self,
+        stop_grace_seconds: int = STOP_GRACE_SECONDS,
+        progress_table: ProgressTable = PROGRESS_TABLE,
+        watchdog_settings: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            stop_grace_seconds (int, optional): Margem dada ao FFmpeg além da duração máxima antes de
+                                                ser parado, e depois do pedido de paragem antes de ser morto.
+            progress_table (ProgressTable, optional): Tabela onde o progresso de cada gravação é publicado.
+            watchdog_settings (Optional[Dict[str, Any]], optional): Substitui `config.WATCHDOG_SETTINGS`.
+        """
+        self.stop_grace_seconds = stop_grace_seconds
+        self.progress_table = progress_table
+        self.watchdog_settings = watchdog_settings or config.WATCHDOG_SETTINGS
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+        # Por gravação: ficheiro de saída, maior tamanho visto e instante do último crescimento.
+        self._growth: Dict[str, Dict[str, Any]] = {}
+        # Gravações paradas pelo watchdog (a sua saída é tratada como finalizada, não como erro).
+        self._stalled: Set[str] = set()
 
-        # Loop para ler a saída do FFmpeg em tempo real.
+    def start(self):
+        """Inicia o event loop na sua thread dedicada (chamadas repetidas são ignoradas)."""
+        with self._lock:
+            if self._loop is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="ffmpeg-engine", daemon=True)
+            self._thread.start()
+            if self.watchdog_settings["ENABLED"]:
+                asyncio.run_coroutine_threadsafe(self._watchdog(), self._loop)
+        logger.info("🎛️  Motor de gravação assíncrono iniciado.")
+
+    def submit(self, username: str, stream_url: str, output_path: str, max_duration: int, command: Optional[List[str]] = None) -> concurrent.futures.Future:
+        """
+        Agenda uma gravação no event loop a partir de qualquer thread.
+
+        Returns:
+            concurrent.futures.Future: Resolve com o código de saída do FFmpeg.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(
+            self.record(username, stream_url, output_path, max_duration, command), self._loop
+        )
+
+    async def record(self, username: str, stream_url: str, output_path: str, max_duration: int, command: Optional[List[str]] = None) -> int:
+        """
+        Grava um stream e supervisiona o processo FFmpeg até ao fim.
+
+        Args:
+            username (str): O nome do utilizador (identifica a gravação).
+            stream_url (str): A URL do stream HLS.
+            output_path (str): O caminho do ficheiro MP4 de saída.
+            max_duration (int): A duração máxima da gravação em segundos.
+            command (Optional[List[str]], optional): Comando FFmpeg alternativo (ex: passagem única).
+                                                     Por padrão, grava com `-c copy`.
+
+        Returns:
+            int: O código de saída do FFmpeg.
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        process = await asyncio.create_subprocess_exec(
+            *(command or _build_record_command(stream_url, output_path, max_duration)),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self._processes[username] = process
+        _ACTIVE_RECORDINGS.set(len(self._processes))
+        self.progress_table.start(username, output_path, max_duration)
+        started = time.monotonic()
+        self._growth[username] = {"output_path": output_path, "size": 0, "grew_at": started}
+        return_code = None
+        loop = asyncio.get_running_loop()
+        # Rede de segurança: o `-t` deve terminar a gravação; se o FFmpeg não o fizer, o temporizador pára-o.
+        timer = loop.call_later(max_duration + self.stop_grace_seconds, self._request_stop, username, process)
+        stderr_tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+        try:
+            await asyncio.gather(
+                self._read_progress(username, process),
+                self._drain_stderr(process, stderr_tail)
+            )
+            return_code = await process.wait()
+            if username in self._stalled and return_code > 0:
+                # Saiu sozinho após o SIGINT do watchdog: o MP4 foi fechado e o que foi gravado é válido.
+                logger.info(f"🩹 Gravação parada de '{username}' finalizada (código {return_code}).")
+                return_code = 0
+            if return_code != 0 and stderr_tail:
+                logger.error(f"📄 Últimas mensagens do FFmpeg para '{username}':\n" + "\n".join(stderr_tail))
+            return return_code
+        finally:
+            timer.cancel()
+            if process.returncode is None:
+                # Supervisão interrompida (ex: cancelamento): o processo não pode ficar órfão nem zombie.
+                process.kill()
+                await process.wait()
+            self._processes.pop(username, None)
+            self._growth.pop(username, None)
+            self._stalled.discard(username)
+            self.progress_table.finish(username)
+            self._report(username, output_path, return_code, time.monotonic() - started)
+
+    def _report(self, username: str, output_path: str, return_code: Optional[int], seconds: float):
+        """Regista a duração, o resultado e os bytes gravados por um processo FFmpeg."""
+        result = "ok" if return_code == 0 else "error"
+        size = os.path.getsize(output_path) if os.path.isfile(output_path) else 0
+        _ACTIVE_RECORDINGS.set(len(self._processes))
+        _RECORDING_SECONDS.observe(seconds)
+        _RECORDING_EXITS.inc(result=result)
+        _RECORDED_BYTES.inc(size)
+        emit_event("recording", username=username, result=result, return_code=return_code, seconds=round(seconds, 3), bytes=size)
+
+    async def _read_progress(self, username: str, process: asyncio.subprocess.Process):
+        """Lê os blocos chave=valor do `-progress` (terminados por `progress=...`) e publica-os na tabela."""
+        fields: Dict[str, str] = {}
+        async for raw_line in process.stdout:
+            key, _, value = raw_line.decode("utf-8", errors="replace").strip().partition("=")
+            if not key:
+                continue
+            if key != "progress":
+                fields[key] = value
+                continue
+            self.progress_table.update(username, fields, force=(value == "end"))
+            fields = {}
+
+    async def _drain_stderr(self, process: asyncio.subprocess.Process, tail: deque):
+        """Esvazia o stderr (para o pipe nunca encher) guardando apenas as últimas linhas."""
+        async for raw_line in process.stderr:
+            line = raw_line.decode("utf-8", errors="replace").rstrip()
+            if line:
+                tail.append(line)
+
+    def _request_stop(self, username: str, process: asyncio.subprocess.Process):
+        """Callback do temporizador: agenda a paragem graciosa do processo."""
+        logger.warning(f"⏰ Gravação de '{username}' excedeu a duração máxima. A parar o FFmpeg...")
+        asyncio.ensure_future(self._terminate(process))
+
+    async def _terminate(self, process: asyncio.subprocess.Process, interrupt: bool = False):
+        """
+        Pede ao FFmpeg para terminar ('q', que fecha o MP4 corretamente) e mata-o se não obedecer.
+
+        Args:
+            process (asyncio.subprocess.Process): O processo FFmpeg.
+            interrupt (bool, optional): Usa SIGINT em vez de 'q'. O 'q' só é lido entre pacotes; o
+                                        SIGINT interrompe também uma leitura da rede bloqueada.
+        """
+        if process.returncode is not None:
+            return
+        try:
+            if interrupt:
+                process.send_signal(signal.SIGINT)
+            else:
+                process.stdin.write(b"q")
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError, ProcessLookupError):
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), timeout=self.stop_grace_seconds)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    def _current_size(self, username: str, state: Dict[str, Any]) -> int:
+        """
+        Bytes escritos até agora: o maior entre o `-progress`, o ficheiro de saída e, nas gravações
+        segmentadas, a soma dos blocos (o muxer `segment` reporta `total_size=N/A` e o MP4 final só
+        existe depois da união).
+        """
+        reported = (self.progress_table.snapshot().get(username) or {}).get("total_size") or 0
+        try:
+            on_disk = os.path.getsize(state["output_path"])
+        except OSError:
+            on_disk = 0 # Ficheiro ainda por criar (ou gravação segmentada).
+        segments_dir = segments_dir_for(state["output_path"])
+        if os.path.isdir(segments_dir):
+            try:
+                with os.scandir(segments_dir) as entries:
+                    on_disk = max(on_disk, sum(entry.stat().st_size for entry in entries if entry.is_file()))
+            except OSError:
+                pass # Pasta removida entretanto (união concluída).
+        return max(reported, on_disk)
+
+    async def _watchdog(self):
+        """Pára as gravações sem crescimento há mais de `STALL_SECONDS` (`STARTUP_SECONDS` antes do primeiro byte)."""
+        settings = self.watchdog_settings
         while True:
-            line = process.stderr.readline()
-            if not line and process.poll() is not None:
-                break  # O processo terminou e não há mais saída para ler.
+            await asyncio.sleep(settings["CHECK_INTERVAL_SECONDS"])
+            now = time.monotonic()
+            for username, process in list(self._processes.items()):
+                state = self._growth.get(username)
+                if state is None or username in self._stalled or process.returncode is not None:
+                    continue
+                size = self._current_size(username, state)
+                if size > state["size"]:
+                    state["size"], state["grew_at"] = size, now
+                    continue
+                idle = now - state["grew_at"]
+                if idle < (settings["STALL_SECONDS"] if state["size"] else settings["STARTUP_SECONDS"]):
+                    continue
+                self._stalled.add(username)
+                logger.warning(
+                    f"🧊 Gravação de '{username}' sem crescimento há {idle:.0f}s "
+                    f"({state['size'] / 1048576:.1f} MiB escritos). A finalizar o FFmpeg..."
+                )
+                _RECORDING_STALLS.inc()
+                emit_event("stall", username=username, idle_seconds=round(idle, 1), bytes=state["size"])
+                asyncio.ensure_future(self._terminate(process, interrupt=True))
+
+    def stop(self, username: str) -> bool:
+        """
+        Pede a paragem graciosa da gravação de um utilizador (thread-safe).
+
+        Returns:
+            bool: True se havia uma gravação ativa para o utilizador.
+        """
+        process = self._processes.get(username)
+        if process is None or self._loop is None:
+            return False
+        asyncio.run_coroutine_threadsafe(self._terminate(process), self._loop)
+        return True
+
+    def active_recordings(self) -> List[str]:
+        """Retorna os utilizadores com um processo FFmpeg ativo neste motor."""
+        return list(self._processes)
+
+def get_recorder_engine() -> AsyncRecorderEngine:
+    """Retorna o motor de gravação partilhado pelo processo, criando-o na primeira chamada."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncRecorderEngine()
+        return _engine
+
+def record_stream_and_capture_thumbnail(
+    username: str,
+    stream_url: str,
+    output_path: str,
+    thumbnail_path: str,
+    max_duration: int,
+    watermark_image: Optional[str] = None,
+    watermark_width: int = 180,
+    encoder_preset: Optional[str] = None,
+    segment_seconds: Optional[int] = None
+) -> bool:
+    """
+    Orquestra o processo completo: grava um stream e, se bem-sucedido, captura um thumbnail.
+
+    Invólucro síncrono sobre o `AsyncRecorderEngine`: a gravação corre no event loop partilhado
+    e esta função apenas espera pelo resultado, sem ler a saída do FFmpeg na thread de quem chama.
+    Se `watermark_image` for dado, grava em passagem única (marca d'água e poster na mesma invocação).
+    Se `segment_seconds` for dado, grava em blocos e une-os no fim (ver `_record_segmented`).
+    """
+    logger.info(f"🎥 Preparando para gravar '{username}' com duração máxima de {max_duration}s.")
+
+    if segment_seconds:
+        return _record_segmented(username, stream_url, output_path, thumbnail_path, max_duration, segment_seconds)
 
-            match = time_pattern.search(line)
-            if match:
-                h, m, s, ms = map(int, match.groups())
-                elapsed_seconds = h * 3600 + m * 60 + s + ms / 100
-                _log_progress(username, elapsed_seconds, max_duration)
+    command = None
+    if watermark_image:
+        # A logo é rasterizada uma única vez por processo; o `scale2ref` ajusta-a ao vídeo.
+        watermark_png = get_watermark_asset(watermark_image, watermark_width)
+        if not watermark_png:
+            return False
+        poster_at = config.RECORDING_SETTINGS["POSTER_AT_SECONDS"]
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        command = _build_single_pass_command(
+            stream_url, output_path, max_duration, watermark_png, thumbnail_path,
+            watermark_width=watermark_width, encoder_preset=encoder_preset, poster_at=poster_at
+        )
+        logger.info(f"💧 Gravação de '{username}' em passagem única (marca d'água e poster durante a captura).")
 
-        # Espera o processo terminar e obtém o código de retorno.
-        return_code = process.wait()
-        print() # Adiciona uma nova linha para não sobrescrever a última linha de progresso.
+    try:
+        return_code = get_recorder_engine().submit(username, stream_url, output_path, max_duration, command).result()
 
         if return_code == 0:
             logger.info(f"✅ Gravação para '{username}' concluída com sucesso (código {return_code}).")
-            # Após a gravação bem-sucedida, tenta capturar o thumbnail.
-            capture_thumbnail(output_path, thumbnail_path)
+            # Após a gravação bem-sucedida, tenta capturar o thumbnail (se a passagem única não o gerou).
+            if not os.path.exists(thumbnail_path):
+                capture_thumbnail(output_path, thumbnail_path)
             return True
         else:
             logger.error(f"❌ Gravação para '{username}' terminou com erro (código {return_code}).")
@@ -186,11 +532,106 @@ def record_stream_and_capture_thumbnail(username: str, stream_url: str, output_p
         logger.error(f"❌ Ocorreu uma exceção inesperada durante a gravação de '{username}': {e}")
         return False
 
+def _record_segmented(
+    username: str,
+    stream_url: str,
+    output_path: str,
+    thumbnail_path: str,
+    max_duration: int,
+    segment_seconds: int
+) -> bool:
+    """
+    Grava em blocos de `segment_seconds` e une-os sem perdas em `output_path` no fim.
+
+    O poster é capturado do primeiro bloco assim que este fecha, com a transmissão ainda a decorrer.
+    Se o FFmpeg terminar com erro, os blocos já escritos são unidos na mesma (a perda fica limitada
+    ao bloco em curso); se a união falhar, os blocos ficam no disco para `recover_segment_dirs`.
+
+    Returns:
+        bool: True se o MP4 final foi criado.
+    """
+    segments_dir = segments_dir_for(output_path)
+    os.makedirs(segments_dir, exist_ok=True)
+    poster_at = config.RECORDING_SETTINGS["POSTER_AT_SECONDS"]
+
+    def on_segment(segment_path: str, index: int):
+        logger.debug(f"🧩 Bloco {index + 1} de '{username}' fechado: {os.path.basename(segment_path)}")
+        if index == 0 and not os.path.exists(thumbnail_path):
+            capture_thumbnail(segment_path, thumbnail_path, timestamp=f"{poster_at}")
+
+    watcher = SegmentWatcher(segments_dir, on_segment)
+    watcher.start()
+    logger.info(f"🧩 Gravação de '{username}' em blocos de {segment_seconds}s em '{os.path.basename(segments_dir)}'.")
+    try:
+        command = _build_segmented_command(stream_url, segments_dir, max_duration, segment_seconds)
+        return_code = get_recorder_engine().submit(username, stream_url, output_path, max_duration, command).result()
+    except FileNotFoundError:
+        logger.critical("❌ Erro Crítico: O comando 'ffmpeg' não foi encontrado. Verifique se está instalado e no PATH.")
+        return_code = None
+    except Exception as e:
+        logger.error(f"❌ Ocorreu uma exceção inesperada durante a gravação de '{username}': {e}")
+        return_code = None
+    finally:
+        watcher.stop()
+
+    if return_code != 0:
+        logger.warning(f"⚠️ Gravação de '{username}' terminou com erro (código {return_code}). A unir os blocos já escritos...")
+    if not finalize_segments(segments_dir, output_path):
+        return False
+
+    logger.info(f"✅ Gravação para '{username}' concluída em '{os.path.basename(output_path)}'.")
+    if not os.path.exists(thumbnail_path):
+        capture_thumbnail(output_path, thumbnail_path)
+    return True
+
 # ---------------------------------------------------------------------------------------------
 # 4. RODAPÉ / FIM DO CÓDIGO
 # ---------------------------------------------------------------------------------------------
 
 # @log de mudanças:
+# 2026-10-18 (v2.8.1):
+# - CORREÇÃO: O watchdog mede o crescimento das gravações segmentadas pela soma dos blocos; antes
+#   parava todas ao fim de `STARTUP_SECONDS`, cortando-as em partes de ~2 minutos.
+#
+# 2026-10-18 (v2.8.0):
+# - FEATURE: Watchdog no `AsyncRecorderEngine` (`WATCHDOG_SETTINGS`): uma gravação cujo `-progress` e
+#   ficheiro de saída não crescem durante `STALL_SECONDS` é finalizada com SIGINT (e morta se não sair),
+#   libertando a vaga; o que foi gravado é mantido e a sessão reconecta se ainda houver tempo.
+# - CORREÇÃO: Um processo cuja supervisão é interrompida é morto e aguardado (sem órfãos nem zombies).
+#
+# 2026-10-18 (v2.7.0):
+# - FEATURE: Cada processo FFmpeg regista a duração, o resultado e os bytes gravados nas métricas
+#   (`xcam_recording_*`) e no fluxo de eventos (evento "recording").
+#
+# 2026-10-18 (v2.6.0):
+# - FEATURE: Gravação segmentada (`segment_seconds`). O stream é escrito em blocos pelo muxer `segment`
+#   e unido sem recodificação no fim; uma falha do FFmpeg já não perde a gravação inteira e o poster
+#   é capturado do primeiro bloco enquanto a transmissão continua (ver utils/segments.py).
+#
+# 2026-10-18 (v2.5.0):
+# - REFACTOR: A passagem única usa o PNG da cache de assets (`get_watermark_asset`) em vez de
+#   rasterizar o SVG para um ficheiro temporário por gravação.
+#
+# 2026-10-18 (v2.4.0):
+# - FEATURE: Modo de gravação em passagem única. Com `watermark_image`, a gravação aplica a marca
+#   d'água (filtro `scale2ref` + `overlay`) e escreve o poster na mesma invocação do FFmpeg, com o
+#   preset de codificação configurável em `config.ENCODER_PRESETS`.
+# - FEATURE: O `AsyncRecorderEngine` aceita um comando FFmpeg alternativo em `record`/`submit`.
+#
+# 2026-10-18 (v2.3.0):
+# - REFACTOR: O progresso deixa de ser extraído com regex das linhas de estado do stderr. O FFmpeg é
+#   lançado com `-progress pipe:1 -nostats -loglevel error` e os blocos chave=valor são publicados,
+#   com throttling, na `ProgressTable` partilhada (utils/progress.py).
+# - REMOÇÃO: `_log_progress` e `_format_seconds` (as barras '\r' concorrentes foram substituídas por
+#   um resumo agregado no loop principal).
+# - FEATURE: As últimas linhas de erro do FFmpeg são registadas quando a gravação falha.
+#
+# 2026-10-18 (v2.2.0):
+# - FEATURE: Adicionado o `AsyncRecorderEngine`, que lança o FFmpeg com `asyncio.create_subprocess_exec`,
+#   lê o progresso sem bloquear threads e garante a duração máxima com temporizadores do event loop.
+# - REFACTOR: `record_stream_and_capture_thumbnail` passou a ser um invólucro síncrono sobre o motor
+#   partilhado (`get_recorder_engine`), mantendo a mesma assinatura e o mesmo retorno.
+#
 # 2025-07-14 (v2.1.0):
 # - REFACTOR: Unificação dos dois arquivos. A função `record_stream` foi renomeada para
 #   `record_stream_and_capture_thumbnail` para refletir a sua responsabilidade completa.
@@ -206,7 +647,4 @@ def record_stream_and_capture_thumbnail(username: str, stream_url: str, output_p
 # - FEATURE: Adicionada a função `capture_thumbnail` inicial.
 
 # @roadmap futuro:
-# - Criar uma classe `Recorder` para gerir o estado do processo FFmpeg de forma mais robusta,
-#   permitindo pausar ou parar a gravação de forma mais limpa.
-# - Permitir a passagem de parâmetros customizados do FFmpeg (ex: `-vf` para filtros)
-#   através da função de gravação.
+# - Permitir a passagem de parâmetros customizados do FFmpeg através da função de gravação.
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         job_journal.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.2.0
+# @lastupdate:     2026-10-18
+# @description:    Diário persistente (SQLite) das gravações. Cada gravação fica registada com a etapa
+#                  que já concluiu (capturing -> captured -> validated -> watermarked -> uploaded ->
+#                  indexed), para que uma falha no upload ou a morte do processo entre a renomeação e
+#                  o `rec.json` não deixe o MP4 esquecido na pasta temporária. No arranque, as
+#                  gravações por terminar são retomadas a partir da etapa em que ficaram, e os uploads
+#                  falhados voltam à fila após um intervalo.
+# @modes:          - Registo da Etapa de Cada Gravação (SQLite).
+#                  - Recuperação dos Trabalhos Pendentes no Arranque.
+#                  - Novas Tentativas de Uploads Falhados.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import logging      # Para registar eventos importantes de forma padronizada.
+import os           # Para criar a pasta do diário.
+import sqlite3      # O diário é uma base de dados SQLite num único ficheiro.
+import threading    # Lock da ligação, partilhada pelos trabalhadores de todas as etapas.
+import time         # Instantes de criação e de atualização de cada registo.
+from typing import Dict, List
+
+from utils.pipeline import RecordingJob
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Etapas, pela ordem em que são concluídas.
+CAPTURING = "capturing"
+CAPTURED = "captured"
+VALIDATED = "validated"
+WATERMARKED = "watermarked"
+UPLOADED = "uploaded"
+INDEXED = "indexed"
+# Etapa final de gravações descartadas (ex: duração abaixo do mínimo ou captura perdida).
+DISCARDED = "discarded"
+# Etapa final de gravações que esgotaram as tentativas de upload (o vídeo fica para intervenção manual).
+ABANDONED = "abandoned"
+
+TERMINAL_STAGES = (INDEXED, DISCARDED, ABANDONED)
+
+# Etapas em que o vídeo já está no serviço de alojamento (a cópia local pode ser removida).
+HOSTED_STAGES = (UPLOADED, INDEXED)
+
+# Campos do `RecordingJob` guardados no diário.
+_JOB_FIELDS = ("username", "video_path", "poster_path", "watermarked", "title", "duration_seconds", "video_slug", "video_url")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    video_path TEXT,
+    poster_path TEXT,
+    watermarked INTEGER NOT NULL DEFAULT 0,
+    title TEXT,
+    duration_seconds INTEGER NOT NULL DEFAULT 0,
+    video_slug TEXT,
+    video_url TEXT,
+    failed INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_stage ON jobs (stage);
+"""
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class JobJournal:
+    """Diário das gravações, partilhado por todas as etapas do pipeline."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): O ficheiro SQLite (criado se não existir).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def start(self, job: RecordingJob):
+        """Regista uma nova gravação na etapa `capturing` e guarda o seu id em `job.journal_id`."""
+        now = time.time()
+        cursor = self._execute(
+            f"INSERT INTO jobs (stage, {', '.join(_JOB_FIELDS)}, created_at, updated_at) "
+            f"VALUES (?, {', '.join('?' for _ in _JOB_FIELDS)}, ?, ?)",
+            (CAPTURING, *(getattr(job, name) for name in _JOB_FIELDS), now, now)
+        )
+        job.journal_id = cursor.lastrowid
+
+    def advance(self, job: RecordingJob, stage: str):
+        """Marca a etapa concluída e guarda o estado atual do trabalho (limpa falhas anteriores)."""
+        if job.journal_id is None:
+            self.start(job)
+        self._execute(
+            f"UPDATE jobs SET stage = ?, {', '.join(f'{name} = ?' for name in _JOB_FIELDS)}, "
+            f"failed = 0, error = NULL, updated_at = ? WHERE id = ?",
+            (stage, *(getattr(job, name) for name in _JOB_FIELDS), time.time(), job.journal_id)
+        )
+
+    def fail(self, job: RecordingJob, error: str):
+        """Regista uma falha (a etapa mantém-se, para a nova tentativa)."""
+        if job.journal_id is None:
+            return
+        self._execute(
+            "UPDATE jobs SET failed = 1, attempts = attempts + 1, error = ?, updated_at = ? WHERE id = ?",
+            (error, time.time(), job.journal_id)
+        )
+
+    def requeue(self, job: RecordingJob):
+        """Devolve às novas tentativas um trabalho que não chegou a entrar na fila (não conta como tentativa)."""
+        if job.journal_id is None:
+            return
+        self._execute("UPDATE jobs SET failed = 1 WHERE id = ?", (job.journal_id,))
+
+    def discard(self, job: RecordingJob, reason: str):
+        """Termina o registo de uma gravação que não vai ser publicada."""
+        if job.journal_id is None:
+            return
+        self._execute(
+            "UPDATE jobs SET stage = ?, error = ?, updated_at = ? WHERE id = ?",
+            (DISCARDED, reason, time.time(), job.journal_id)
+        )
+
+    def pending(self) -> List[RecordingJob]:
+        """
+        Gravações por terminar (usado no arranque, quando nenhuma está em curso).
+
+        Returns:
+            List[RecordingJob]: Os trabalhos, com `journal_stage` indicando a última etapa concluída.
+        """
+        rows = self._query(
+            f"SELECT * FROM jobs WHERE stage NOT IN ({', '.join('?' for _ in TERMINAL_STAGES)}) ORDER BY id",
+            TERMINAL_STAGES
+        )
+        return [self._to_job(row) for row in rows]
+
+    def retryable(self, retry_after: float, max_attempts: int) -> List[RecordingJob]:
+        """
+        Trabalhos falhados há pelo menos `retry_after` segundos e com menos de `max_attempts` tentativas.
+        São marcados como não falhados, para não serem devolvidos de novo enquanto estão na fila.
+        """
+        rows = self._query(
+            f"SELECT * FROM jobs WHERE failed = 1 AND attempts < ? AND updated_at <= ? "
+            f"AND stage NOT IN ({', '.join('?' for _ in TERMINAL_STAGES)}) ORDER BY id",
+            (max_attempts, time.time() - retry_after, *TERMINAL_STAGES)
+        )
+        for row in rows:
+            self._execute("UPDATE jobs SET failed = 0 WHERE id = ?", (row["id"],))
+        return [self._to_job(row) for row in rows]
+
+    def abandon_exhausted(self, max_attempts: int) -> List[RecordingJob]:
+        """
+        Fecha os trabalhos falhados com `max_attempts` tentativas ou mais (etapa `ABANDONED`), para
+        que não voltem a ser retomados a cada arranque.
+
+        Returns:
+            List[RecordingJob]: Os trabalhos fechados agora (cada um é devolvido uma única vez).
+        """
+        rows = self._query(
+            f"SELECT * FROM jobs WHERE failed = 1 AND attempts >= ? "
+            f"AND stage NOT IN ({', '.join('?' for _ in TERMINAL_STAGES)}) ORDER BY id",
+            (max_attempts, *TERMINAL_STAGES)
+        )
+        for row in rows:
+            self._execute(
+                "UPDATE jobs SET stage = ?, failed = 0, updated_at = ? WHERE id = ?",
+                (ABANDONED, time.time(), row["id"])
+            )
+        return [self._to_job(row) for row in rows]
+
+    def uploaded_files(self) -> List[str]:
+        """
+        Vídeos já enviados (carregados ou publicados) que ainda estão no disco. Os descartados ficam
+        de fora: como os uploads falhados, não têm outra cópia.
+        """
+        rows = self._query(
+            f"SELECT video_path FROM jobs WHERE stage IN ({', '.join('?' for _ in HOSTED_STAGES)})",
+            HOSTED_STAGES
+        )
+        return [row["video_path"] for row in rows if row["video_path"] and os.path.exists(row["video_path"])]
+
+    def counts(self) -> Dict[str, int]:
+        """Número de registos por etapa (e de falhados à espera de nova tentativa)."""
+        counts = {row["stage"]: row["total"] for row in self._query("SELECT stage, COUNT(*) AS total FROM jobs GROUP BY stage")}
+        counts["failed"] = self._query("SELECT COUNT(*) AS total FROM jobs WHERE failed = 1")[0]["total"]
+        return counts
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> RecordingJob:
+        job = RecordingJob(username=row["username"], broadcast={}, created_at=row["created_at"])
+        for name in _JOB_FIELDS:
+            setattr(job, name, row[name])
+        job.watermarked = bool(row["watermarked"])
+        job.journal_id = row["id"]
+        job.journal_stage = row["stage"]
+        return job
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.2.0):
+# - CORREÇÃO: `abandon_exhausted` fecha na etapa `ABANDONED` os trabalhos que esgotaram as tentativas;
+#   antes, `pending` devolvia-os e cada arranque dava-lhes mais uma tentativa de upload.
+#
+# 2026-10-18 (v1.1.0):
+# - CORREÇÃO: `finished_files` passa a `uploaded_files` e devolve apenas os vídeos já enviados
+#   (`HOSTED_STAGES`): os das gravações descartadas deixam de poder ser removidos pela quota.
+#
+# 2026-10-18 (v1.0.1):
+# - FEATURE: `requeue` devolve um trabalho às novas tentativas sem contar uma tentativa (fila cheia).
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `job_journal.py` com `JobJournal` (etapas, recuperação e novas tentativas).
+
+# @roadmap futuro:
+# - Apagar periodicamente os registos terminados mais antigos.
@@ -7,22 +7,28 @@
 # @titulo:         logger.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.2.0
-# @lastupdate:     2025-07-14
+# @version:        1.3.0
+# @lastupdate:     2026-10-18
 # @description:    Este módulo centraliza a configuração do sistema de logging para o projeto XCam Rec.
 #                  Ele cria um logger robusto, colorido e com emojis que fornece feedback visual
 #                  tanto no console quanto em um arquivo de log persistente. A função de setup
 #                  é parametrizável para permitir diferentes níveis de log e locais de arquivo.
 # @modes:          - Console (stdout): Saída colorida e com emojis para acompanhamento em tempo real.
-#                  - Arquivo (xcam_rec.log): Saída de texto puro para auditoria e análise posterior.
+#                  - Arquivo (xcam_rec.log): Saída de texto puro para auditoria e análise posterior,
+#                    com rotação por tamanho ou por tempo.
+#                  - Em Fila: as threads só enfileiram; uma thread formata e escreve.
 
 # ---------------------------------------------------------------------------------------------
 # 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
 # ---------------------------------------------------------------------------------------------
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
+from typing import Optional
 
 # Dicionário com códigos de escape ANSI para colorir o texto no terminal.
 COLORS = {
@@ -43,34 +49,86 @@ EMOJIS = {
     "CRITICAL": "🔥"
 }
 
+# Formatos de data e do ficheiro (sem cores).
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+FILE_FORMAT = "[%(asctime)s] [%(levelname)s] - %(message)s"
+
+# Listener do modo em fila (um por processo), parado no fim da execução.
+_listener: Optional[logging.handlers.QueueListener] = None
+
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
 # ---------------------------------------------------------------------------------------------
 
+def _level_format(levelname: str) -> str:
+    """Formato customizado que inclui cor, data/hora, emoji e a mensagem."""
+    color = COLORS.get(levelname, COLORS["RESET"])
+    emoji = EMOJIS.get(levelname, "")
+    return f"{color}[%(asctime)s] {emoji}  %(message)s{COLORS['RESET']}"
+
 class ColorEmojiFormatter(logging.Formatter):
     """
     Uma classe de formatação personalizada para o logger.
     Permite a inserção de cores e emojis nas mensagens de log exibidas no console.
+    Os formatadores de cada nível são criados uma única vez, na construção.
     """
+    def __init__(self):
+        super().__init__(datefmt=DATE_FORMAT)
+        self._formatters = {
+            levelname: logging.Formatter(_level_format(levelname), datefmt=DATE_FORMAT)
+            for levelname in EMOJIS
+        }
+        self._fallback = logging.Formatter(_level_format(""), datefmt=DATE_FORMAT)
+
     def format(self, record):
         """Formata o registro de log, adicionando cor e emoji de acordo com o nível."""
-        color = COLORS.get(record.levelname, COLORS["RESET"])
-        emoji = EMOJIS.get(record.levelname, "")
-        # Formato customizado que inclui cor, data/hora, emoji e a mensagem.
-        log_fmt = f"{color}[%(asctime)s] {emoji}  %(message)s{COLORS['RESET']}"
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
-        return formatter.format(record)
-
-def setup_logging(log_level: str = "INFO", log_file: str = "xcam_recorder.log"):
+        return self._formatters.get(record.levelname, self._fallback).format(record)
+
+def _build_file_handler(log_file: str, max_bytes: int, when: Optional[str], backup_count: int) -> logging.Handler:
+    """Handler de ficheiro: rotação por tamanho (`max_bytes`), por tempo (`when`) ou sem rotação."""
+    if max_bytes:
+        return logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=when, backupCount=backup_count, encoding='utf-8')
+    return logging.FileHandler(log_file, mode='a', encoding='utf-8')
+
+def stop_logging():
+    """Para o listener do modo em fila, escrevendo antes todos os registros pendentes."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(
+    log_level: str = "INFO",
+    log_file: str = "xcam_recorder.log",
+    use_queue: bool = False,
+    max_bytes: int = 0,
+    when: Optional[str] = None,
+    backup_count: int = 5
+) -> Optional[logging.handlers.QueueListener]:
     """
     Configura e inicializa a instância principal do logger para todo o projeto.
-    
+
+    No modo em fila (`use_queue`), as threads apenas colocam cada registro numa fila em memória;
+    uma única thread (`QueueListener`) formata e escreve no console e no ficheiro, pelo que a
+    latência de escrita no Google Drive deixa de recair sobre as threads de gravação e de upload.
+
     Args:
         log_level (str, optional): O nível mínimo de log a ser capturado (ex: "INFO", "DEBUG").
                                    Padrão é "INFO".
         log_file (str, optional): O caminho completo para o arquivo de log.
                                   Padrão é "xcam_recorder.log".
+        use_queue (bool, optional): Ativa o modo em fila.
+        max_bytes (int, optional): Roda o ficheiro ao atingir este tamanho (0 = sem rotação por tamanho).
+        when (Optional[str], optional): Roda o ficheiro por tempo (ex: "midnight", "H"), se `max_bytes` for 0.
+        backup_count (int, optional): Número de ficheiros rodados a manter.
+
+    Returns:
+        Optional[logging.handlers.QueueListener]: O listener do modo em fila (ou None).
     """
+    stop_logging()
+
     # Obtém a instância raiz do logger para configurar a aplicação inteira.
     logger = logging.getLogger()
     logger.setLevel(log_level.upper())
@@ -79,11 +137,15 @@ def setup_logging(log_level: str = "INFO", log_file: str = "xcam_recorder.log"):
     if logger.hasHandlers():
         logger.handlers.clear()
 
+    # Os handlers de saída são ligados ao logger raiz ou, no modo em fila, ao listener.
+    handlers = []
+
     # --- Configuração do Handler para o Console (stdout) ---
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level.upper())
     console_handler.setFormatter(ColorEmojiFormatter())
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
+    file_error = None
 
     # --- Configuração do Handler para o Arquivo ---
     try:
@@ -93,24 +155,46 @@ def setup_logging(log_level: str = "INFO", log_file: str = "xcam_recorder.log"):
             os.makedirs(log_dir, exist_ok=True)
         
         # Cria um handler que escreve os logs no caminho especificado.
-        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+        file_handler = _build_file_handler(log_file, max_bytes, when, backup_count)
         file_handler.setLevel(log_level.upper())
         # Define um formato de log sem cores para o arquivo.
-        file_formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] - %(message)s", datefmt='%Y-%m-%d %H:%M:%S')
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-        
+        file_handler.setFormatter(logging.Formatter(FILE_FORMAT, datefmt=DATE_FORMAT))
+        handlers.append(file_handler)
+
     except Exception as e:
+        file_error = e
+
+    if use_queue:
+        global _listener
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        # Garante que os registros ainda na fila são escritos antes de o processo terminar.
+        atexit.register(stop_logging)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    if file_error is not None:
         # Se houver um erro ao criar o diretório ou o arquivo de log,
         # loga um erro crítico no console para alertar o usuário.
-        logger.critical(f"🔥 Falha ao configurar o logging em arquivo no caminho '{log_file}': {e}")
+        logger.critical(f"🔥 Falha ao configurar o logging em arquivo no caminho '{log_file}': {file_error}")
         logger.critical("   Os logs serão exibidos apenas no console.")
+    return _listener
 
 # ---------------------------------------------------------------------------------------------
 # 4. RODAPÉ / FIM DO CÓDIGO
 # ---------------------------------------------------------------------------------------------
 
 # @log de mudanças:
+# 2026-10-18 (v1.3.0):
+# - FEATURE: Modo em fila (`use_queue`): `QueueHandler` no logger raiz e um `QueueListener` que faz a
+#   formatação e a escrita numa única thread; `stop_logging` esvazia a fila no fim da execução.
+# - FEATURE: Rotação do ficheiro de log por tamanho (`max_bytes`) ou por tempo (`when`).
+# - MELHORIA: `ColorEmojiFormatter` cria os formatadores de cada nível uma única vez, em vez de um
+#   novo `logging.Formatter` por registro.
+#
 # 2025-07-14 (v1.2.0):
 # - CORREÇÃO: A função `setup_logger` foi renomeada para `setup_logging` para corrigir o `ImportError`.
 # - REFACTOR: A função `setup_logging` agora aceita os parâmetros `log_level` e `log_file`,
@@ -126,6 +210,4 @@ def setup_logging(log_level: str = "INFO", log_file: str = "xcam_recorder.log"):
 # - Criação inicial do módulo `logger.py`.
 
 # @roadmap futuro:
-# - Adicionar um mecanismo de rotação de arquivos de log (log rotation) para evitar que
-#   o ficheiro de log cresça indefinidamente.
 # - Integrar com serviços de logging em nuvem (ex: Sentry, Logtail) para monitorização centralizada.
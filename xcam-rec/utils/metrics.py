@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         metrics.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.2.0
+# @lastupdate:     2026-10-18
+# @description:    Camada de métricas partilhada por todo o motor. Um registo único (`METRICS`) com
+#                  contadores, medidores (gauges) e histogramas com etiquetas (labels), e um fluxo de
+#                  eventos estruturados em JSON lines (`emit_event`), um objeto por linha, para que as
+#                  durações de cada etapa (gravação, marca d'água, upload, rec.json) possam ser
+#                  analisadas depois da execução. Opcionalmente, as métricas são servidas em formato
+#                  de texto do Prometheus por um pequeno servidor HTTP local, para dimensionar os
+#                  trabalhadores e detetar regressões entre versões.
+# @modes:          - Contadores, Medidores e Histogramas com Etiquetas (thread-safe).
+#                  - Cronómetros por Etapa (`METRICS.timer`).
+#                  - Fluxo de Eventos em JSON Lines.
+#                  - Endpoint HTTP Local no Formato de Texto do Prometheus.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import atexit       # Escreve os eventos ainda na fila antes de o processo terminar.
+import json         # Serialização dos eventos (um objeto JSON por linha).
+import logging      # Para registar eventos importantes de forma padronizada.
+import os           # Para criar a pasta do ficheiro de eventos.
+import queue        # Fila dos eventos à espera da thread de escrita.
+import threading    # Locks das métricas e thread do servidor HTTP.
+import time         # Relógio monotónico dos cronómetros e instante de cada evento.
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Limites padrão dos histogramas de durações, em segundos (de um pedido HTTP a uma gravação longa).
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+# Número de amostras recentes guardadas por série para os percentis do `snapshot`.
+QUANTILE_SAMPLES = 200
+
+# Número de eventos recentes mantidos em memória (ex: falhas recentes no estado ao vivo).
+RECENT_EVENTS = 500
+
+# Etiquetas de uma série, ordenadas: (("stage", "upload"), ...).
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Uma rota do servidor HTTP devolve o content-type e o corpo da resposta.
+RouteHandler = Callable[[], Tuple[str, bytes]]
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Base das métricas: um nome, uma descrição e uma série de valores por combinação de etiquetas."""
+    kind = ""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, Any] = {}
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Valor que só aumenta (ex: uploads concluídos, bytes enviados)."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._series)
+
+    def render(self) -> List[str]:
+        return self._header() + [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self.snapshot().items())]
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex: gravações ativas, tamanho das filas)."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        with self._lock:
+            self._series[_label_key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    """
+    Distribuição de observações (ex: duração de cada upload) em intervalos cumulativos, com soma,
+    contagem e as `QUANTILE_SAMPLES` amostras mais recentes para os percentis.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                    "recent": deque(maxlen=QUANTILE_SAMPLES),
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["recent"].append(value)
+
+    def snapshot(self) -> Dict[LabelKey, Dict[str, Any]]:
+        """
+        Returns:
+            Dict[LabelKey, Dict[str, Any]]: Por série: contagem, soma, média, p50, p95 e máximo recentes.
+        """
+        with self._lock:
+            items = [(key, series["count"], series["sum"], sorted(series["recent"])) for key, series in self._series.items()]
+        result = {}
+        for key, count, total, recent in items:
+            result[key] = {
+                "count": count,
+                "sum": total,
+                "avg": total / count if count else None,
+                "p50": recent[len(recent) // 2] if recent else None,
+                "p95": recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else None,
+                "max": recent[-1] if recent else None,
+            }
+        return result
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted((key, list(series["counts"]), series["sum"], series["count"]) for key, series in self._series.items())
+        for key, counts, total, count in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registo das métricas do processo. `counter`, `gauge` e `histogram` devolvem a métrica existente
+    com o mesmo nome (ou criam-na), pelo que cada módulo pode declarar as suas ao ser importado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"A métrica '{name}' já está registada como {metric.kind}.")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    @contextmanager
+    def timer(self, name: str, description: str = "", **labels: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Cronometra um bloco e regista a duração (segundos) no histograma `name`, mesmo em caso de
+        exceção. O dicionário devolvido recebe `seconds` no fim, para o chamador o reutilizar.
+
+        Exemplo:
+            with METRICS.timer("xcam_stage_seconds", stage="upload") as timing:
+                ...
+            emit_event("stage", seconds=timing["seconds"])
+        """
+        timing: Dict[str, Any] = {"seconds": None}
+        started = time.monotonic()
+        try:
+            yield timing
+        finally:
+            timing["seconds"] = time.monotonic() - started
+            self.histogram(name, description).observe(timing["seconds"], **labels)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            Dict[str, Dict[str, Any]]: Por métrica, o tipo e os valores de cada série (etiquetas em texto).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "type": metric.kind,
+                "series": {_format_labels(key) or "{}": value for key, value in metric.snapshot().items()},
+            }
+            for metric in metrics
+        }
+
+    def render_prometheus(self) -> str:
+        """Todas as métricas no formato de texto de exposição do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class EventLog:
+    """
+    Fluxo de eventos estruturados em JSON lines. Os últimos `RECENT_EVENTS` eventos ficam sempre
+    em memória; sem ficheiro configurado, nada é escrito no disco, pelo que os módulos podem emitir
+    eventos sem saber se a camada de métricas está ativa.
+
+    Como no modo em fila do logger, `emit` apenas coloca o evento numa fila em memória; uma única
+    thread escreve no ficheiro, pelo que a latência do Google Drive não recai sobre as threads de
+    gravação e de upload.
+    """
+
+    def __init__(self, recent_size: int = RECENT_EVENTS):
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._recent: "deque[Dict[str, Any]]" = deque(maxlen=recent_size)
+        self.path: Optional[str] = None
+
+    def open(self, path: str):
+        """Passa a acrescentar os eventos a `path` (criado se não existir)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.close()
+        events_file = open(path, "a", encoding="utf-8")
+        with self._lock:
+            self.path = path
+            self._writer = threading.Thread(target=self._write_loop, args=(events_file,), name="EventLogWriter", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self, events_file):
+        """Escreve os eventos da fila, em lotes, até receber o sinal de paragem (None)."""
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Os eventos que já estiverem na fila seguem no mesmo lote (uma só escrita no disco).
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [record for record in batch if record is not None]
+            try:
+                events_file.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch))
+                events_file.flush()
+            except (IOError, OSError) as e:
+                logger.warning(f"⚠️ Não foi possível escrever {len(batch)} eventos: {e}")
+        events_file.close()
+
+    def emit(self, event: str, **fields: Any):
+        """
+        Acrescenta um evento: `{"ts": <ISO 8601 UTC>, "event": <nome>, ...campos}`.
+
+        Args:
+            event (str): O nome do evento (ex: "upload", "stage").
+            **fields: Campos do evento (valores não serializáveis são convertidos em texto).
+        """
+        record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "event": event, **fields}
+        with self._lock:
+            self._recent.append(record)
+            if self._writer is not None:
+                self._queue.put(record)
+
+    def recent(self, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None, limit: int = 0) -> List[Dict[str, Any]]:
+        """
+        Args:
+            predicate (Optional[Callable], optional): Filtro dos eventos (ex: apenas falhas).
+            limit (int, optional): Máximo de eventos devolvidos (os mais recentes). 0 devolve todos.
+
+        Returns:
+            List[Dict[str, Any]]: Os eventos em memória, do mais recente para o mais antigo.
+        """
+        with self._lock:
+            events = list(self._recent)
+        events = [event for event in reversed(events) if predicate is None or predicate(event)]
+        return events[:limit] if limit else events
+
+    def close(self):
+        """Escreve os eventos ainda na fila e fecha o ficheiro."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._queue.put(None)
+        if writer is not None:
+            writer.join()
+
+
+class MetricsServer:
+    """
+    Servidor HTTP local (numa thread) com as métricas em `/metrics`. Outras rotas podem ser
+    acrescentadas com `add_route`.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", host: str, port: int):
+        """
+        Args:
+            registry (MetricsRegistry): O registo a expor.
+            host (str): Endereço de escuta (ex: "127.0.0.1").
+            port (int): Porta de escuta (0 escolhe uma porta livre).
+        """
+        self.routes: Dict[str, RouteHandler] = {
+            "/metrics": lambda: ("text/plain; version=0.0.4; charset=utf-8", registry.render_prometheus().encode("utf-8")),
+        }
+        routes = self.routes
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                route = routes.get(self.path.split("?", 1)[0])
+                if route is None:
+                    self.send_error(404)
+                    return
+                try:
+                    content_type, body = route()
+                except Exception as e:
+                    logger.error(f"❌ Erro ao servir '{self.path}': {e}", exc_info=True)
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Os pedidos de recolha (a cada poucos segundos) não vão para o log da aplicação.
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+
+    def add_route(self, path: str, handler: RouteHandler):
+        self.routes[path] = handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Registo e fluxo de eventos partilhados pelo processo.
+METRICS = MetricsRegistry()
+EVENTS = EventLog()
+_server: Optional[MetricsServer] = None
+
+def emit_event(event: str, **fields: Any):
+    """Emite um evento no fluxo partilhado (ver `EventLog.emit`)."""
+    EVENTS.emit(event, **fields)
+
+def start_metrics(settings: Dict[str, Any]) -> Optional[MetricsServer]:
+    """
+    Ativa o fluxo de eventos e, se `HTTP_PORT` estiver definido, o endpoint HTTP das métricas.
+
+    Args:
+        settings (Dict[str, Any]): `config.METRICS_SETTINGS` (EVENTS_PATH, HTTP_HOST, HTTP_PORT).
+
+    Returns:
+        Optional[MetricsServer]: O servidor iniciado, ou None se estiver desativado ou não puder escutar.
+    """
+    global _server
+    if settings.get("EVENTS_PATH"):
+        try:
+            EVENTS.open(settings["EVENTS_PATH"])
+            atexit.register(EVENTS.close)
+            logger.info(f"🧾 Eventos estruturados em '{settings['EVENTS_PATH']}'.")
+        except (IOError, OSError) as e:
+            logger.warning(f"⚠️ Não foi possível abrir o ficheiro de eventos: {e}")
+    if not settings.get("HTTP_PORT") or _server is not None:
+        return _server
+    try:
+        _server = MetricsServer(METRICS, settings["HTTP_HOST"], settings["HTTP_PORT"])
+    except OSError as e:
+        logger.warning(f"⚠️ Não foi possível iniciar o endpoint de métricas na porta {settings['HTTP_PORT']}: {e}")
+        return None
+    _server.start()
+    host, port = _server.address[:2]
+    logger.info(f"📈 Métricas disponíveis em http://{host}:{port}/metrics")
+    return _server
+
+def stop_metrics():
+    """Pára o endpoint HTTP (se ativo) e fecha o ficheiro de eventos."""
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
+    EVENTS.close()
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.2.0):
+# - CORREÇÃO: `EventLog.emit` deixou de escrever no ficheiro (no Google Drive) debaixo de um lock
+#   partilhado por todo o processo: os eventos seguem por uma fila para uma única thread de escrita,
+#   que os grava em lotes; `close` escreve os que ainda estiverem na fila.
+#
+# 2026-10-18 (v1.1.0):
+# - FEATURE: `EventLog.recent` devolve os últimos eventos mantidos em memória (ex: falhas recentes).
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `metrics.py` com `MetricsRegistry` (contadores, medidores, histogramas
+#   e cronómetros), `EventLog` (JSON lines) e `MetricsServer` (texto do Prometheus).
+
+# @roadmap futuro:
+# - Rodar o ficheiro de eventos como o ficheiro de log.
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         pipeline.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.9.0
+# @lastupdate:     2026-10-18
+# @description:    Pipeline por etapas para o processamento de cada transmissão. Em vez de um único
+#                  trabalhador fazer a captura, a validação, a marca d'água, o upload e a atualização
+#                  do rec.json, cada etapa tem o seu próprio pool e o seu próprio limite de
+#                  concorrência (muitos gravadores, transcodificação limitada ao número de CPUs e
+#                  poucos uploads em simultâneo), ligadas por filas limitadas.
+# @modes:          - Etapa de Gravação (alimentada pelo `RecordingScheduler`).
+#                  - Etapas de Pós-Processamento e Upload com Contrapressão (backpressure).
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import logging      # Para registar eventos importantes de forma padronizada.
+import threading    # Para proteger os contadores de contrapressão.
+import time         # Para medir o tempo em que uma etapa ficou bloqueada à espera da seguinte.
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.metrics import METRICS, emit_event
+from utils.scheduler import RecordingScheduler, WorkerPool
+from utils.video_utils import MediaInfo
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Assinatura de uma etapa: recebe o trabalho e devolve-o (para seguir) ou None (para parar).
+StageHandler = Callable[["RecordingJob"], Optional["RecordingJob"]]
+
+# Duração e resultado ("ok", "stopped" ou "error") de cada execução de uma etapa.
+_STAGE_SECONDS = METRICS.histogram("xcam_stage_seconds", "Duração de cada execução de uma etapa do pipeline, em segundos.")
+_STAGE_JOBS = METRICS.counter("xcam_stage_jobs_total", "Execuções de cada etapa do pipeline, por resultado.")
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class ActiveJobs:
+    """Trabalhos em execução em cada etapa do pipeline, para o estado ao vivo (utils/status.py)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Tuple[str, "RecordingJob", float]] = {}
+
+    @contextmanager
+    def track(self, stage: str, job: "RecordingJob") -> Iterator[None]:
+        """Marca `job` como em execução na etapa `stage` enquanto o bloco decorre."""
+        key = id(job)
+        with self._lock:
+            self._jobs[key] = (stage, job, time.monotonic())
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._jobs.pop(key, None)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Returns:
+            List[Dict[str, Any]]: Utilizador, etapa, segundos na etapa e vídeo de cada trabalho em execução.
+        """
+        now = time.monotonic()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            {"username": job.username, "stage": stage, "elapsed": now - started, "video_path": job.video_path}
+            for stage, job, started in jobs
+        ]
+
+
+def _run_timed(stage: str, handler: StageHandler, job: "RecordingJob", active: Optional[ActiveJobs] = None) -> Optional["RecordingJob"]:
+    """Executa uma etapa registando a duração e o resultado nas métricas e no fluxo de eventos."""
+    outcome = "error"
+    try:
+        with METRICS.timer(_STAGE_SECONDS.name, stage=stage) as timing:
+            if active is None:
+                result = handler(job)
+            else:
+                with active.track(stage, job):
+                    result = handler(job)
+        outcome = "ok" if result is not None else "stopped"
+        return result
+    finally:
+        _STAGE_JOBS.inc(stage=stage, outcome=outcome)
+        emit_event("stage", stage=stage, username=job.username, outcome=outcome, seconds=round(timing["seconds"], 3))
+
+
+@dataclass
+class RecordingJob:
+    """Estado de uma gravação à medida que atravessa as etapas do pipeline."""
+    username: str
+    broadcast: Dict[str, Any]
+    created_at: float = field(default_factory=time.time)
+    stream_url: Optional[str] = None
+    video_path: Optional[str] = None
+    poster_path: Optional[str] = None
+    duration_seconds: int = 0
+    media_info: Optional[MediaInfo] = None
+    watermarked: bool = False
+    title: Optional[str] = None
+    video_slug: Optional[str] = None
+    video_url: Optional[str] = None
+    # Registo no diário de trabalhos (utils/job_journal.py) e a última etapa lá concluída.
+    journal_id: Optional[int] = None
+    journal_stage: Optional[str] = None
+    # Partes da mesma sessão que não foi possível unir: seguem como gravações próprias.
+    separate_jobs: List["RecordingJob"] = field(default_factory=list)
+
+
+class PipelineStage:
+    """
+    Uma etapa do pipeline: um `WorkerPool` próprio mais a ligação para a etapa seguinte.
+
+    A entrega à etapa seguinte é bloqueante quando a fila desta está cheia; o tempo e o número
+    de esperas ficam registados como contrapressão da etapa que entrega.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: StageHandler,
+        max_workers: int,
+        max_queue: int = 0,
+        key: str = "",
+        active: Optional[ActiveJobs] = None
+    ):
+        """
+        Args:
+            name (str): Nome da etapa (ex: "pós-processamento").
+            key (str, optional): Identificador da etapa nas métricas e nos eventos (ex: "postprocess").
+            active (Optional[ActiveJobs], optional): Registo partilhado dos trabalhos em execução.
+            handler (StageHandler): Função que processa um `RecordingJob`.
+            max_workers (int): Número de trabalhos processados em simultâneo nesta etapa.
+            max_queue (int, optional): Capacidade da fila de entrada. 0 significa ilimitada.
+        """
+        self.name = name
+        self.key = key or name
+        self.active = active
+        self._handler = handler
+        self._pool = WorkerPool(name, max_workers, max_queue)
+        self.next_stage: Optional["PipelineStage"] = None
+        self._lock = threading.Lock()
+        self._blocked = 0
+        self._blocked_seconds = 0.0
+
+    def start(self):
+        self._pool.start()
+
+    def submit(self, job: RecordingJob, block: bool = True) -> bool:
+        """
+        Entrega um trabalho a esta etapa, esperando por espaço na fila se necessário.
+
+        Args:
+            job (RecordingJob): O trabalho a processar.
+            block (bool, optional): Se False, não espera: com a fila cheia, o trabalho é recusado.
+
+        Returns:
+            bool: True se o trabalho foi aceite.
+        """
+        if self._pool.submit(self.run, job):
+            return True
+        if not block:
+            return False
+        logger.warning(f"🚧 Fila da etapa '{self.name}' cheia. '{job.username}' aguarda vaga...")
+        started = time.monotonic()
+        self._pool.submit(self.run, job, block=True)
+        with self._lock:
+            self._blocked += 1
+            self._blocked_seconds += time.monotonic() - started
+        return True
+
+    def run(self, job: RecordingJob):
+        """Executa o handler e, se o trabalho continuar, entrega-o à etapa seguinte."""
+        result = _run_timed(self.key, self._handler, job, self.active)
+        if result is not None and self.next_stage is not None:
+            self.next_stage.submit(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Estatísticas do pool e a contrapressão sofrida por quem entrega nesta etapa.
+        """
+        stats = self._pool.stats()
+        with self._lock:
+            stats["blocked"] = self._blocked
+            stats["blocked_seconds"] = round(self._blocked_seconds, 1)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+class BroadcastPipeline:
+    """
+    Liga as três etapas: gravação -> pós-processamento -> upload.
+
+    A etapa de gravação corre nos trabalhadores do `RecordingScheduler` (que evita duplicados
+    por utilizador); o utilizador é libertado assim que a captura termina, permitindo gravar o
+    segmento seguinte enquanto o anterior ainda está a ser processado.
+    """
+
+    def __init__(
+        self,
+        record: StageHandler,
+        postprocess: StageHandler,
+        upload: StageHandler,
+        record_workers: int,
+        postprocess_workers: int,
+        upload_workers: int,
+        record_queue: int = 0,
+        postprocess_queue: int = 0,
+        upload_queue: int = 0,
+        on_record_start: Optional[Callable[[str], None]] = None,
+        on_record_end: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Args:
+            on_record_start (Optional[Callable[[str], None]]): Chamado com o username quando a gravação começa.
+            on_record_end (Optional[Callable[[str], None]]): Chamado com o username quando a vaga de gravação é libertada.
+        """
+        self._record = record
+        self._on_record_start = on_record_start
+        self.active_jobs = ActiveJobs()
+        self.postprocess_stage = PipelineStage(
+            "pós-processamento", postprocess, postprocess_workers, postprocess_queue, key="postprocess", active=self.active_jobs
+        )
+        self.upload_stage = PipelineStage("upload", upload, upload_workers, upload_queue, key="upload", active=self.active_jobs)
+        self.postprocess_stage.next_stage = self.upload_stage
+        self.scheduler = RecordingScheduler(
+            worker_fn=self._run_record,
+            max_workers=record_workers,
+            max_queue=record_queue,
+            on_release=on_record_end
+        )
+
+    def start(self):
+        """Inicia os pools de todas as etapas."""
+        self.scheduler.start()
+        self.postprocess_stage.start()
+        self.upload_stage.start()
+
+    def dispatch(self, broadcasts: Iterable[Dict[str, Any]], scores: Optional[Dict[str, float]] = None) -> int:
+        """Despacha transmissões para a etapa de gravação. Ver `RecordingScheduler.dispatch`."""
+        return self.scheduler.dispatch(broadcasts, scores=scores)
+
+    def resume(self, job: RecordingJob, block: bool = True) -> bool:
+        """Entrega diretamente ao pós-processamento um trabalho cuja captura já existe (ex: recuperada)."""
+        return self.postprocess_stage.submit(job, block=block)
+
+    def resume_upload(self, job: RecordingJob, block: bool = True) -> bool:
+        """Entrega diretamente ao upload um trabalho já pós-processado (ex: upload falhado ou interrompido)."""
+        return self.upload_stage.submit(job, block=block)
+
+    def _run_record(self, broadcast: Dict[str, Any]):
+        """Cria o `RecordingJob` e executa a etapa de gravação no trabalhador do agendador."""
+        if self._on_record_start is not None:
+            self._on_record_start(broadcast.get("username"))
+        job = _run_timed("record", self._record, RecordingJob(username=broadcast.get("username"), broadcast=broadcast), self.active_jobs)
+        if job is not None:
+            self.postprocess_stage.submit(job)
+            for separate in job.separate_jobs:
+                self.postprocess_stage.submit(separate)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            Dict[str, Dict[str, Any]]: Estatísticas por etapa ("record", "postprocess", "upload").
+        """
+        return {
+            "record": self.scheduler.stats(),
+            "postprocess": self.postprocess_stage.stats(),
+            "upload": self.upload_stage.stats(),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Encerra as etapas pela ordem do fluxo, para que o trabalho em curso possa ser entregue."""
+        self.scheduler.shutdown(wait=wait)
+        self.postprocess_stage.shutdown(wait=wait)
+        self.upload_stage.shutdown(wait=wait)
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.9.0):
+# - FEATURE: `RecordingJob.separate_jobs`: as partes da sessão que não foi possível unir seguem para o
+#   pós-processamento a seguir à gravação principal.
+#
+# 2026-10-18 (v1.8.0):
+# - FEATURE: `PipelineStage.submit`, `resume` e `resume_upload` aceitam `block=False`: com a fila cheia,
+#   o trabalho é recusado (retorno False) em vez de esperar por vaga.
+#
+# 2026-10-18 (v1.7.0):
+# - FEATURE: `ActiveJobs` (`BroadcastPipeline.active_jobs`) regista os trabalhos em execução em cada etapa.
+#
+# 2026-10-18 (v1.6.0):
+# - FEATURE: A duração e o resultado de cada execução de uma etapa são registados nas métricas
+#   (`xcam_stage_seconds`, `xcam_stage_jobs_total`) e no fluxo de eventos (evento "stage").
+#
+# 2026-10-18 (v1.5.0):
+# - FEATURE: `RecordingJob.journal_id`/`journal_stage` e `BroadcastPipeline.resume_upload`, para o diário de trabalhos.
+#
+# 2026-10-18 (v1.4.0):
+# - FEATURE: `BroadcastPipeline.dispatch` aceita as pontuações de admissão de cada transmissão.
+#
+# 2026-10-18 (v1.3.0):
+# - FEATURE: Callbacks `on_record_start` e `on_record_end` no `BroadcastPipeline` (latência e despertar do poller).
+#
+# 2026-10-18 (v1.2.0):
+# - FEATURE: `BroadcastPipeline.resume` para retomar capturas recuperadas a partir do pós-processamento.
+#
+# 2026-10-18 (v1.1.0):
+# - FEATURE: `RecordingJob.media_info` transporta o `MediaInfo` sondado uma única vez por ficheiro.
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `pipeline.py` com `RecordingJob`, `PipelineStage` e `BroadcastPipeline`.
+
+# @roadmap futuro:
+# - Ajustar dinamicamente o número de trabalhadores de cada etapa conforme a contrapressão medida.
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         poller.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.1.0
+# @lastupdate:     2026-10-18
+# @description:    Cadência adaptativa das verificações da API. Em vez de um `time.sleep` fixo, o
+#                  intervalo encurta quando há trabalhadores de gravação livres e muitas entradas e
+#                  saídas de transmissões, e alonga-se quando os trabalhadores estão saturados ou nada
+#                  muda. As esperas são agendadas num relógio monotónico a partir do início de cada
+#                  verificação e podem ser interrompidas (ex: quando uma gravação termina e liberta
+#                  uma vaga). Mede também a latência entre a descoberta e o início da gravação.
+# @modes:          - Intervalo Adaptativo (saturação e rotatividade).
+#                  - Agendamento Monotónico com Despertar Antecipado.
+#                  - Latência Descoberta -> Início da Gravação.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import logging      # Para registar eventos importantes de forma padronizada.
+import threading    # Evento para interromper a espera e lock das medições.
+import time         # Relógio monotónico do agendamento e das latências.
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from utils.metrics import METRICS
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Número de latências recentes guardadas para a média e o percentil 95.
+LATENCY_SAMPLES = 200
+
+_CAPTURE_LATENCY = METRICS.histogram(
+    "xcam_capture_start_latency_seconds", "Latência entre a descoberta de uma transmissão e o início da gravação, em segundos."
+)
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class AdaptivePoller:
+    """Decide quando fazer a próxima verificação da API e espera por ela num relógio monotónico."""
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        backoff_factor: float = 1.5,
+        high_churn_ratio: float = 0.05
+    ):
+        """
+        Args:
+            base_interval (float): Intervalo normal entre verificações, em segundos.
+            min_interval (float): Intervalo mínimo (com vagas livres e muita rotatividade).
+            max_interval (float): Intervalo máximo (saturado ou sem alterações).
+            backoff_factor (float, optional): Fator de alongamento a cada verificação calma ou saturada.
+            high_churn_ratio (float, optional): Fração de eventos (entradas+saídas+alterações) sobre as
+                                                transmissões online a partir da qual a rotatividade é alta.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.base_interval = min(max(base_interval, self.min_interval), self.max_interval)
+        self.backoff_factor = backoff_factor
+        self.high_churn_ratio = high_churn_ratio
+        self.interval = self.base_interval
+        self.reason = "inicial"
+        self._last_poll_started: Optional[float] = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._discovered: Dict[str, float] = {}
+        self._latencies: "deque[float]" = deque(maxlen=LATENCY_SAMPLES)
+
+    def poll_started(self):
+        """Marca o início de uma verificação (a próxima é agendada a partir deste instante)."""
+        self._last_poll_started = time.monotonic()
+        self._wake.clear()
+
+    def adjust(self, online: int, events: int, free_slots: int) -> float:
+        """
+        Recalcula o intervalo a partir do estado observado na última verificação.
+
+        Args:
+            online (int): Transmissões online.
+            events (int): Entradas + saídas + alterações desde a verificação anterior.
+            free_slots (int): Trabalhadores de gravação livres (descontando a fila).
+
+        Returns:
+            float: O novo intervalo, em segundos.
+        """
+        churn = events / online if online else 0.0
+        if free_slots <= 0:
+            interval, self.reason = self.interval * self.backoff_factor, "saturado"
+        elif churn >= self.high_churn_ratio:
+            interval, self.reason = self.min_interval, f"rotatividade {churn:.0%}"
+        elif events == 0:
+            interval, self.reason = self.interval * self.backoff_factor, "sem alterações"
+        else:
+            interval, self.reason = self.base_interval, "normal"
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
+
+    def wait(self) -> bool:
+        """
+        Espera até à próxima verificação (início da anterior + intervalo), ou até `wake()`. Mesmo
+        quando despertada, a verificação seguinte nunca começa antes de `min_interval`.
+
+        Returns:
+            bool: True se a espera foi antecipada por `wake()`.
+        """
+        started = self._last_poll_started if self._last_poll_started is not None else time.monotonic()
+        remaining = started + self.interval - time.monotonic()
+        if remaining <= 0:
+            return False
+        if not self._wake.wait(timeout=remaining):
+            return False
+        earliest = started + self.min_interval - time.monotonic()
+        if earliest > 0:
+            time.sleep(earliest)
+        return True
+
+    def wake(self):
+        """Antecipa a próxima verificação (ex: uma gravação terminou e libertou uma vaga)."""
+        self._wake.set()
+
+    def note_discovered(self, usernames: Iterable[str]):
+        """Regista o instante em que utilizadores foram vistos online pela primeira vez."""
+        now = time.monotonic()
+        with self._lock:
+            for username in usernames:
+                self._discovered.setdefault(username, now)
+
+    def note_record_started(self, username: str):
+        """Regista o início da gravação e, se a descoberta for conhecida, a latência entre ambos."""
+        with self._lock:
+            discovered = self._discovered.pop(username, None)
+            if discovered is None:
+                return
+            latency = time.monotonic() - discovered
+            self._latencies.append(latency)
+        _CAPTURE_LATENCY.observe(latency)
+
+    def forget(self, usernames: Iterable[str]):
+        """Descarta descobertas pendentes (ex: utilizadores que saíram antes de serem gravados)."""
+        with self._lock:
+            for username in usernames:
+                self._discovered.pop(username, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Intervalo efetivo, motivo, e latência descoberta -> gravação (última, média e p95).
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            last = self._latencies[-1] if self._latencies else None
+            pending = len(self._discovered)
+        return {
+            "interval": self.interval,
+            "reason": self.reason,
+            "latency_last": last,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            "pending": pending,
+        }
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.1.0):
+# - FEATURE: A latência descoberta -> gravação é também registada no histograma `xcam_capture_start_latency_seconds`.
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `poller.py` com `AdaptivePoller`.
+
+# @roadmap futuro:
+# - Aprender a cadência típica de entradas por hora do dia para antecipar os picos.
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         progress.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.0
+# @lastupdate:     2026-10-18
+# @description:    Tabela de estado partilhada, em memória, com o progresso de cada gravação ativa.
+#                  É alimentada pela saída estruturada do FFmpeg (`-progress`, pares chave=valor)
+#                  em vez de expressões regulares sobre as linhas de estado legíveis, e substitui as
+#                  N barras de progresso com '\r' por um único resumo agregado.
+# @modes:          - Análise de Blocos `-progress` do FFmpeg.
+#                  - Tabela de Estado Thread-Safe com Atualizações Limitadas (throttling).
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import threading    # Lock que protege a tabela partilhada entre o event loop e as outras threads.
+import time         # Relógio monotónico para o throttling e para o tempo decorrido.
+from typing import Any, Dict, Optional
+
+# Intervalo mínimo, em segundos, entre duas atualizações da tabela para a mesma gravação.
+# O FFmpeg emite um bloco `-progress` a cada ~0,5s; guardar todos seria trabalho desnecessário.
+PROGRESS_UPDATE_SECONDS = 5.0
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+def _format_seconds(seconds: float) -> str:
+    """Formata um total de segundos para HH:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    """Converte valores do FFmpeg como '1234.5kbits/s', '1.01x' ou 'N/A' em float (ou None)."""
+    if not value:
+        return None
+    value = value.strip().rstrip("x").replace("kbits/s", "")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def parse_progress_block(fields: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Normaliza um bloco de progresso do FFmpeg (chaves de `-progress`) para a tabela de estado.
+
+    Args:
+        fields (Dict[str, str]): Pares chave=valor lidos até à linha `progress=...`.
+
+    Returns:
+        Dict[str, Any]: out_time (s), total_size (bytes), bitrate (kbit/s), speed, drop_frames e dup_frames.
+    """
+    out_time_us = fields.get("out_time_us") or fields.get("out_time_ms")  # Ambas em microssegundos.
+    out_time = _to_float(out_time_us)
+    size = _to_float(fields.get("total_size"))
+    return {
+        "out_time": out_time / 1_000_000 if out_time is not None else None,
+        "total_size": int(size) if size is not None else None,
+        "bitrate": _to_float(fields.get("bitrate")),
+        "speed": _to_float(fields.get("speed")),
+        "drop_frames": int(fields.get("drop_frames") or 0),
+        "dup_frames": int(fields.get("dup_frames") or 0),
+    }
+
+
+class ProgressTable:
+    """Tabela thread-safe `username -> estado` com o progresso de cada gravação ativa."""
+
+    def __init__(self, update_interval: float = PROGRESS_UPDATE_SECONDS):
+        """
+        Args:
+            update_interval (float, optional): Intervalo mínimo entre atualizações por gravação.
+        """
+        self.update_interval = update_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, username: str, output_path: str, max_duration: int):
+        """Regista o início de uma gravação."""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[username] = {
+                "output_path": output_path,
+                "max_duration": max_duration,
+                "started_at": now,
+                "updated_at": now,
+                "out_time": 0.0,
+                "total_size": 0,
+                "bitrate": None,
+                "speed": None,
+                "drop_frames": 0,
+                "dup_frames": 0,
+            }
+
+    def update(self, username: str, fields: Dict[str, str], force: bool = False) -> bool:
+        """
+        Atualiza o estado de uma gravação a partir de um bloco `-progress`, respeitando o throttling.
+
+        Args:
+            username (str): A gravação a atualizar.
+            fields (Dict[str, str]): O bloco de progresso em bruto.
+            force (bool, optional): Ignora o throttling (usado no bloco final `progress=end`).
+
+        Returns:
+            bool: True se a tabela foi atualizada.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or (not force and now - entry["updated_at"] < self.update_interval):
+                return False
+        parsed = parse_progress_block(fields)
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return False
+            entry.update({key: value for key, value in parsed.items() if value is not None})
+            entry["updated_at"] = now
+        return True
+
+    def finish(self, username: str):
+        """Remove uma gravação da tabela."""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna uma cópia do estado atual, com o tempo decorrido e a idade da última atualização.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Estado por utilizador.
+        """
+        now = time.monotonic()
+        with self._lock:
+            result = {}
+            for username, entry in self._entries.items():
+                item = dict(entry)
+                item["elapsed"] = now - entry["started_at"]
+                item["since_update"] = now - entry["updated_at"]
+                result[username] = item
+            return result
+
+    def summary_line(self) -> str:
+        """
+        Retorna uma única linha agregada com o estado de todas as gravações ativas.
+
+        Returns:
+            str: Ex: "🎥 12 gravações | 3.4 GB escritos | 14820 kbit/s | velocidade média 1.00x | 0 frames perdidos".
+        """
+        entries = self.snapshot()
+        if not entries:
+            return "🎥 Nenhuma gravação ativa."
+        total_size = sum(entry["total_size"] or 0 for entry in entries.values())
+        total_bitrate = sum(entry["bitrate"] or 0 for entry in entries.values())
+        speeds = [entry["speed"] for entry in entries.values() if entry["speed"]]
+        dropped = sum(entry["drop_frames"] for entry in entries.values())
+        longest = max(entries.values(), key=lambda entry: entry["out_time"] or 0)
+        average_speed = sum(speeds) / len(speeds) if speeds else 0.0
+        return (
+            f"🎥 {len(entries)} gravações | {total_size / 1024 ** 3:.2f} GB escritos | "
+            f"{total_bitrate:.0f} kbit/s | velocidade média {average_speed:.2f}x | "
+            f"{dropped} frames perdidos | mais longa: {_format_seconds(longest['out_time'] or 0)}"
+        )
+
+# Tabela partilhada por todo o processo (gravadores, loop principal e futuros consumidores).
+PROGRESS_TABLE = ProgressTable()
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `progress.py` com `ProgressTable` e `parse_progress_block`.
+
+# @roadmap futuro:
+# - Guardar um pequeno histórico por gravação para calcular tendências de bitrate.
@@ -7,27 +7,42 @@
 # @titulo:         rec_manager.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.2.0
-# @lastupdate:     2025-07-14
+# @version:        1.7.1
+# @lastupdate:     2026-10-18
 # @description:    Este módulo é responsável por gerenciar os arquivos de metadados `rec.json`.
 #                  Ele lida com a criação (a partir de um template) e a atualização desses
 #                  arquivos, construindo e inserindo novos registros de vídeo com todos os
 #                  campos formatados corretamente, garantindo a integridade do "Git-as-a-Database".
+#                  As escritas passam pelo `RecStore`: cada registro é acrescentado a um log NDJSON
+#                  do utilizador (custo constante) e a compactação materializa periodicamente o
+#                  rec.json, byte a byte no formato de sempre, numa única reescrita atómica.
 # @modes:          - Gestão de Ficheiros JSON.
+#                  - Índice Global do Catálogo (CLI: python -m utils.rec_manager rebuild-index).
+#                  - Formato Compacto e Fragmentos de Arquivo (CLI: python -m utils.rec_manager migrate).
+#                  - Log Só de Acréscimo por Utilizador (NDJSON).
+#                  - Compactação Agrupada e Atómica do rec.json.
 
 # ---------------------------------------------------------------------------------------------
 # 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
 # ---------------------------------------------------------------------------------------------
 
 # --- Importações de Bibliotecas Padrão ---
+import glob         # Para encontrar os logs por compactar.
 import json         # Para manipulação de dados no formato JSON.
 import os           # Para interações com o sistema de arquivos (caminhos, diretórios).
+import re           # Para interpretar a duração "1h2m3s" dos registros.
+import argparse     # Para a linha de comandos (ex: `rebuild-index`).
 import logging      # Biblioteca padrão para logging, usada para obter uma instância do logger.
+import tempfile     # Ficheiro temporário da escrita atómica.
+import threading    # Locks por utilizador, partilhados pelos trabalhadores de upload.
+import time         # Relógio monotónico da idade dos registros por compactar.
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime # Para obter a data e hora atuais.
 import pytz         # Para trabalhar com fusos horários específicos (neste caso, 'America/Sao_Paulo').
 
 # --- Importações de Módulos do Projeto ---
-from config import DB_PATH # Importa o caminho para o diretório do "banco de dados".
+from config import DB_PATH, REC_STORE_SETTINGS, CATALOG_SETTINGS # Importa o caminho do "banco de dados" e os parâmetros de compactação e do índice.
+from utils.metrics import METRICS, emit_event # Métricas e eventos das escritas do rec.json.
 
 # --- Variáveis Globais ---
 # Inicializa um logger específico para este módulo. O nome do logger será 'utils.rec_manager',
@@ -37,6 +52,23 @@ logger = logging.getLogger(__name__)
 # Define o caminho para o template a partir do qual novos ficheiros rec.json são criados.
 TEMPLATE_PATH = "templates/rec.json"
 
+# Interpreta o campo "tempo" dos registros (ex: "1h2m3s", "7m50s").
+_DURATION_PATTERN = re.compile(r"(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$")
+
+# Formatos de serialização dos rec.json ("pretty" é o formato original; "compact" dispensa os espaços).
+SERIALIZATION_FORMATS = {
+    "pretty": {"indent": 2},
+    "compact": {"indent": None, "separators": (",", ":")},
+}
+
+# Nome do log só de acréscimo de cada utilizador (um registro JSON por linha).
+REC_LOG_NAME = "rec.log.ndjson"
+
+# Métricas do armazenamento dos registros (ver utils/metrics.py).
+_REC_APPENDS = METRICS.counter("xcam_rec_appends_total", "Registros acrescentados aos logs dos utilizadores, por resultado.")
+_REC_COMPACTIONS = METRICS.counter("xcam_rec_compactions_total", "Reescritas do rec.json por compactação, por resultado.")
+_REC_COMPACT_SECONDS = METRICS.histogram("xcam_rec_compact_seconds", "Duração de cada reescrita do rec.json, em segundos.")
+
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
 # ---------------------------------------------------------------------------------------------
@@ -70,47 +102,32 @@ def _format_duration(seconds: int) -> str:
         
     return "".join(parts)
 
-def create_or_update_rec_json(username: str, video_id: str, upload_url: str, poster_url: str, duration_seconds: int):
+def parse_duration(value: str) -> int:
     """
-    Cria ou atualiza o arquivo rec.json para um usuário, adicionando um novo registro de vídeo.
+    Inverso de `_format_duration`: converte "1h2m3s" em segundos (0 se o formato não for reconhecido).
 
     Args:
-        username (str): O nome de usuário do streamer.
-        video_id (str): O ID único do vídeo (slug) retornado pelo serviço de upload.
-        upload_url (str): A URL completa para o vídeo.
-        poster_url (str): A URL completa para a imagem do poster (thumbnail).
-        duration_seconds (int): A duração da gravação em segundos.
+        value (str): A duração formatada (campo "tempo" dos registros).
+
+    Returns:
+        int: A duração em segundos.
     """
-    # Constrói o caminho completo para o diretório e o arquivo do usuário.
-    user_dir = os.path.join(DB_PATH, username)
-    user_rec_path = os.path.join(user_dir, "rec.json")
+    match = _DURATION_PATTERN.match(value or "")
+    if not match:
+        return 0
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
 
-    # Garante que o diretório do usuário exista; se não, cria-o.
-    os.makedirs(user_dir, exist_ok=True)
+def _build_video_record(username: str, video_id: str, upload_url: str, poster_url: str, duration_seconds: int) -> Dict[str, Any]:
+    """
+    Constrói o registro de vídeo no formato do rec.json.
 
-    # Tenta carregar o arquivo rec.json existente ou criar um novo a partir do template.
-    try:
-        if os.path.exists(user_rec_path):
-            # Se o ficheiro existe, abre-o e carrega o seu conteúdo JSON.
-            with open(user_rec_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            logger.info(f"📖 Arquivo rec.json existente para '{username}' carregado.")
-        else:
-            # Se não existir, clona a estrutura a partir do nosso template.
-            with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            # Define o nome de usuário no novo ficheiro.
-            data["username"] = username
-            logger.info(f"📄 Nenhum rec.json encontrado para '{username}'. Criando um novo a partir do template.")
-    except (json.JSONDecodeError, IOError) as e:
-        logger.error(f"❌ Não foi possível ler o arquivo rec.json ou o template para '{username}': {e}")
-        return # Aborta a função se não for possível ler os arquivos base.
-
-    # --- Construção do novo registro de vídeo ---
-    
+    Returns:
+        Dict[str, Any]: O novo registro de vídeo.
+    """
     # Obtém a data e hora atuais no fuso horário de São Paulo para consistência.
     now_sp = datetime.now(pytz.timezone('America/Sao_Paulo'))
-    
+
     # Formata os componentes de data, hora e duração para a exibição.
     formatted_date = now_sp.strftime('%d-%m-%Y')
     formatted_time = now_sp.strftime('%H:%M') # Formato 24h com minutos.
@@ -119,12 +136,12 @@ def create_or_update_rec_json(username: str, video_id: str, upload_url: str, pos
     # Constrói os campos `title` e `file` de forma padronizada.
     title = f"{username}_{formatted_date}_{formatted_time}_{formatted_duration}"
     file_name = f"{title}.mp4"
-    
+
     # Constrói a URL do iframe, que combina a URL de upload com o poster como thumbnail.
     iframe_url = f"{upload_url}?thumbnail={poster_url}"
-    
+
     # Cria o dicionário completo para o novo registro de vídeo.
-    new_video_record = {
+    return {
         "video": video_id,
         "title": title,
         "file": file_name,
@@ -136,28 +153,684 @@ def create_or_update_rec_json(username: str, video_id: str, upload_url: str, pos
         "tempo": formatted_duration
     }
 
-    # Adiciona o novo registro ao início da lista de vídeos (para que os mais recentes apareçam primeiro).
-    data["videos"].insert(0, new_video_record)
-    # Atualiza a contagem total de registros.
-    data["records"] = len(data["videos"])
 
-    # Tenta salvar o arquivo JSON atualizado.
+def _record_sort_key(record: Dict[str, Any]) -> Tuple[int, ...]:
+    """Chave cronológica de um registro a partir de "data" (dd-mm-aaaa) e "horario" (hh:mm ou hh-mm)."""
+    try:
+        day, month, year = (int(part) for part in record.get("data", "").split("-"))
+        hour, minute = (int(part) for part in re.split(r"[:-]", record.get("horario", "")))
+        return (year, month, day, hour, minute)
+    except ValueError:
+        return (0,)
+
+
+def archive_path(user_dir: str, page: int) -> str:
+    """Caminho de um fragmento de arquivo do histórico (`rec-<página>.json`, 1 = o mais antigo)."""
+    return os.path.join(user_dir, f"rec-{page}.json")
+
+def read_archive(user_dir: str, pages: int) -> List[Dict[str, Any]]:
+    """
+    Lê os registros de todos os fragmentos de arquivo de um utilizador.
+
+    Args:
+        user_dir (str): A pasta do utilizador.
+        pages (int): O número de fragmentos (campo "pages" do rec.json).
+
+    Returns:
+        List[Dict[str, Any]]: Os registros arquivados, do mais recente para o mais antigo.
+    """
+    videos = []
+    for page in range(pages, 0, -1):
+        with open(archive_path(user_dir, page), 'r', encoding='utf-8') as f:
+            videos.extend(json.load(f)["videos"])
+    return videos
+
+def _with_archive(user_dir: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """O rec.json com o histórico completo (página atual + fragmentos de arquivo) em "videos"."""
+    if not data.get("pages"):
+        return data
+    return {**data, "videos": data["videos"] + read_archive(user_dir, data["pages"])}
+
+def _read_user_rec(path: str) -> Optional[Tuple[str, Dict[str, Any], int]]:
+    """
+    Lê um rec.json (e os seus fragmentos de arquivo) para o índice.
+    Retorna (username, dados com o histórico completo, mtime_ns) ou None se for ilegível.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, 'r', encoding='utf-8') as f:
+            data = _with_archive(os.path.dirname(path), json.load(f))
+    except (json.JSONDecodeError, IOError, OSError, KeyError) as e:
+        logger.warning(f"⚠️ rec.json ignorado no índice ('{path}'): {e}")
+        return None
+    return os.path.basename(os.path.dirname(path)), data, mtime_ns
+
+
+class CatalogIndex:
+    """
+    Índice global de todos os rec.json (`CATALOG_SETTINGS["PATH"]`), para perguntas entre
+    utilizadores sem abrir todos os ficheiros: contagens e duração total por utilizador, os registros
+    mais recentes de todo o catálogo e os slugs de vídeo repetidos.
+
+    É atualizado em memória pelo `RecStore` na mesma secção crítica de cada reescrita de um rec.json
+    e gravado em lote (`flush`), uma vez por verificação, em vez de a cada compactação. Cada
+    utilizador guarda o `mtime_ns` do rec.json indexado, pelo que `sync` corrige, só com `stat`, um
+    índice desatualizado (ex: processo interrompido antes do `flush`, ou um `git pull`).
+    """
+
+    def __init__(self, path: str = CATALOG_SETTINGS["PATH"], db_path: str = DB_PATH, latest_size: int = CATALOG_SETTINGS["LATEST_SIZE"]):
+        """
+        Args:
+            path (str, optional): O ficheiro JSON do índice.
+            db_path (str, optional): A pasta dos utilizadores.
+            latest_size (int, optional): Quantos registros recentes do catálogo manter.
+        """
+        self.path = path
+        self.db_path = db_path
+        self.latest_size = latest_size
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Any]] = None
+        # Utilizadores atualizados em memória desde a última gravação do índice.
+        self._dirty = 0
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {"totals": {}, "users": {}, "latest": [], "videos": {}}
+
+    def _load(self) -> Dict[str, Any]:
+        """O índice em memória, lido do disco na primeira utilização."""
+        if self._index is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (json.JSONDecodeError, IOError, OSError):
+                self._index = self._empty()
+        return self._index
+
+    def _apply(self, index: Dict[str, Any], username: str, data: Dict[str, Any], mtime_ns: int):
+        """Substitui no índice tudo o que diz respeito a um utilizador pelo conteúdo do seu rec.json."""
+        # `data` traz o histórico completo do utilizador (ver `_with_archive`).
+        videos = data.get("videos", [])
+        index["users"][username] = {
+            "records": len(videos),
+            "total_seconds": sum(parse_duration(video.get("tempo", "")) for video in videos),
+            "latest": videos[0].get("video") if videos else None,
+            "mtime_ns": mtime_ns,
+        }
+
+        for slug in [slug for slug, owners in index["videos"].items() if username in owners]:
+            owners = [owner for owner in index["videos"][slug] if owner != username]
+            if owners:
+                index["videos"][slug] = owners
+            else:
+                del index["videos"][slug]
+        for video in videos:
+            if video.get("video"):
+                index["videos"].setdefault(video["video"], []).append(username)
+
+        # Os registros de um utilizador estão do mais recente para o mais antigo: bastam os primeiros.
+        latest = [entry for entry in index["latest"] if entry["username"] != username]
+        for video in videos[:self.latest_size]:
+            latest.append({
+                "username": username,
+                "video": video.get("video"),
+                "title": video.get("title"),
+                "data": video.get("data"),
+                "horario": video.get("horario"),
+                "tempo": video.get("tempo"),
+            })
+        latest.sort(key=_record_sort_key, reverse=True)
+        index["latest"] = latest[:self.latest_size]
+
+    def _save(self, index: Dict[str, Any]) -> bool:
+        users = index["users"].values()
+        index["totals"] = {
+            "users": len(index["users"]),
+            "records": sum(user["records"] for user in users),
+            "total_seconds": sum(user["total_seconds"] for user in users),
+            "duplicates": sum(1 for owners in index["videos"].values() if len(owners) > 1),
+        }
+        saved = write_json_atomic(self.path, index, **SERIALIZATION_FORMATS["compact"])
+        if saved:
+            self._dirty = 0
+        return saved
+
+    def update_user(self, username: str, data: Dict[str, Any], mtime_ns: int):
+        """Atualiza o índice em memória com o rec.json acabado de escrever de um utilizador (ver `flush`)."""
+        with self._lock:
+            self._apply(self._load(), username, data, mtime_ns)
+            self._dirty += 1
+
+    def flush(self) -> bool:
+        """
+        Grava o índice, se houver atualizações desde a última gravação.
+
+        Returns:
+            bool: True se o índice no disco ficou atualizado.
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            return self._save(self._index)
+
+    def _rec_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(glob.escape(self.db_path), "*", "rec.json")))
+
+    def sync(self) -> int:
+        """
+        Reindexa apenas os rec.json cujo `mtime_ns` mudou desde a última indexação e remove os
+        utilizadores que já não têm rec.json.
+
+        Returns:
+            int: O número de utilizadores reindexados ou removidos.
+        """
+        with self._lock:
+            index = self._load()
+            known = {username: user["mtime_ns"] for username, user in index["users"].items()}
+            changed = 0
+            present = set()
+            for path in self._rec_paths():
+                username = os.path.basename(os.path.dirname(path))
+                present.add(username)
+                try:
+                    if os.stat(path).st_mtime_ns == known.get(username):
+                        continue
+                except OSError:
+                    continue
+                result = _read_user_rec(path)
+                if result is not None:
+                    self._apply(index, *result)
+                    changed += 1
+            for username in set(known) - present:
+                self._apply(index, username, {"videos": []}, 0)
+                del index["users"][username]
+                changed += 1
+            if changed:
+                self._save(index)
+            return changed
+
+    def rebuild(self) -> Dict[str, Any]:
+        """
+        Reconstrói o índice do zero, lendo todos os rec.json.
+
+        Returns:
+            Dict[str, Any]: Os totais do novo índice.
+        """
+        index = self._empty()
+        for path in self._rec_paths():
+            result = _read_user_rec(path)
+            if result is not None:
+                self._apply(index, *result)
+        with self._lock:
+            self._index = index
+            self._save(index)
+        return index["totals"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cópia do índice atual (totais, utilizadores, registros recentes e vídeos)."""
+        with self._lock:
+            return json.loads(json.dumps(self._load()))
+
+    def duplicates(self) -> Dict[str, List[str]]:
+        """Slugs de vídeo que aparecem em mais de um registro, com os respetivos utilizadores."""
+        with self._lock:
+            return {slug: list(owners) for slug, owners in self._load()["videos"].items() if len(owners) > 1}
+
+
+def _paginate(data: Dict[str, Any], user_dir: str, page_size: int, fmt: str) -> Optional[Dict[str, Any]]:
+    """
+    Mantém no rec.json apenas os registros mais recentes: sempre que a página atual chega a
+    `2 * page_size` registros, os `page_size` mais antigos passam para um novo fragmento imutável
+    `rec-<pages+1>.json`. O rec.json fica assim com entre `page_size` e `2 * page_size - 1` registros;
+    "records" (o histórico completo) é mantido por quem chama.
+
+    O fragmento é escrito antes do rec.json: se o processo morrer entre as duas escritas, a
+    compactação seguinte volta a gerar o mesmo fragmento.
+
+    Args:
+        data (Dict[str, Any]): O rec.json (a página atual).
+        user_dir (str): A pasta do utilizador.
+        page_size (int): Registros por fragmento. 0 desativa a paginação.
+        fmt (str): O formato de serialização (ver `SERIALIZATION_FORMATS`).
+
+    Returns:
+        Optional[Dict[str, Any]]: O rec.json a escrever, ou None se um fragmento não pôde ser escrito.
+    """
+    videos = data["videos"]
+    pages = data.get("pages", 0)
+    while page_size and len(videos) >= 2 * page_size:
+        pages += 1
+        shard = {"username": data.get("username"), "page": pages, "videos": videos[-page_size:]}
+        if not write_json_atomic(archive_path(user_dir, pages), shard, **SERIALIZATION_FORMATS[fmt]):
+            return None
+        del videos[-page_size:]
+        logger.info(f"🗄️ {page_size} registros de '{data.get('username')}' arquivados em 'rec-{pages}.json'.")
+
+    # "pages" só existe em utilizadores paginados, para não alterar os restantes rec.json.
+    paged = {key: value for key, value in data.items() if key not in ("pages", "videos")}
+    if pages:
+        paged["pages"] = pages
+    paged["videos"] = videos
+    return paged
+
+
+def migrate_user(user_dir: str, fmt: str, page_size: int, dry_run: bool = False) -> Tuple[int, int]:
+    """
+    Reescreve o histórico de um utilizador no formato e na paginação indicados (ex: de um rec.json
+    único e indentado para um rec.json compacto com fragmentos de arquivo, ou o inverso).
+
+    Args:
+        user_dir (str): A pasta do utilizador.
+        fmt (str): O formato de serialização (ver `SERIALIZATION_FORMATS`).
+        page_size (int): Registros por fragmento. 0 junta tudo de novo num único rec.json.
+        dry_run (bool, optional): Calcula os tamanhos sem escrever nada.
+
+    Returns:
+        Tuple[int, int]: Bytes ocupados (rec.json + fragmentos) antes e depois da migração.
+    """
+    rec_path = os.path.join(user_dir, "rec.json")
+    old_shards = sorted(glob.glob(os.path.join(glob.escape(user_dir), "rec-*.json")))
+    before = sum(os.path.getsize(path) for path in [rec_path, *old_shards])
+    with open(rec_path, 'r', encoding='utf-8') as f:
+        data = _with_archive(user_dir, json.load(f))
+
+    if dry_run:
+        # Migra para uma pasta temporária para medir os tamanhos finais.
+        with tempfile.TemporaryDirectory() as temp_dir:
+            migrated = _paginate({**data, "records": len(data["videos"]), "pages": 0}, temp_dir, page_size, fmt)
+            write_json_atomic(os.path.join(temp_dir, "rec.json"), migrated, **SERIALIZATION_FORMATS[fmt])
+            return before, sum(os.path.getsize(path) for path in glob.glob(os.path.join(glob.escape(temp_dir), "*.json")))
+
+    migrated = _paginate({**data, "records": len(data["videos"]), "pages": 0}, user_dir, page_size, fmt)
+    if migrated is None or not write_json_atomic(rec_path, migrated, **SERIALIZATION_FORMATS[fmt]):
+        raise IOError(f"não foi possível migrar '{user_dir}'")
+    # Fragmentos de uma paginação anterior que deixaram de existir.
+    for page in range(migrated.get("pages", 0) + 1, len(old_shards) + 1):
+        if os.path.exists(archive_path(user_dir, page)):
+            os.remove(archive_path(user_dir, page))
+    after = sum(os.path.getsize(path) for path in glob.glob(os.path.join(glob.escape(user_dir), "rec*.json")))
+    return before, after
+
+
+class _UserState:
+    """Lock e registros por compactar do log de um utilizador."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.first_pending: Optional[float] = None
+
+
+class RecStore:
+    """
+    Camada de escrita dos ficheiros rec.json.
+
+    O caminho de escrita é um log só de acréscimo por utilizador (`<DB_PATH>/<username>/rec.log.ndjson`,
+    um registro JSON por linha): cada novo vídeo custa uma linha, independentemente do tamanho do
+    histórico. A compactação materializa periodicamente o rec.json no formato de sempre (mais recentes
+    primeiro, `indent=2`, `ensure_ascii=False`), juntando numa única reescrita atómica todos os
+    registros pendentes, e só então apaga o log. Cada utilizador tem o seu lock; os locks protegem
+    apenas as threads deste processo.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        template_path: str = TEMPLATE_PATH,
+        settings: Optional[Dict[str, Any]] = None,
+        catalog: Optional[CatalogIndex] = None
+    ):
+        """
+        Args:
+            db_path (str, optional): A pasta dos utilizadores.
+            template_path (str, optional): O template de novos rec.json.
+            settings (Optional[Dict[str, Any]], optional): Substitui `config.REC_STORE_SETTINGS`.
+            catalog (Optional[CatalogIndex], optional): O índice global a manter (padrão: o de `CATALOG_SETTINGS`).
+        """
+        self.db_path = db_path
+        self.template_path = template_path
+        self.settings = settings or REC_STORE_SETTINGS
+        self.catalog = catalog or CatalogIndex(db_path=db_path)
+        self._states: Dict[str, _UserState] = {}
+        self._states_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._records = 0
+        self._writes = 0
+
+    def _state(self, username: str) -> _UserState:
+        with self._states_lock:
+            state = self._states.get(username)
+            if state is None:
+                state = self._states[username] = _UserState()
+            return state
+
+    def rec_path(self, username: str) -> str:
+        return os.path.join(self.db_path, username, "rec.json")
+
+    def log_path(self, username: str) -> str:
+        return os.path.join(self.db_path, username, REC_LOG_NAME)
+
+    def add_record(self, username: str, record: Dict[str, Any]) -> bool:
+        """
+        Acrescenta um registro de vídeo ao log do utilizador (O(1)). O rec.json é atualizado na
+        compactação seguinte, ou já, se o utilizador acumular `COMPACT_MAX_PENDING` registros.
+
+        Args:
+            username (str): O nome de usuário do streamer.
+            record (Dict[str, Any]): O registro de vídeo (ver `_build_video_record`).
+
+        Returns:
+            bool: True se o registro ficou gravado no log.
+        """
+        state = self._state(username)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with state.lock:
+            try:
+                # Garante que o diretório do usuário exista; se não, cria-o.
+                os.makedirs(os.path.join(self.db_path, username), exist_ok=True)
+                with open(self.log_path(username), 'a', encoding='utf-8') as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except (IOError, OSError) as e:
+                logger.error(f"❌ Falha ao acrescentar o registro de '{username}' ao log: {e}")
+                _REC_APPENDS.inc(result="error")
+                return False
+            state.pending += 1
+            if state.first_pending is None:
+                state.first_pending = time.monotonic()
+            compact_now = state.pending >= self.settings["COMPACT_MAX_PENDING"]
+        with self._stats_lock:
+            self._records += 1
+        _REC_APPENDS.inc(result="ok")
+        logger.info(f"📝 Registro de '{username}' acrescentado ao log ({record.get('video')}).")
+
+        if compact_now:
+            self.compact(username)
+        return True
+
+    def _load(self, username: str) -> Optional[Dict[str, Any]]:
+        """Lê o rec.json existente ou clona o template. None se não for possível ler nenhum."""
+        user_rec_path = self.rec_path(username)
+        try:
+            if os.path.exists(user_rec_path):
+                # Se o ficheiro existe, abre-o e carrega o seu conteúdo JSON.
+                with open(user_rec_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            else:
+                # Se não existir, clona a estrutura a partir do nosso template.
+                with open(self.template_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                # Define o nome de usuário no novo ficheiro.
+                data["username"] = username
+                logger.info(f"📄 Nenhum rec.json encontrado para '{username}'. Criando um novo a partir do template.")
+            return data
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"❌ Não foi possível ler o arquivo rec.json ou o template para '{username}': {e}")
+            return None
+
+    def _read_log(self, username: str) -> List[Dict[str, Any]]:
+        """Lê os registros do log, do mais antigo para o mais recente (uma linha cortada a meio é ignorada)."""
+        records = []
+        try:
+            with open(self.log_path(username), 'r', encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"⚠️ Linha {number} inválida no log de '{username}' (escrita interrompida?). Ignorada.")
+        except FileNotFoundError:
+            pass
+        return records
+
+    def compact(self, username: str) -> bool:
+        """
+        Materializa o rec.json de um utilizador: junta os registros do log (mais recentes primeiro)
+        numa única reescrita atómica e apaga o log. Registros cujo `video` já está no rec.json (ex:
+        compactação interrompida entre a reescrita e a remoção do log) não são duplicados.
+
+        Returns:
+            bool: True se o rec.json ficou atualizado (ou não havia nada a compactar).
+        """
+        state = self._state(username)
+        with state.lock:
+            records = self._read_log(username)
+            if records:
+                started = time.monotonic()
+                data = self._load(username)
+                if data is None:
+                    _REC_COMPACTIONS.inc(result="error")
+                    return False # O log mantém-se; a compactação é repetida mais tarde.
+                known = {video.get("video") for video in data["videos"]}
+                new_records = [record for record in records if record.get("video") not in known]
+                # Os registros mais recentes aparecem primeiro (o último do log é o mais recente).
+                data["videos"][:0] = new_records[::-1]
+                # Atualiza a contagem total de registros (nos utilizadores paginados inclui os fragmentos).
+                data["records"] = data["records"] + len(new_records) if data.get("pages") else len(data["videos"])
+                user_dir = os.path.dirname(self.rec_path(username))
+                data = _paginate(data, user_dir, self.settings["PAGE_SIZE"], self.settings["FORMAT"])
+                if data is None or not write_json_atomic(self.rec_path(username), data, **SERIALIZATION_FORMATS[self.settings["FORMAT"]]):
+                    _REC_COMPACTIONS.inc(result="error")
+                    return False
+                # O índice global acompanha cada reescrita, ainda com o lock do utilizador.
+                try:
+                    self.catalog.update_user(username, _with_archive(user_dir, data), os.stat(self.rec_path(username)).st_mtime_ns)
+                except (json.JSONDecodeError, IOError, OSError, KeyError) as e:
+                    logger.warning(f"⚠️ Índice global não atualizado para '{username}' (corrigido no próximo `sync`): {e}")
+                with self._stats_lock:
+                    self._writes += 1
+                elapsed = time.monotonic() - started
+                _REC_COMPACTIONS.inc(result="ok")
+                _REC_COMPACT_SECONDS.observe(elapsed)
+                emit_event("rec_compact", username=username, records=len(new_records), total=data["records"], seconds=round(elapsed, 3))
+                logger.info(
+                    f"💾 Arquivo rec.json para '{username}' atualizado com sucesso "
+                    f"({len(new_records)} registros do log). Total de {data['records']} registros."
+                )
+            if os.path.exists(self.log_path(username)):
+                os.remove(self.log_path(username))
+            state.pending = 0
+            state.first_pending = None
+            return True
+
+    def compact_due(self) -> int:
+        """
+        Compacta os utilizadores com registros pendentes há mais de `COMPACT_INTERVAL_SECONDS`.
+
+        Returns:
+            int: O número de utilizadores compactados.
+        """
+        limit = time.monotonic() - self.settings["COMPACT_INTERVAL_SECONDS"]
+        with self._states_lock:
+            due = [name for name, state in self._states.items() if state.first_pending is not None and state.first_pending <= limit]
+        compacted = sum(1 for username in due if self.compact(username))
+        # Uma única gravação do índice por verificação, com as compactações desde a anterior.
+        self.catalog.flush()
+        return compacted
+
+    def compact_all(self) -> int:
+        """
+        Compacta todos os logs existentes no disco (ex: no arranque, após uma execução interrompida,
+        ou no encerramento).
+
+        Returns:
+            int: O número de utilizadores compactados.
+        """
+        pattern = os.path.join(glob.escape(self.db_path), "*", REC_LOG_NAME)
+        usernames = [os.path.basename(os.path.dirname(path)) for path in glob.glob(pattern)]
+        compacted = sum(1 for username in usernames if self.compact(username))
+        self.catalog.flush()
+        return compacted
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Registros gravados e reescritas do rec.json (registros/reescritas mede o agrupamento).
+        """
+        with self._stats_lock:
+            return {"records": self._records, "writes": self._writes}
+
+
+def write_json_atomic(
+    path: str,
+    data: Dict[str, Any],
+    indent: Optional[int] = 2,
+    separators: Optional[Tuple[str, str]] = None
+) -> bool:
+    """
+    Escreve um JSON no formato do rec.json (`indent=2`, `ensure_ascii=False`) de forma atómica: o
+    conteúdo vai para um ficheiro temporário na mesma pasta, que substitui o original com `os.replace`.
+    `indent` e `separators` seguem `json.dump` (ver `SERIALIZATION_FORMATS`).
+
+    Returns:
+        bool: True se o ficheiro foi substituído.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".rec-", suffix=".tmp", dir=directory)
     try:
-        # Abre o arquivo em modo de escrita ('w'), que sobrescreve o conteúdo anterior.
-        with open(user_rec_path, 'w', encoding='utf-8') as f:
-            # `json.dump` escreve o dicionário no arquivo.
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
             # `indent=2` formata o JSON de forma legível.
             # `ensure_ascii=False` permite a escrita de caracteres especiais (ex: acentos).
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        logger.info(f"💾 Arquivo rec.json para '{username}' atualizado com sucesso. Total de {data['records']} registros.")
-    except IOError as e:
-        logger.error(f"❌ Falha ao salvar o arquivo rec.json para '{username}': {e}")
+            json.dump(data, f, indent=indent, separators=separators, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # O `mkstemp` cria o ficheiro só com permissões do dono; o rec.json é público.
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+        return True
+    except (IOError, OSError) as e:
+        logger.error(f"❌ Falha ao salvar o arquivo '{path}': {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+
+# Instância partilhada por todos os trabalhadores do processo.
+_rec_store: Optional[RecStore] = None
+_rec_store_lock = threading.Lock()
+
+def get_rec_store() -> RecStore:
+    """Retorna o `RecStore` partilhado, criando-o na primeira chamada."""
+    global _rec_store
+    with _rec_store_lock:
+        if _rec_store is None:
+            _rec_store = RecStore()
+        return _rec_store
+
+def create_or_update_rec_json(username: str, video_id: str, upload_url: str, poster_url: str, duration_seconds: int) -> bool:
+    """
+    Cria ou atualiza o arquivo rec.json para um usuário, adicionando um novo registro de vídeo.
+
+    Args:
+        username (str): O nome de usuário do streamer.
+        video_id (str): O ID único do vídeo (slug) retornado pelo serviço de upload.
+        upload_url (str): A URL completa para o vídeo.
+        poster_url (str): A URL completa para a imagem do poster (thumbnail).
+        duration_seconds (int): A duração da gravação em segundos.
+
+    Returns:
+        bool: True se o registro foi gravado.
+    """
+    record = _build_video_record(username, video_id, upload_url, poster_url, duration_seconds)
+    return get_rec_store().add_record(username, record)
 
 # ---------------------------------------------------------------------------------------------
 # 4. RODAPÉ / FIM DO CÓDIGO
 # ---------------------------------------------------------------------------------------------
 
+def _rebuild_index_command(args: argparse.Namespace):
+    """`rebuild-index`: reconstrói o índice global."""
+    catalog = CatalogIndex(path=args.index_path, db_path=args.db_path)
+    started = time.perf_counter()
+    totals = catalog.rebuild()
+    print(f"⏱️  Reconstruído em {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(
+        f"📚 Índice '{args.index_path}': {totals['users']} utilizadores | {totals['records']} registros | "
+        f"{totals['total_seconds'] / 3600:.1f} h | {totals['duplicates']} slugs repetidos"
+    )
+
+def _migrate_command(args: argparse.Namespace):
+    """`migrate`: aplica o formato e a paginação a todos os rec.json existentes."""
+    started = time.perf_counter()
+    user_dirs = sorted(os.path.dirname(path) for path in glob.glob(os.path.join(glob.escape(args.db_path), "*", "rec.json")))
+    total_before = total_after = paged = failed = 0
+    for user_dir in user_dirs:
+        try:
+            before, after = migrate_user(user_dir, args.format, args.page_size, dry_run=args.dry_run)
+        except (json.JSONDecodeError, IOError, OSError, KeyError) as e:
+            print(f"❌ {os.path.basename(user_dir)}: {e}")
+            failed += 1
+            continue
+        total_before += before
+        total_after += after
+        with open(os.path.join(user_dir, "rec.json"), 'r', encoding='utf-8') as f:
+            paged += 1 if json.load(f).get("pages") else 0
+    mode = " (simulação)" if args.dry_run else ""
+    print(
+        f"📦 {len(user_dirs) - failed}/{len(user_dirs)} utilizadores migrados para '{args.format}'"
+        f"{f', páginas de {args.page_size}' if args.page_size else ''}{mode} em {time.perf_counter() - started:.2f}s"
+    )
+    if not args.dry_run:
+        print(f"🗄️  {paged} utilizadores com fragmentos de arquivo.")
+    print(f"💾 {total_before / 1024:.1f} KB -> {total_after / 1024:.1f} KB ({(total_after / total_before - 1) * 100 if total_before else 0:+.0f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="XCam REC - Gestão dos ficheiros rec.json.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild-index", help="Reconstrói do zero o índice global do catálogo.")
+    rebuild_parser.add_argument("--db-path", default=DB_PATH, help="Pasta dos utilizadores (padrão: DB_PATH).")
+    rebuild_parser.add_argument("--index-path", default=CATALOG_SETTINGS["PATH"], help="Ficheiro do índice (padrão: CATALOG_SETTINGS['PATH']).")
+    migrate_parser = subparsers.add_parser("migrate", help="Aplica o formato e a paginação a todos os rec.json.")
+    migrate_parser.add_argument("--db-path", default=DB_PATH, help="Pasta dos utilizadores (padrão: DB_PATH).")
+    migrate_parser.add_argument("--format", choices=sorted(SERIALIZATION_FORMATS), default=REC_STORE_SETTINGS["FORMAT"], help="Formato de serialização.")
+    migrate_parser.add_argument("--page-size", type=int, default=REC_STORE_SETTINGS["PAGE_SIZE"], help="Registros por fragmento de arquivo (0 = sem paginação).")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Mostra os tamanhos finais sem escrever nada.")
+    cli_args = parser.parse_args()
+    if cli_args.command == "rebuild-index":
+        _rebuild_index_command(cli_args)
+    elif cli_args.command == "migrate":
+        _migrate_command(cli_args)
+
 # @log de mudanças:
+# 2026-10-18 (v1.7.1):
+# - REFACTOR: `CatalogIndex.rebuild` volta a ler os rec.json em sequência: a árvore real (341
+#   utilizadores) reconstrói-se em ~100 ms com 1 ou 8 threads. Saem `--workers` e `--benchmark`.
+# - CORREÇÃO: O índice global deixa de ser reescrito por inteiro a cada compactação: `update_user`
+#   atualiza a memória e `flush` grava-o uma vez por verificação (`compact_due`) e em `compact_all`.
+#
+# 2026-10-18 (v1.7.0):
+# - FEATURE: Os acréscimos ao log e as compactações do rec.json são registados nas métricas
+#   (`xcam_rec_*`) e as compactações no fluxo de eventos (evento "rec_compact").
+#
+# 2026-10-18 (v1.6.0):
+# - FEATURE: Formato de serialização configurável (`REC_STORE_SETTINGS["FORMAT"]`: "pretty" ou "compact").
+# - FEATURE: Paginação do histórico (`PAGE_SIZE`): o rec.json guarda os registros mais recentes e os mais
+#   antigos passam para fragmentos imutáveis `rec-<página>.json`; "records" conta o histórico completo.
+# - FEATURE: Subcomando `migrate` (com `--dry-run`) para converter os rec.json existentes.
+#
+# 2026-10-18 (v1.5.0):
+# - FEATURE: `CatalogIndex`, um índice global de todos os rec.json (contagens e duração total por
+#   utilizador, registros mais recentes do catálogo e slugs repetidos), atualizado a cada compactação e
+#   sincronizado por `mtime_ns` no arranque.
+# - FEATURE: Subcomando `rebuild-index` (reconstrução paralela, com `--benchmark`).
+# - FEATURE: `parse_duration`, o inverso de `_format_duration`.
+#
+# 2026-10-18 (v1.4.0):
+# - FEATURE: O caminho de escrita do `RecStore` passou a ser um log só de acréscimo por utilizador
+#   (`rec.log.ndjson`); `compact`, `compact_due` e `compact_all` materializam o rec.json com todos os
+#   registros pendentes numa única reescrita, sem duplicar registros após uma compactação interrompida.
+#
+# 2026-10-18 (v1.3.0):
+# - FEATURE: `RecStore` serializa as escritas de cada utilizador com um lock próprio e agrupa os
+#   registros pendentes numa única reescrita do rec.json.
+# - CORREÇÃO: O rec.json é escrito num ficheiro temporário e substituído com `os.replace`
+#   (`write_json_atomic`); uma falha a meio já não deixa JSON truncado.
+# - REFACTOR: A construção do registro passou para `_build_video_record`; `create_or_update_rec_json`
+#   mantém a assinatura e retorna se o registro foi gravado.
+#
 # 2025-07-14 (v1.2.0):
 # - CORREÇÃO: Removida a importação `from utils.logger import log`.
 # - REFACTOR: Adotado o padrão `import logging; logger = logging.getLogger(__name__)` para
@@ -172,5 +845,4 @@ def create_or_update_rec_json(username: str, video_id: str, upload_url: str, pos
 
 # @roadmap futuro:
 # - Adicionar uma função de "limpeza" que possa remover registros antigos ou inválidos do rec.json.
-# - Implementar um mecanismo de backup (ex: `rec.json.bak`) antes de salvar para evitar corrupção de dados.
-# - Criar uma classe `RecManager` se a necessidade de mais funções de gerenciamento (deletar, buscar) surgir.
+# - Acrescentar ao `RecStore` funções de gerenciamento (deletar, buscar).
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         recording_session.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.3.1
+# @lastupdate:     2026-10-18
+# @description:    Sessão de gravação com reconexão automática. Uma falha passageira da CDN deixava
+#                  de terminar a gravação: enquanto houver tempo até à duração máxima, a sessão volta a
+#                  resolver a URL do stream e reconecta com espera exponencial (backoff). As partes
+#                  gravadas em cada ligação são unidas sem recodificação num único MP4, para que uma
+#                  pequena quebra não transforme uma gravação longa em vários ficheiros descartáveis.
+# @modes:          - Reconexão com Backoff Exponencial e Nova Resolução da URL.
+#                  - União das Partes da Sessão Sem Perdas.
+#                  - Recuperação das Partes de uma Sessão Interrompida.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import glob         # Para encontrar as partes de uma sessão interrompida.
+import logging      # Para registar eventos importantes de forma padronizada.
+import os           # Para caminhos e limpeza das partes intermédias.
+import re           # Para o número de cada parte (`<base>.partN.mp4`).
+import threading    # Lock do conjunto de sessões com paragem pedida.
+import time         # Relógio monotónico para o prazo da sessão e para o backoff.
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import config
+from utils.ffmpeg_recorder import get_recorder_engine, record_stream_and_capture_thumbnail
+from utils.segments import concat_segments
+from utils.video_utils import probe_media
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Recebe `refresh` (False na primeira ligação, True nas reconexões) e devolve a URL do stream.
+StreamUrlResolver = Callable[[bool], Optional[str]]
+
+# Utilizadores cuja sessão deve terminar sem reconectar (ex: preempção pela política de admissão).
+_stop_requested: Set[str] = set()
+_stop_lock = threading.Lock()
+
+# Partes gravadas em cada ligação da sessão: `<base>.partN.mp4`.
+_PART_PATTERN = re.compile(r"\.part(\d+)\.mp4$")
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+def _part_is_usable(path: str) -> bool:
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+def _remove_quietly(path: str):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def _part_paths(output_path: str) -> List[str]:
+    """As partes de `output_path` ainda no disco, pela ordem de gravação."""
+    base = os.path.splitext(output_path)[0]
+    parts = [path for path in glob.glob(f"{glob.escape(base)}.part*.mp4") if _PART_PATTERN.search(path)]
+    return sorted(parts, key=lambda path: int(_PART_PATTERN.search(path).group(1)))
+
+def session_output_for(part_path: str) -> Optional[str]:
+    """O MP4 final da sessão a que uma parte pertence, ou None se `part_path` não for uma parte."""
+    match = _PART_PATTERN.search(part_path)
+    return f"{part_path[:match.start()]}.mp4" if match else None
+
+def _separate_paths(output_path: str) -> List[str]:
+    """As partes de `output_path` que seguem como gravações próprias (`<base>-N.mp4`), pela ordem de gravação."""
+    base = os.path.splitext(output_path)[0]
+    pattern = re.compile(re.escape(base) + r"-(\d+)\.mp4$")
+    paths = [path for path in glob.glob(f"{glob.escape(base)}-*.mp4") if pattern.search(path)]
+    return sorted(paths, key=lambda path: int(pattern.search(path).group(1)))
+
+def _join_parts(parts: List[str], output_path: str) -> List[str]:
+    """
+    Une as partes em `output_path`. Se a união falhar (ex: o stream mudou de resolução após uma
+    reconexão), a primeira parte segue como `output_path` e cada uma das restantes passa a uma
+    gravação própria, `<base>-N.mp4`, em vez de ficar esquecida no disco.
+
+    Returns:
+        List[str]: As gravações separadas (vazia se as partes foram unidas).
+    """
+    if len(parts) == 1:
+        os.replace(parts[0], output_path)
+        return []
+    if concat_segments(parts, output_path):
+        # Pela ordem das partes: se a limpeza for interrompida, a `.part1.mp4` já não existe e a
+        # recuperação sabe que `output_path` está completo.
+        for part_path in parts:
+            _remove_quietly(part_path)
+        return []
+
+    _remove_quietly(output_path)
+    base = os.path.splitext(output_path)[0]
+    separate = []
+    # As restantes partes mudam de nome antes da primeira: a recuperação nunca encontra `output_path`
+    # ao lado de partes que não foram unidas.
+    for part_path in parts[1:]:
+        separate_path = f"{base}-{_PART_PATTERN.search(part_path).group(1)}.mp4"
+        os.replace(part_path, separate_path)
+        separate.append(separate_path)
+    os.replace(parts[0], output_path)
+    return separate
+
+def recover_session_parts(output_path: str, on_separate: Optional[Callable[[str], None]] = None) -> bool:
+    """
+    Une em `output_path` as partes deixadas por uma sessão interrompida (ex: VM reciclada a meio de
+    uma gravação). As partes ilegíveis, como a que estava a ser escrita num MP4 sem o átomo `moov`,
+    são ignoradas e apagadas. Se `output_path` já existir e a primeira parte não (a sessão terminou
+    a união antes da interrupção), as partes que sobraram já estão unidas e são apagadas.
+
+    Args:
+        output_path (str): O MP4 final da sessão (o caminho registado no diário).
+        on_separate (Optional[Callable[[str], None]], optional): Chamado com cada gravação separada da
+            sessão (partes que não foi possível unir; ver `_join_parts`).
+
+    Returns:
+        bool: True se `output_path` existe no fim.
+    """
+    parts = _part_paths(output_path)
+    for part_path in parts:
+        _remove_quietly(f"{part_path}.jpg")
+    first_part = f"{os.path.splitext(output_path)[0]}.part1.mp4"
+    if os.path.exists(output_path) and first_part not in parts:
+        for part_path in parts:
+            _remove_quietly(part_path)
+        parts = []
+    # Com a primeira parte ainda no disco, um `output_path` existente é uma união interrompida: é refeita.
+
+    usable = [path for path in parts if _part_is_usable(path) and probe_media(path)]
+    for part_path in parts:
+        if part_path not in usable:
+            logger.warning(f"⚠️ Parte ilegível descartada na recuperação: '{os.path.basename(part_path)}'.")
+            _remove_quietly(part_path)
+    if usable:
+        logger.info(f"♻️ A recuperar {len(usable)} partes da sessão '{os.path.basename(output_path)}'...")
+        _join_parts(usable, output_path)
+    if on_separate is not None:
+        for separate_path in _separate_paths(output_path):
+            on_separate(separate_path)
+    return os.path.exists(output_path)
+
+def stop_session(username: str) -> bool:
+    """
+    Termina a sessão de um utilizador: o FFmpeg em curso é parado graciosamente, a parte gravada
+    é mantida e a sessão não volta a reconectar.
+
+    Returns:
+        bool: True se havia uma gravação ativa para o utilizador.
+    """
+    with _stop_lock:
+        _stop_requested.add(username)
+    return get_recorder_engine().stop(username)
+
+def _stop_pending(username: str) -> bool:
+    with _stop_lock:
+        return username in _stop_requested
+
+def record_session(
+    username: str,
+    resolve_stream_url: StreamUrlResolver,
+    output_path: str,
+    thumbnail_path: str,
+    max_duration: int,
+    settings: Optional[Dict[str, Any]] = None,
+    on_separate: Optional[Callable[[str], None]] = None,
+    is_online: Optional[Callable[[str], bool]] = None,
+    **record_kwargs: Any
+) -> bool:
+    """
+    Grava um utilizador até `max_duration`, reconectando após quebras e unindo as partes no fim.
+
+    Cada ligação grava uma parte (`<base>.partN.mp4`) com o tempo que ainda resta. Se a parte
+    terminar antes do prazo (erro do FFmpeg ou fim do HLS), a URL é resolvida de novo e a sessão
+    reconecta após `BACKOFF_SECONDS` (dobrando a cada falha seguida, até `BACKOFF_MAX_SECONDS`).
+    A sessão termina quando o prazo é atingido, quando restam menos de `MIN_REMAINING_SECONDS`,
+    após `MAX_ATTEMPTS` reconexões seguidas sem gravar nada ou quando a transmissão terminou: após
+    uma saída sem erro, o utilizador já não está online (`is_online`) ou a reconexão imediata falha.
+
+    Args:
+        username (str): O utilizador a gravar.
+        resolve_stream_url (StreamUrlResolver): Resolve a URL do stream (ver `StreamUrlResolver`).
+        output_path (str): O MP4 final da sessão.
+        thumbnail_path (str): O poster, capturado da primeira parte.
+        max_duration (int): A duração máxima da sessão inteira, em segundos.
+        settings (Optional[Dict[str, Any]]): Substitui `config.RECONNECT_SETTINGS`.
+        on_separate (Optional[Callable[[str], None]]): Chamado com cada parte que não foi possível unir
+            e que segue como gravação própria (ver `_join_parts`).
+        is_online (Optional[Callable[[str], bool]]): Indica se o utilizador ainda está na listagem online.
+        **record_kwargs: Argumentos extra para `record_stream_and_capture_thumbnail`.
+
+    Returns:
+        bool: True se `output_path` foi criado com pelo menos uma parte.
+    """
+    settings = settings or config.RECONNECT_SETTINGS
+    deadline = time.monotonic() + max_duration
+    base = os.path.splitext(output_path)[0]
+    parts: List[str] = []
+    attempts = 0
+    failures = 0
+    ended_cleanly = False
+    backoff = settings["BACKOFF_SECONDS"]
+
+    with _stop_lock:
+        _stop_requested.discard(username)
+
+    while True:
+        remaining = int(deadline - time.monotonic())
+        if parts and remaining < settings["MIN_REMAINING_SECONDS"]:
+            break
+        if _stop_pending(username):
+            logger.info(f"⏹️ Sessão de '{username}' terminada a pedido. Sem reconexão.")
+            break
+
+        stream_url = resolve_stream_url(attempts > 0)
+        attempts += 1
+        part_ok = False
+        if stream_url:
+            part_path = f"{base}.part{attempts}.mp4"
+            # Só a primeira parte gera o poster; as seguintes usam um poster descartável.
+            part_thumbnail = thumbnail_path if not parts else f"{part_path}.jpg"
+            recorded = record_stream_and_capture_thumbnail(
+                username=username,
+                stream_url=stream_url,
+                output_path=part_path,
+                thumbnail_path=part_thumbnail,
+                max_duration=max(remaining, 1),
+                **record_kwargs
+            )
+            if part_thumbnail != thumbnail_path:
+                _remove_quietly(part_thumbnail)
+            part_ok = recorded and _part_is_usable(part_path)
+            if part_ok:
+                parts.append(part_path)
+            else:
+                _remove_quietly(part_path)
+
+        if part_ok:
+            failures = 0
+            backoff = settings["BACKOFF_SECONDS"]
+            # Saída sem erro antes do prazo: fim do HLS, por quebra da CDN ou porque o emissor terminou.
+            if is_online is not None and not is_online(username):
+                logger.info(f"🏁 '{username}' já não está online. Sessão concluída sem reconexão.")
+                break
+            ended_cleanly = True
+            continue
+
+        if ended_cleanly:
+            # A reconexão logo após uma saída sem erro falhou: a transmissão terminou. Sem esperas
+            # de backoff contra um utilizador offline, a gravação segue já para o pós-processamento.
+            logger.info(f"🏁 Transmissão de '{username}' terminada. Sessão concluída com {len(parts)} partes.")
+            break
+
+        failures += 1
+        if failures > settings["MAX_ATTEMPTS"] or time.monotonic() + backoff >= deadline or _stop_pending(username):
+            break
+        logger.warning(
+            f"🔌 Ligação de '{username}' perdida. Reconexão {failures}/{settings['MAX_ATTEMPTS']} "
+            f"em {backoff}s..."
+        )
+        time.sleep(backoff)
+        backoff = min(backoff * 2, settings["BACKOFF_MAX_SECONDS"])
+
+    with _stop_lock:
+        _stop_requested.discard(username)
+
+    if not parts:
+        return False
+    if len(parts) > 1:
+        logger.info(f"🧵 A unir {len(parts)} partes da sessão de '{username}' após {len(parts) - 1} reconexões.")
+    separate = _join_parts(parts, output_path)
+    if separate:
+        logger.error(
+            f"❌ Não foi possível unir as partes de '{username}'. "
+            f"As {len(separate)} partes seguintes seguem como gravações próprias."
+        )
+    if on_separate is not None:
+        for separate_path in separate:
+            on_separate(separate_path)
+    return True
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.3.1):
+# - CORREÇÃO: Após uma saída do FFmpeg sem erro, a sessão só reconecta se o utilizador continuar
+#   online (`is_online`), e termina logo se essa reconexão falhar, em vez de passar por todas as
+#   esperas de backoff contra um utilizador que terminou a transmissão.
+#
+# 2026-10-18 (v1.3.0):
+# - CORREÇÃO: Se as partes não puderem ser unidas, as que seguem a primeira passam a gravações
+#   próprias (`<base>-N.mp4`, entregues por `on_separate`) em vez de ficarem esquecidas no disco e
+#   de serem apagadas pela recuperação; uma união interrompida é refeita na recuperação.
+#
+# 2026-10-18 (v1.2.0):
+# - FEATURE: `recover_session_parts` une as partes `<base>.partN.mp4` de uma sessão interrompida no
+#   MP4 registado no diário (usado na recuperação dos trabalhos no arranque).
+#
+# 2026-10-18 (v1.1.0):
+# - FEATURE: `stop_session` termina uma sessão sem reconexão (usado pela preempção da política de admissão).
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `recording_session.py` com `record_session` (reconexão e união das partes).
+
+# @roadmap futuro:
+# - Manter a parte gravada quando o FFmpeg termina com erro após já ter escrito vídeo.
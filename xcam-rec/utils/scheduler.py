@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         scheduler.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.2.0
+# @lastupdate:     2026-10-18
+# @description:    Agendador persistente de gravações. Substitui o `ThreadPoolExecutor` que era
+#                  recriado a cada verificação no `main.main()` (e que bloqueava o loop até a
+#                  última gravação terminar) por um pool de trabalhadores de longa duração,
+#                  alimentado por uma fila limitada. O loop principal continua a consultar a API
+#                  enquanto as gravações decorrem e novos utilizadores são despachados de imediato.
+# @modes:          - Pool de Trabalhadores Persistente com Fila Limitada.
+#                  - Despacho de Gravações sem Duplicados por Utilizador.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import itertools    # Contador que mantém a ordem de chegada entre tarefas com a mesma prioridade.
+import logging      # Para registar eventos importantes de forma padronizada.
+import queue        # Fila thread-safe que liga o despacho aos trabalhadores.
+import threading    # Para os trabalhadores de longa duração e para os locks de estado.
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Sentinela enviada para a fila para pedir a um trabalhador que termine.
+_STOP = object()
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class WorkerPool:
+    """
+    Pool de trabalhadores persistente com uma fila de tarefas opcionalmente limitada.
+
+    Ao contrário do `ThreadPoolExecutor` usado num bloco `with`, este pool vive durante toda
+    a execução, não bloqueia quem submete (a menos que se peça) e expõe em `stats()` a
+    profundidade da fila e a saturação dos trabalhadores. A fila é de prioridade: as tarefas com
+    menor valor de `priority` saem primeiro e, com a mesma prioridade, pela ordem de chegada.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0):
+        """
+        Args:
+            name (str): Nome do pool, usado nos logs e nas estatísticas.
+            max_workers (int): Número de trabalhadores (threads) do pool.
+            max_queue (int, optional): Capacidade máxima da fila. 0 significa ilimitada.
+        """
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        # Limita as tarefas em curso (a executar + à espera). Sem limite quando `max_queue` é 0.
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue) if self.max_queue else None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def start(self):
+        """Inicia os trabalhadores do pool (chamadas repetidas são ignoradas)."""
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.max_workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{index + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"🧵 Pool '{self.name}' iniciado com {self.max_workers} trabalhadores.")
+
+    def submit(self, fn: Callable[..., Any], *args: Any, block: bool = False, timeout: float = None, priority: float = 0) -> bool:
+        """
+        Coloca uma tarefa na fila do pool.
+
+        Args:
+            fn (Callable): A função a executar num dos trabalhadores.
+            *args: Argumentos posicionais para a função.
+            block (bool, optional): Se True, espera por espaço na fila quando esta está cheia.
+            timeout (float, optional): Tempo máximo de espera quando `block` é True.
+            priority (float, optional): Prioridade da tarefa (menor sai primeiro).
+
+        Returns:
+            bool: True se a tarefa foi aceite, False se a fila estava cheia.
+        """
+        if self._slots is not None and not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            with self._lock:
+                self._rejected += 1
+            return False
+        self._queue.put((priority, next(self._sequence), fn, args))
+        return True
+
+    def _run(self):
+        """Loop de cada trabalhador: retira tarefas da fila e executa-as até receber `_STOP`."""
+        while True:
+            _, _, fn, args = self._queue.get()
+            if fn is _STOP:
+                self._queue.task_done()
+                break
+            with self._lock:
+                self._active += 1
+            try:
+                fn(*args)
+                with self._lock:
+                    self._completed += 1
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.error(f"❌ Tarefa falhou no pool '{self.name}': {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                if self._slots is not None:
+                    self._slots.release()
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna um retrato instantâneo do estado do pool.
+
+        Returns:
+            Dict[str, Any]: Trabalhadores, ativos, fila, capacidade, saturação e contadores.
+        """
+        with self._lock:
+            active = self._active
+            return {
+                "name": self.name,
+                "workers": self.max_workers,
+                "active": active,
+                "queued": self._queue.qsize(),
+                "capacity": self.max_queue,
+                "saturation": active / self.max_workers,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Pede aos trabalhadores que terminem depois de esvaziarem a fila.
+
+        Args:
+            wait (bool, optional): Se True, espera que todas as threads terminem.
+        """
+        for _ in self._threads:
+            # Prioridade infinita: os trabalhadores só param depois de esvaziarem a fila.
+            self._queue.put((float("inf"), next(self._sequence), _STOP, ()))
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        logger.info(f"🛑 Pool '{self.name}' encerrado.")
+
+
+class RecordingScheduler:
+    """
+    Agendador de gravações de longa duração.
+
+    Mantém o conjunto de utilizadores em gravação (ou à espera na fila) e despacha cada
+    transmissão nova para um `WorkerPool` sem bloquear o loop de verificação da API.
+    """
+
+    def __init__(
+        self,
+        worker_fn: Callable[[Dict[str, Any]], Any],
+        max_workers: int,
+        max_queue: int = 0,
+        on_release: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Args:
+            worker_fn (Callable): Função executada para cada transmissão (recebe o dicionário da API).
+            max_workers (int): Número máximo de gravações em simultâneo.
+            max_queue (int, optional): Número máximo de transmissões à espera de um trabalhador.
+            on_release (Optional[Callable[[str], None]]): Chamado com o username quando o trabalho termina.
+        """
+        self._worker_fn = worker_fn
+        self._on_release = on_release
+        self._pool = WorkerPool("gravação", max_workers, max_queue)
+        self._tracked: Set[str] = set()
+        self._running: Dict[str, float] = {}
+        self._scores: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Inicia o pool de trabalhadores."""
+        self._pool.start()
+
+    def is_tracked(self, username: str) -> bool:
+        """Indica se o utilizador já está em gravação ou à espera na fila."""
+        with self._lock:
+            return username in self._tracked
+
+    def dispatch(self, broadcasts: Iterable[Dict[str, Any]], scores: Optional[Dict[str, float]] = None) -> int:
+        """
+        Despacha para a fila todas as transmissões cujos utilizadores ainda não estão a ser tratados.
+
+        Se a fila estiver cheia, o utilizador não fica marcado e será tentado de novo na
+        próxima verificação.
+
+        Args:
+            broadcasts (Iterable[Dict[str, Any]]): Transmissões devolvidas pela API.
+            scores (Optional[Dict[str, float]]): Pontuação de admissão por utilizador. As transmissões
+                                                 com maior pontuação saem primeiro da fila.
+
+        Returns:
+            int: O número de transmissões efetivamente despachadas.
+        """
+        scores = scores or {}
+        dispatched = 0
+        for broadcast in broadcasts:
+            username = broadcast.get("username")
+            if not username:
+                continue
+            with self._lock:
+                if username in self._tracked:
+                    continue
+                self._tracked.add(username)
+                self._scores[username] = scores.get(username, 0.0)
+            if self._pool.submit(self._run_job, broadcast, priority=-self._scores[username]):
+                dispatched += 1
+                logger.info(f"➕ Adicionando {username} à fila de gravação.")
+            else:
+                self._release(username)
+                logger.warning(f"🚦 Fila de gravação cheia. '{username}' será tentado na próxima verificação.")
+        return dispatched
+
+    def _run_job(self, broadcast: Dict[str, Any]):
+        """Executa o trabalho de uma transmissão e liberta o utilizador no fim, aconteça o que acontecer."""
+        username = broadcast.get("username")
+        with self._lock:
+            self._running[username] = self._scores.get(username, 0.0)
+        try:
+            self._worker_fn(broadcast)
+        finally:
+            self._release(broadcast.get("username"))
+            if self._on_release is not None:
+                self._on_release(broadcast.get("username"))
+
+    def _release(self, username: str):
+        with self._lock:
+            self._tracked.discard(username)
+            self._running.pop(username, None)
+            self._scores.pop(username, None)
+
+    def running_scores(self) -> Dict[str, float]:
+        """Retorna a pontuação de admissão de cada gravação em curso (não inclui as que estão na fila)."""
+        with self._lock:
+            return dict(self._running)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas do pool acrescidas do número de utilizadores acompanhados.
+
+        Returns:
+            Dict[str, Any]: Ver `WorkerPool.stats()`, mais a chave `tracked`.
+        """
+        stats = self._pool.stats()
+        with self._lock:
+            stats["tracked"] = len(self._tracked)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """Encerra o pool de trabalhadores."""
+        self._pool.shutdown(wait=wait)
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.2.0):
+# - FEATURE: A fila do `WorkerPool` passa a ser de prioridade (`submit(..., priority=)`), e o
+#   `RecordingScheduler.dispatch` aceita pontuações de admissão: as mais altas são gravadas primeiro.
+# - FEATURE: `RecordingScheduler.running_scores()` expõe a pontuação das gravações em curso (preempção).
+#
+# 2026-10-18 (v1.1.0):
+# - FEATURE: Callback `on_release` no `RecordingScheduler`, chamado quando um utilizador é libertado.
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `scheduler.py` com `WorkerPool` e `RecordingScheduler`.
+
+# @roadmap futuro:
+# - Permitir alterar o número de trabalhadores em tempo de execução.
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         segments.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.0
+# @lastupdate:     2026-10-18
+# @description:    Gravação segmentada. Em vez de um único MP4 (que fica sem o átomo `moov`, e
+#                  portanto ilegível, se o FFmpeg morrer ou a VM do Colab for reciclada), o stream é
+#                  escrito em blocos MPEG-TS de duração fixa pelo muxer `segment` do FFmpeg. No fim
+#                  os blocos são unidos sem recodificação (concat demuxer) num MP4; blocos deixados
+#                  por uma execução interrompida são recuperados no arranque seguinte.
+# @modes:          - Argumentos do Muxer de Segmentos.
+#                  - Observação dos Blocos Fechados Durante a Gravação.
+#                  - União Sem Perdas e Recuperação de Capturas Parciais.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import glob         # Para listar os blocos de cada gravação.
+import logging      # Para registar eventos importantes de forma padronizada.
+import os           # Para caminhos, diretórios e remoção dos blocos já unidos.
+import shutil       # Para remover a pasta de blocos depois da união.
+import subprocess   # Para executar o FFmpeg que une os blocos.
+import threading    # Thread que observa a lista de blocos fechados.
+from typing import Callable, List, Optional
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Sufixo da pasta de blocos de uma gravação (ao lado do MP4 final: "<base>.segments/").
+SEGMENTS_DIR_SUFFIX = ".segments"
+
+# Nome dos blocos e da lista onde o FFmpeg regista cada bloco assim que o fecha.
+SEGMENT_PATTERN = "part_%05d.ts"
+SEGMENT_LIST_NAME = "segments.txt"
+
+# Intervalo, em segundos, entre duas leituras da lista de blocos fechados.
+SEGMENT_POLL_SECONDS = 5.0
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+def segments_dir_for(output_path: str) -> str:
+    """Retorna a pasta de blocos associada ao MP4 final (ex: ".../user_123.mp4" -> ".../user_123.segments")."""
+    return f"{os.path.splitext(output_path)[0]}{SEGMENTS_DIR_SUFFIX}"
+
+def build_segment_output_args(segments_dir: str, segment_seconds: int) -> List[str]:
+    """
+    Argumentos de saída do FFmpeg para escrever o stream em blocos MPEG-TS de duração fixa.
+
+    Args:
+        segments_dir (str): A pasta onde os blocos são escritos.
+        segment_seconds (int): A duração de cada bloco em segundos.
+
+    Returns:
+        List[str]: Os argumentos a colocar no lugar do ficheiro de saída.
+    """
+    return [
+        '-f', 'segment',
+        '-segment_time', str(segment_seconds),
+        '-segment_format', 'mpegts',
+        # Timestamps contínuos entre blocos, para que a união seja um simples `-c copy`.
+        '-reset_timestamps', '0',
+        '-segment_list', os.path.join(segments_dir, SEGMENT_LIST_NAME),
+        '-segment_list_type', 'flat',
+        os.path.join(segments_dir, SEGMENT_PATTERN)
+    ]
+
+def list_segments(segments_dir: str) -> List[str]:
+    """
+    Lista, por ordem, todos os blocos escritos numa pasta, incluindo o último ainda aberto (ou
+    interrompido), que o MPEG-TS permite ler até ao ponto em que foi cortado.
+
+    Returns:
+        List[str]: Os caminhos dos blocos não vazios.
+    """
+    pattern = os.path.join(segments_dir, SEGMENT_PATTERN.replace("%05d", "*"))
+    return [path for path in sorted(glob.glob(pattern)) if os.path.getsize(path) > 0]
+
+def concat_segments(segment_paths: List[str], output_path: str) -> bool:
+    """
+    Une blocos MPEG-TS num MP4 sem recodificação (concat demuxer e `-c copy`).
+
+    Args:
+        segment_paths (List[str]): Os blocos, por ordem.
+        output_path (str): O MP4 final.
+
+    Returns:
+        bool: True se o MP4 foi criado.
+    """
+    if not segment_paths:
+        logger.error(f"❌ Nenhum bloco para unir em '{os.path.basename(output_path)}'.")
+        return False
+
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    command = [
+        'ffmpeg',
+        '-v', 'error',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', list_path,
+        '-c', 'copy',
+        '-bsf:a', 'aac_adtstoasc',
+        '-movflags', '+faststart',
+        '-y',
+        output_path
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True, text=True)
+        logger.info(f"🧩 {len(segment_paths)} blocos unidos em '{os.path.basename(output_path)}'.")
+        return True
+    except FileNotFoundError:
+        logger.critical("❌ Erro Crítico: 'ffmpeg' não encontrado. Não foi possível unir os blocos.")
+        return False
+    except subprocess.CalledProcessError as e:
+        logger.error(f"❌ FFmpeg falhou ao unir os blocos de '{os.path.basename(output_path)}': {e.stderr.strip()}")
+        return False
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+def finalize_segments(segments_dir: str, output_path: str) -> bool:
+    """
+    Une os blocos de uma gravação no MP4 final e, só se a união correr bem, apaga a pasta de blocos.
+    Em caso de falha os blocos ficam no disco e podem ser recuperados mais tarde.
+
+    Returns:
+        bool: True se o MP4 final foi criado.
+    """
+    if not concat_segments(list_segments(segments_dir), output_path):
+        return False
+    shutil.rmtree(segments_dir, ignore_errors=True)
+    return True
+
+def recover_segment_dirs(records_path: str) -> List[str]:
+    """
+    Une as pastas de blocos deixadas por uma execução interrompida (ex: VM reciclada a meio).
+
+    Args:
+        records_path (str): A pasta de gravações temporárias.
+
+    Returns:
+        List[str]: Os MP4 recuperados.
+    """
+    recovered = []
+    for segments_dir in sorted(glob.glob(os.path.join(records_path, f"*{SEGMENTS_DIR_SUFFIX}"))):
+        output_path = f"{segments_dir[:-len(SEGMENTS_DIR_SUFFIX)]}.mp4"
+        logger.info(f"♻️ A recuperar a captura parcial '{os.path.basename(segments_dir)}'...")
+        if finalize_segments(segments_dir, output_path):
+            recovered.append(output_path)
+    return recovered
+
+
+class SegmentWatcher:
+    """
+    Observa a lista de blocos fechados pelo FFmpeg durante a gravação e chama `on_segment` para cada
+    bloco novo, permitindo começar a trabalhar nos primeiros blocos enquanto a transmissão continua.
+    """
+
+    def __init__(self, segments_dir: str, on_segment: Callable[[str, int], None], interval: float = SEGMENT_POLL_SECONDS):
+        """
+        Args:
+            segments_dir (str): A pasta de blocos da gravação.
+            on_segment (Callable[[str, int], None]): Recebe o caminho do bloco fechado e o seu índice.
+            interval (float, optional): Intervalo entre leituras da lista.
+        """
+        self._list_path = os.path.join(segments_dir, SEGMENT_LIST_NAME)
+        self._segments_dir = segments_dir
+        self._on_segment = on_segment
+        self._interval = interval
+        self._seen = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="segment-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self._poll()
+
+    def _poll(self):
+        """Lê a lista de blocos e entrega os que ainda não foram vistos."""
+        try:
+            with open(self._list_path, encoding="utf-8") as f:
+                names = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            return
+        for index in range(self._seen, len(names)):
+            try:
+                self._on_segment(os.path.join(self._segments_dir, names[index]), index)
+            except Exception as e:
+                logger.error(f"❌ Erro ao processar o bloco '{names[index]}': {e}")
+        self._seen = len(names)
+
+    def stop(self):
+        """Para a observação, entregando antes os blocos fechados desde a última leitura."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._poll()
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `segments.py` com a gravação segmentada, a união sem perdas e a
+#   recuperação de capturas parciais.
+
+# @roadmap futuro:
+# - Enviar os blocos já fechados para o upload antes do fim da transmissão.
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         status.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.0
+# @lastupdate:     2026-10-18
+# @description:    Estado ao vivo do motor em JSON, servido em `/status` pelo mesmo servidor HTTP local
+#                  das métricas (utils/metrics.py). Reúne num único retrato as gravações ativas (tempo
+#                  decorrido, bitrate, tamanho escrito e há quanto tempo o FFmpeg não reporta progresso),
+#                  os trabalhos em cada etapa, a ocupação e as filas do pipeline e as falhas recentes,
+#                  para detetar um FFmpeg parado ou uma etapa saturada sem acompanhar o log.
+# @modes:          - Retrato JSON do Estado (gravações, etapas, filas e falhas).
+#                  - Rota `/status` no Servidor HTTP das Métricas.
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import json         # Serialização da resposta.
+import os           # Nome do ficheiro de cada gravação.
+import time         # Instante do retrato e tempo em execução.
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from utils.metrics import EVENTS, MetricsServer
+from utils.pipeline import BroadcastPipeline
+from utils.progress import PROGRESS_TABLE, ProgressTable
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+def is_failure(event: Dict[str, Any]) -> bool:
+    """Eventos que contam como falha no estado ao vivo (erros de qualquer etapa e descartes)."""
+    return event.get("result") == "error" or event.get("outcome") == "error" or event.get("event") == "discarded"
+
+def _round(value: Optional[float], digits: int = 1) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+def build_status(
+    pipeline: BroadcastPipeline,
+    progress_table: ProgressTable = PROGRESS_TABLE,
+    extra: Optional[Dict[str, Callable[[], Any]]] = None,
+    stale_seconds: float = 60,
+    recent_failures: int = 20,
+    started_at: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Monta o retrato do estado do motor.
+
+    Args:
+        pipeline (BroadcastPipeline): O pipeline em execução.
+        progress_table (ProgressTable, optional): O progresso das gravações ativas.
+        extra (Optional[Dict[str, Callable]], optional): Secções adicionais (ex: `{"poller": poller.stats}`).
+        stale_seconds (float, optional): Sem progresso do FFmpeg há mais do que isto, a gravação é `stale`.
+        recent_failures (int, optional): Número máximo de falhas recentes incluídas.
+        started_at (Optional[float], optional): Instante (time.time) do arranque, para o `uptime_seconds`.
+
+    Returns:
+        Dict[str, Any]: `recordings`, `jobs`, `stages`, `recent_failures` e as secções de `extra`.
+    """
+    recordings = []
+    for username, entry in progress_table.snapshot().items():
+        recordings.append({
+            "username": username,
+            "stage": "record",
+            "file": os.path.basename(entry["output_path"] or ""),
+            "elapsed_seconds": _round(entry["elapsed"]),
+            "recorded_seconds": _round(entry["out_time"]),
+            "max_duration": entry["max_duration"],
+            "size_bytes": entry["total_size"],
+            "bitrate_kbps": _round(entry["bitrate"]),
+            "speed": entry["speed"],
+            "drop_frames": entry["drop_frames"],
+            "since_update_seconds": _round(entry["since_update"]),
+            "stale": entry["since_update"] > stale_seconds,
+        })
+    recordings.sort(key=lambda item: item["elapsed_seconds"] or 0, reverse=True)
+
+    # A etapa de gravação já está em `recordings`; aqui ficam os trabalhos das etapas seguintes.
+    jobs = [
+        {
+            "username": job["username"],
+            "stage": job["stage"],
+            "file": os.path.basename(job["video_path"] or ""),
+            "elapsed_seconds": _round(job["elapsed"]),
+        }
+        for job in pipeline.active_jobs.snapshot() if job["stage"] != "record"
+    ]
+    jobs.sort(key=lambda item: item["elapsed_seconds"] or 0, reverse=True)
+
+    status = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "uptime_seconds": _round(time.time() - started_at) if started_at else None,
+        "recordings": recordings,
+        "stale_recordings": sum(1 for item in recordings if item["stale"]),
+        "jobs": jobs,
+        "stages": pipeline.stats(),
+        "recent_failures": EVENTS.recent(is_failure, recent_failures),
+    }
+    for name, source in (extra or {}).items():
+        status[name] = source()
+    return status
+
+def register_status_route(server: MetricsServer, path: str = "/status", **kwargs: Any):
+    """
+    Acrescenta ao servidor das métricas a rota com o estado ao vivo em JSON.
+
+    Args:
+        server (MetricsServer): O servidor HTTP local (ver `metrics.start_metrics`).
+        path (str, optional): O caminho da rota.
+        **kwargs: Argumentos de `build_status` (pipeline, extra, stale_seconds, ...).
+    """
+    def handler():
+        body = json.dumps(build_status(**kwargs), ensure_ascii=False, indent=2, default=str)
+        return "application/json; charset=utf-8", body.encode("utf-8")
+    server.add_route(path, handler)
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `status.py` com `build_status` e a rota `/status`.
+
+# @roadmap futuro:
+# - Uma página HTML simples que atualize a tabela de gravações a partir do `/status`.
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+# ---------------------------------------------------------------------------------------------
+# 1. CABEÇALHO / INÍCIO
+# ---------------------------------------------------------------------------------------------
+
+# @titulo:         storage.py
+# @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
+# @info:           https://aserio.work/
+# @version:        1.0.2
+# @lastupdate:     2026-10-18
+# @description:    Gestão do espaço da pasta temporária das gravações (no Google Drive montado). Antes
+#                  de iniciar uma captura ou uma transcodificação da marca d'água (que duplica o
+#                  ficheiro), projeta a ocupação final a partir do bitrate real das gravações em curso
+#                  e do que resta da sua duração máxima; se a projeção ultrapassar a quota (ou o espaço
+#                  livre mínimo do disco), liberta primeiro os vídeos já enviados (os mais antigos
+#                  primeiro) e, se não chegar, adia a nova captura ou a transcodificação. Assim, o disco
+#                  não enche a meio de uma gravação de duas horas.
+# @modes:          - Projeção da Ocupação pelo Bitrate das Gravações em Curso.
+#                  - Quota e Espaço Livre Mínimo com Adiamento de Capturas e Transcodificações.
+#                  - Remoção dos Vídeos Já Publicados (idade e pressão de espaço).
+
+# ---------------------------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
+# ---------------------------------------------------------------------------------------------
+
+import logging      # Para registar eventos importantes de forma padronizada.
+import os           # Para percorrer a pasta temporária e remover ficheiros.
+import shutil       # Para o espaço livre do disco (`disk_usage`).
+import threading    # Lock das reservas, partilhadas pelos trabalhadores de todas as etapas.
+import time         # Relógio monotónico da cache da ocupação e das esperas.
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.metrics import METRICS, emit_event
+from utils.progress import PROGRESS_TABLE, ProgressTable
+
+# Inicializa um logger específico para este módulo.
+logger = logging.getLogger(__name__)
+
+# Métricas do espaço da pasta temporária (ver utils/metrics.py).
+_USED_BYTES = METRICS.gauge("xcam_storage_used_bytes", "Bytes ocupados na pasta temporária das gravações.")
+_FREE_BYTES = METRICS.gauge("xcam_storage_free_bytes", "Bytes livres no disco da pasta temporária.")
+_PROJECTED_BYTES = METRICS.gauge("xcam_storage_projected_bytes", "Bytes ainda por escrever pelas gravações e transcodificações em curso.")
+_EVICTED_BYTES = METRICS.counter("xcam_storage_evicted_bytes_total", "Bytes de vídeos já enviados removidos da pasta temporária.")
+_DEFERRED = METRICS.counter("xcam_storage_deferred_total", "Capturas e transcodificações adiadas por falta de espaço, por tipo.")
+
+# Fonte dos vídeos que já podem ser removidos (ex: `JobJournal.uploaded_files`).
+EvictableFiles = Callable[[], List[str]]
+
+# ---------------------------------------------------------------------------------------------
+# 3. CORPO
+# ---------------------------------------------------------------------------------------------
+
+class StorageManager:
+    """
+    Quota da pasta temporária, partilhada pelo loop principal (capturas) e pelos trabalhadores de
+    pós-processamento (transcodificações).
+
+    O espaço disponível é o menor entre `QUOTA_BYTES - ocupação - escrita prevista` e
+    `espaço livre - MIN_FREE_BYTES - escrita prevista`, onde a escrita prevista soma, para cada
+    gravação em curso, `bitrate * (duração máxima - tempo já gravado)`, e as reservas das
+    transcodificações em curso.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        settings: Dict[str, Any],
+        evictable: Optional[EvictableFiles] = None,
+        progress_table: ProgressTable = PROGRESS_TABLE
+    ):
+        """
+        Args:
+            root (str): A pasta temporária das gravações.
+            settings (Dict[str, Any]): `config.STORAGE_SETTINGS`.
+            evictable (Optional[EvictableFiles], optional): Vídeos que já podem ser removidos.
+            progress_table (ProgressTable, optional): O progresso (e o bitrate) das gravações em curso.
+        """
+        self.root = root
+        self.settings = settings
+        self.evictable = evictable
+        self.progress_table = progress_table
+        self._lock = threading.Lock()
+        self._reservations: Dict[str, int] = {}
+        self._usage_cache: Optional[tuple] = None
+        self._evicted = 0
+
+    # --- Medição ---
+
+    def usage(self, refresh: bool = False) -> int:
+        """Bytes ocupados na pasta temporária (guardado em cache durante `SCAN_CACHE_SECONDS`)."""
+        now = time.monotonic()
+        cached = self._usage_cache
+        if not refresh and cached and now - cached[0] < self.settings["SCAN_CACHE_SECONDS"]:
+            return cached[1]
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass # Removido entretanto (ex: renomeação ou limpeza concorrente).
+        self._usage_cache = (now, total)
+        return total
+
+    def free(self) -> int:
+        """Bytes livres no disco da pasta temporária."""
+        try:
+            return shutil.disk_usage(self.root).free
+        except OSError:
+            return 0
+
+    def live_bitrate_kbps(self) -> float:
+        """A mediana do bitrate das gravações em curso, ou `DEFAULT_BITRATE_KBPS` sem medições."""
+        rates = sorted(entry["bitrate"] for entry in self.progress_table.snapshot().values() if entry["bitrate"])
+        return rates[len(rates) // 2] if rates else self.settings["DEFAULT_BITRATE_KBPS"]
+
+    def capture_estimate(self, max_duration: int) -> int:
+        """Bytes previstos para uma nova captura de `max_duration` segundos, ao bitrate atual."""
+        return int(self.live_bitrate_kbps() * 1000 / 8 * max_duration)
+
+    def pending_writes(self) -> int:
+        """Bytes ainda por escrever pelas gravações em curso (até à duração máxima) e pelas reservas."""
+        default_kbps = self.live_bitrate_kbps()
+        total = 0
+        for entry in self.progress_table.snapshot().values():
+            remaining = max(entry["max_duration"] - (entry["out_time"] or 0), 0)
+            total += int((entry["bitrate"] or default_kbps) * 1000 / 8 * remaining)
+        with self._lock:
+            total += sum(self._reservations.values())
+        return total
+
+    def room(self, extra_pending: int = 0) -> int:
+        """
+        Bytes que ainda podem ser comprometidos sem ultrapassar a quota nem o espaço livre mínimo.
+
+        Args:
+            extra_pending (int, optional): Escrita prevista adicional (ex: capturas despachadas que
+                                           ainda não reportaram progresso).
+        """
+        pending = self.pending_writes() + extra_pending
+        room = self.free() - self.settings["MIN_FREE_BYTES"] - pending
+        if self.settings["QUOTA_BYTES"]:
+            room = min(room, self.settings["QUOTA_BYTES"] - self.usage() - pending)
+        return room
+
+    # --- Remoção ---
+
+    def _candidates(self) -> List[str]:
+        """Vídeos já enviados ainda no disco, do mais antigo para o mais recente."""
+        if self.evictable is None:
+            return []
+        files = []
+        for path in self.evictable():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        return [path for _, path in sorted(files)]
+
+    @staticmethod
+    def _size_of(path: str) -> int:
+        """O tamanho de `path`, ou 0 se já tiver sido removido (ex: por outro trabalhador)."""
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path: str, reason: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível remover '{os.path.basename(path)}': {e}")
+            return 0
+        with self._lock:
+            self._evicted += size
+        _EVICTED_BYTES.inc(size)
+        emit_event("evicted", file=os.path.basename(path), bytes=size, reason=reason)
+        logger.info(f"🧹 Vídeo já enviado removido da pasta temporária ({reason}): '{os.path.basename(path)}' ({size / 1048576:.0f} MiB).")
+        return size
+
+    def evict_expired(self) -> int:
+        """
+        Remove os vídeos já enviados com mais de `EVICT_AFTER_SECONDS` (política de idade).
+
+        Returns:
+            int: Os bytes libertados.
+        """
+        max_age = self.settings["EVICT_AFTER_SECONDS"]
+        if not max_age:
+            return 0
+        limit = time.time() - max_age
+        freed = 0
+        for path in self._candidates():
+            try:
+                if os.path.getmtime(path) > limit:
+                    break # Os restantes são mais recentes.
+            except OSError:
+                continue
+            freed += self._remove(path, "idade")
+        if freed:
+            self.usage(refresh=True)
+        return freed
+
+    def ensure_room(self, needed: int, extra_pending: int = 0) -> bool:
+        """
+        Garante `needed` bytes de espaço, removendo vídeos já enviados (os mais antigos primeiro).
+
+        Returns:
+            bool: True se, no fim, há espaço suficiente.
+        """
+        room = self.room(extra_pending)
+        if room >= needed:
+            return True
+        candidates = self._candidates()
+        # Cada byte removido aumenta o espaço disponível em um byte (na quota e no disco): se nem
+        # removendo todos chega, nada é removido.
+        if room + sum(self._size_of(path) for path in candidates) < needed:
+            return False
+        for path in candidates:
+            self._remove(path, "quota")
+            self.usage(refresh=True)
+            if self.room(extra_pending) >= needed:
+                return True
+        return False
+
+    # --- Admissão ---
+
+    def capture_budget(self, max_duration: int, in_flight: int = 0) -> int:
+        """
+        Quantas novas capturas cabem no espaço disponível.
+
+        Args:
+            max_duration (int): A duração máxima de cada captura, em segundos.
+            in_flight (int, optional): Capturas já despachadas que ainda não reportaram progresso.
+
+        Returns:
+            int: O número de capturas que podem começar agora (0 adia todas).
+        """
+        estimate = max(self.capture_estimate(max_duration), 1)
+        extra = in_flight * estimate
+        room = self.room(extra)
+        if room < estimate and self.ensure_room(estimate, extra):
+            room = self.room(extra)
+        return max(room // estimate, 0)
+
+    def note_deferred(self, kind: str, count: int = 1):
+        """Conta capturas ou transcodificações adiadas por falta de espaço."""
+        _DEFERRED.inc(count, kind=kind)
+        emit_event("storage_deferred", kind=kind, count=count)
+
+    def reserve(self, key: str, size: int) -> bool:
+        """Reserva `size` bytes (ex: a cópia de uma transcodificação), removendo vídeos se necessário."""
+        if not self.ensure_room(size):
+            return False
+        with self._lock:
+            self._reservations[key] = size
+        return True
+
+    def release(self, key: str):
+        with self._lock:
+            self._reservations.pop(key, None)
+        self.usage(refresh=True)
+
+    @contextmanager
+    def reservation(self, key: str, size: int, timeout: float) -> Iterator[bool]:
+        """
+        Espera até `timeout` segundos por espaço para `size` bytes e reserva-o durante o bloco.
+
+        Yields:
+            bool: True se o espaço foi reservado; False se o prazo terminou sem espaço.
+        """
+        deadline = time.monotonic() + timeout
+        reserved = self.reserve(key, size)
+        if not reserved:
+            self.note_deferred("transcode")
+            logger.warning(f"💽 Sem espaço para a transcodificação de '{os.path.basename(key)}' ({size / 1048576:.0f} MiB). A aguardar...")
+        while not reserved and time.monotonic() < deadline:
+            time.sleep(self.settings["RETRY_SECONDS"])
+            reserved = self.reserve(key, size)
+        try:
+            yield reserved
+        finally:
+            if reserved:
+                self.release(key)
+
+    # --- Pressão durante as gravações ---
+
+    def shortfall(self) -> int:
+        """
+        Bytes em falta no disco agora (espaço livre abaixo de `MIN_FREE_BYTES` depois de remover os
+        vídeos já enviados). Acima de 0, as gravações em curso arriscam um disco cheio.
+        """
+        floor = self.settings["MIN_FREE_BYTES"]
+        if self.free() >= floor:
+            return 0
+        for path in self._candidates():
+            self._remove(path, "disco cheio")
+            if self.free() >= floor:
+                return 0
+        return max(floor - self.free(), 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Ocupação, espaço livre, escrita prevista, quota, bitrate atual e bytes removidos.
+        """
+        used, free, pending = self.usage(), self.free(), self.pending_writes()
+        _USED_BYTES.set(used)
+        _FREE_BYTES.set(free)
+        _PROJECTED_BYTES.set(pending)
+        with self._lock:
+            evicted = self._evicted
+            reservations = len(self._reservations)
+        return {
+            "used_bytes": used,
+            "free_bytes": free,
+            "pending_bytes": pending,
+            "quota_bytes": self.settings["QUOTA_BYTES"],
+            "live_bitrate_kbps": self.live_bitrate_kbps(),
+            "reservations": reservations,
+            "evicted_bytes": evicted,
+        }
+
+# ---------------------------------------------------------------------------------------------
+# 4. RODAPÉ / FIM DO CÓDIGO
+# ---------------------------------------------------------------------------------------------
+
+# @log de mudanças:
+# 2026-10-18 (v1.0.2):
+# - CORREÇÃO: `ensure_room` lê o tamanho dos candidatos com `_size_of`: um vídeo removido ao mesmo tempo
+#   por outro trabalhador deixou de lançar `OSError` para `capture_budget` e `reserve`.
+#
+# 2026-10-18 (v1.0.1):
+# - REFACTOR: Os vídeos removíveis vêm de `JobJournal.uploaded_files` (antes `finished_files`).
+#
+# 2026-10-18 (v1.0.0):
+# - Criação inicial do módulo `storage.py` com `StorageManager` (projeção, quota, adiamentos e remoção).
+
+# @roadmap futuro:
+# - Estimar a duração provável de cada captura a partir do histórico do utilizador, em vez da máxima.
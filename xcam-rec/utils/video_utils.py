@@ -7,10 +7,10 @@
 # @titulo:         video_utils.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.2.0
-# @lastupdate:     2025-07-14
+# @version:        1.4.0
+# @lastupdate:     2026-10-18
 # @description:    Módulo utilitário para operações de pós-processamento de vídeo.
-#                  Contém funções para extrair metadados de ficheiros de vídeo (como a duração)
+#                  Contém funções para extrair metadados de ficheiros de vídeo (`MediaInfo`)
 #                  e para gerir os ficheiros gravados com base nas regras de negócio
 #                  definidas nas configurações (ex: duração mínima).
 # @modes:          - Extração de Metadados de Vídeo.
@@ -24,24 +24,54 @@ import subprocess  # Necessário para executar comandos externos como o ffprobe.
 import json        # Para analisar a saída JSON do ffprobe.
 import logging     # Para registar o progresso e os erros de forma consistente.
 import os          # Usado para verificar a existência e remover ficheiros.
+import threading   # Lock da cache de sondagens partilhada entre trabalhadores.
+from collections import OrderedDict # Cache LRU das sondagens do ffprobe.
+from concurrent.futures import ThreadPoolExecutor # Sondagens concorrentes em lote.
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Optional
 
 # Inicializa um logger específico para este módulo, permitindo um controlo granular dos logs.
 logger = logging.getLogger(__name__)
 
+# Número máximo de resultados do ffprobe mantidos em cache (os mais antigos são descartados).
+PROBE_CACHE_SIZE = 256
+
+# Número padrão de ffprobe em simultâneo em `probe_media_batch`.
+PROBE_BATCH_WORKERS = 8
+
+# Cache partilhada pelo processo: (caminho, tamanho, mtime) -> saída JSON do ffprobe.
+# Se o ficheiro mudar (tamanho ou mtime), a chave muda e o ficheiro é sondado de novo.
+_probe_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_probe_cache_lock = threading.Lock()
+
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
 # ---------------------------------------------------------------------------------------------
 
-def get_video_duration(file_path):
+def _probe(file_path: str) -> Optional[Dict[str, Any]]:
     """
-    Obtém a duração de um ficheiro de vídeo em segundos usando o ffprobe.
+    Executa o ffprobe (formato e streams, em JSON) e guarda o resultado na cache partilhada,
+    indexada pelo caminho, tamanho e mtime do ficheiro.
 
     Args:
-        file_path (str): O caminho completo para o ficheiro de vídeo (ex: ".../video.mp4").
+        file_path (str): O caminho completo para o ficheiro de vídeo.
 
     Returns:
-        float: A duração do vídeo em segundos. Retorna 0.0 se ocorrer um erro.
+        Optional[Dict[str, Any]]: A saída do ffprobe já analisada, ou None em caso de erro.
     """
+    try:
+        stat = os.stat(file_path)
+    except OSError as e:
+        logger.error(f"❌ Não foi possível aceder ao ficheiro '{file_path}': {e}")
+        return None
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+    with _probe_cache_lock:
+        cached = _probe_cache.get(key)
+        if cached is not None:
+            _probe_cache.move_to_end(key)
+            return cached
+
     # Constrói o comando ffprobe para obter os metadados do vídeo em formato JSON.
     command = [
         "ffprobe",
@@ -56,27 +86,152 @@ def get_video_duration(file_path):
         # Executa o comando ffprobe e captura a sua saída.
         result = subprocess.run(command, capture_output=True, text=True, check=True)
         video_info = json.loads(result.stdout)
-
-        # Extrai a duração do campo 'format'.
-        if 'format' in video_info and 'duration' in video_info['format']:
-            duration = float(video_info['format']['duration'])
-            logger.debug(f"🔍 Duração verificada para '{file_path}': {duration:.2f} segundos.")
-            return duration
-        else:
-            logger.warning(f"⚠️ Não foi possível encontrar a informação de duração na saída do ffprobe para '{file_path}'.")
-            return 0.0
-
     except FileNotFoundError:
         logger.error("❌ Erro Crítico: O comando 'ffprobe' não foi encontrado. Verifique se o FFmpeg está instalado e no PATH do sistema.")
-        return 0.0
+        return None
     except subprocess.CalledProcessError as e:
         logger.error(f"❌ Erro ao executar o ffprobe para o ficheiro '{file_path}': {e.stderr}")
-        return 0.0
-    except (json.JSONDecodeError, KeyError, ValueError) as e:
+        return None
+    except json.JSONDecodeError as e:
         logger.error(f"❌ Erro ao analisar a saída do ffprobe para '{file_path}': {e}")
+        return None
+
+    with _probe_cache_lock:
+        _probe_cache[key] = video_info
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return video_info
+
+def _to_number(value: Any, cast=float) -> Optional[Any]:
+    """Converte um valor do ffprobe (string, 'N/A' ou ausente) em número, ou None."""
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """
+    Metadados de um ficheiro de mídia obtidos com uma única sondagem do ffprobe.
+
+    É criado uma vez por ficheiro e passado ao longo do pipeline (validação, marca d'água,
+    título e rec.json), em vez de cada etapa lançar o seu próprio ffprobe.
+    """
+    path: str
+    duration: float = 0.0
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    bitrate: Optional[int] = None
+    size: int = 0
+    format_name: Optional[str] = None
+
+    @classmethod
+    def from_probe(cls, file_path: str, video_info: Dict[str, Any]) -> "MediaInfo":
+        """
+        Constrói o `MediaInfo` a partir da saída JSON do ffprobe (`-show_format -show_streams`).
+
+        Args:
+            file_path (str): O caminho do ficheiro sondado.
+            video_info (Dict[str, Any]): A saída do ffprobe já analisada.
+
+        Returns:
+            MediaInfo: Os metadados normalizados (campos ausentes ficam a None/0).
+        """
+        fmt = video_info.get("format", {})
+        streams = video_info.get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), {})
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+        return cls(
+            path=file_path,
+            duration=_to_number(fmt.get("duration")) or 0.0,
+            width=_to_number(video.get("width"), int),
+            height=_to_number(video.get("height"), int),
+            video_codec=video.get("codec_name"),
+            audio_codec=audio.get("codec_name"),
+            bitrate=_to_number(fmt.get("bit_rate"), int),
+            size=_to_number(fmt.get("size"), int) or 0,
+            format_name=fmt.get("format_name"),
+        )
+
+    def moved_to(self, new_path: str) -> "MediaInfo":
+        """Retorna uma cópia com o novo caminho (ex: após renomear o ficheiro), sem nova sondagem."""
+        return replace(self, path=new_path)
+
+
+def probe_media(file_path: str) -> Optional[MediaInfo]:
+    """
+    Sonda um ficheiro de mídia uma única vez (com cache) e retorna os seus metadados.
+
+    Args:
+        file_path (str): O caminho completo para o ficheiro de vídeo.
+
+    Returns:
+        Optional[MediaInfo]: Os metadados do ficheiro, ou None se o ffprobe falhar.
+    """
+    video_info = _probe(file_path)
+    if video_info is None:
+        return None
+    media_info = MediaInfo.from_probe(file_path, video_info)
+    logger.debug(
+        f"🔍 '{os.path.basename(file_path)}': {media_info.duration:.2f}s, {media_info.width}x{media_info.height}, "
+        f"{media_info.video_codec}/{media_info.audio_codec}, {media_info.bitrate} bit/s, {media_info.size} bytes."
+    )
+    return media_info
+
+def probe_media_batch(file_paths: Iterable[str], max_workers: int = PROBE_BATCH_WORKERS) -> Dict[str, Optional[MediaInfo]]:
+    """
+    Sonda vários ficheiros em simultâneo (ex: reprocessamentos e backfills de gravações antigas).
+
+    Args:
+        file_paths (Iterable[str]): Os caminhos a sondar.
+        max_workers (int, optional): Número máximo de ffprobe em simultâneo.
+
+    Returns:
+        Dict[str, Optional[MediaInfo]]: `caminho -> MediaInfo` (None para os que falharam), pela ordem recebida.
+    """
+    file_paths = list(dict.fromkeys(file_paths))
+    if not file_paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_paths))), thread_name_prefix="ffprobe") as executor:
+        return dict(zip(file_paths, executor.map(probe_media, file_paths)))
+
+def get_video_duration(file_path):
+    """
+    Obtém a duração de um ficheiro de vídeo em segundos usando o ffprobe (com cache).
+
+    Args:
+        file_path (str): O caminho completo para o ficheiro de vídeo (ex: ".../video.mp4").
+
+    Returns:
+        float: A duração do vídeo em segundos. Retorna 0.0 se ocorrer um erro.
+    """
+    media_info = probe_media(file_path)
+    if media_info is None:
         return 0.0
+    if not media_info.duration:
+        logger.warning(f"⚠️ Não foi possível encontrar a informação de duração na saída do ffprobe para '{file_path}'.")
+    return media_info.duration
+
+def get_video_width(file_path) -> Optional[int]:
+    """
+    Obtém a largura, em pixels, do primeiro stream de vídeo de um ficheiro (com cache).
 
-def manage_recorded_file(video_path, thumbnail_path, min_duration):
+    Args:
+        file_path (str): O caminho completo para o ficheiro de vídeo.
+
+    Returns:
+        Optional[int]: A largura do vídeo, ou None se não for possível determiná-la.
+    """
+    media_info = probe_media(file_path)
+    if media_info is None or not media_info.width:
+        logger.error(f"❌ Não foi possível obter a largura do vídeo '{file_path}'.")
+        return None
+    return media_info.width
+
+def manage_recorded_file(video_path, thumbnail_path, min_duration, media_info: Optional[MediaInfo] = None):
     """
     Verifica a duração de uma gravação e a descarta se for inferior ao mínimo necessário.
 
@@ -84,13 +239,16 @@ def manage_recorded_file(video_path, thumbnail_path, min_duration):
         video_path (str): O caminho completo para o ficheiro de vídeo (.mp4) gravado.
         thumbnail_path (str): O caminho completo para a miniatura (.jpg) associada.
         min_duration (int): A duração mínima em segundos que a gravação deve ter para ser mantida.
+        media_info (Optional[MediaInfo]): Metadados já sondados do vídeo. Se omitido, o ficheiro é sondado aqui.
 
     Returns:
         bool: Retorna True se o ficheiro foi mantido, e False se foi descartado ou se ocorreu um erro.
     """
     logger.info(f"🔎 A validar o ficheiro gravado: {os.path.basename(video_path)}")
 
-    actual_duration = get_video_duration(video_path)
+    if media_info is None:
+        media_info = probe_media(video_path)
+    actual_duration = media_info.duration if media_info else 0.0
 
     if 0 < actual_duration < min_duration:
         logger.warning(f"🗑️ Gravação para '{os.path.basename(video_path)}' tem apenas {actual_duration:.2f}s (mínimo exigido: {min_duration}s). A descartar ficheiros.")
@@ -122,6 +280,18 @@ def manage_recorded_file(video_path, thumbnail_path, min_duration):
 # ---------------------------------------------------------------------------------------------
 
 # @log de mudanças:
+# 2026-10-18 (v1.4.0):
+# - FEATURE: `MediaInfo` (duração, dimensões, codecs, bitrate, tamanho e formato) obtido com um único
+#   ffprobe por `probe_media`, para ser passado ao longo do pipeline. `probe_media_batch` sonda vários
+#   ficheiros em simultâneo.
+# - REFACTOR: `get_video_duration` e `get_video_width` passam a ser atalhos sobre `probe_media`;
+#   `manage_recorded_file` aceita um `media_info` já sondado.
+#
+# 2026-10-18 (v1.3.0):
+# - FEATURE: Cache de sondagens do ffprobe partilhada pelo processo (`_probe`), indexada por caminho,
+#   tamanho e mtime. `get_video_duration` e `get_video_width` consultam-na antes de lançar o ffprobe.
+# - REFACTOR: `get_video_width` foi movida de `watermark.py` para este módulo.
+#
 # 2025-07-14 (v1.2.0):
 # - FEATURE: Adicionados emojis a todas as saídas de log para melhorar a legibilidade e o apelo visual.
 #
@@ -133,5 +303,4 @@ def manage_recorded_file(video_path, thumbnail_path, min_duration):
 # - Criação inicial do arquivo `video_utils.py`.
 
 # @roadmap futuro:
-# - Adicionar uma função para extrair outros metadados do vídeo, como resolução, codec ou bitrate.
 # - Implementar uma função de verificação de integridade do ficheiro (ex: `ffprobe -v error`).
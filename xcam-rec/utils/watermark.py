@@ -3,30 +3,199 @@
 import subprocess
 import os
 import logging
+import threading
+import hashlib
+import re
+import time
+from contextlib import contextmanager
+
+import config
+from utils.metrics import METRICS, emit_event
+from utils.video_utils import get_video_width
 
 logger = logging.getLogger(__name__)
 
-def get_video_width(video_path):
-    import json
-    import subprocess
+# Métricas da transcodificação da marca d'água (ver utils/metrics.py).
+_WATERMARK_SECONDS = METRICS.histogram("xcam_watermark_seconds", "Duração de cada transcodificação da marca d'água, em segundos.")
+_WATERMARK_FPS = METRICS.histogram(
+    "xcam_watermark_fps", "Quadros por segundo de cada transcodificação da marca d'água.",
+    buckets=(5, 10, 25, 50, 100, 200, 400, 800)
+)
+_WATERMARK_CPU_WAIT = METRICS.histogram("xcam_watermark_cpu_wait_seconds", "Espera por threads livres no orçamento de CPU, em segundos.")
+_WATERMARK_RESULTS = METRICS.counter("xcam_watermark_total", "Transcodificações da marca d'água, por resultado e preset.")
+
+# Última ocorrência de `fps=` na linha de estado do FFmpeg (o valor médio final da transcodificação).
+_FPS_PATTERN = re.compile(r"fps=\s*([\d.]+)")
+
+# Cache de assets da marca d'água partilhada pelo processo: chave -> caminho do PNG pronto a usar.
+_asset_cache = {}
+_asset_locks = {}
+_asset_cache_lock = threading.Lock()
+
+class CpuBudget:
+    # Orçamento de threads de codificação partilhado por todos os trabalhos de transcodificação
+    # do processo. `reserve(n)` espera até haver `n` threads livres (nunca mais do que o total).
+    def __init__(self, total_threads):
+        self.total_threads = max(1, int(total_threads))
+        self._available = self.total_threads
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, threads):
+        threads = min(max(1, threads), self.total_threads)
+        started = time.monotonic()
+        with self._condition:
+            if self._available < threads:
+                logger.info(f"⏳ Orçamento de CPU esgotado ({self._available}/{self.total_threads} threads livres). A aguardar...")
+            self._condition.wait_for(lambda: self._available >= threads)
+            self._available -= threads
+        _WATERMARK_CPU_WAIT.observe(time.monotonic() - started)
+        try:
+            yield threads
+        finally:
+            with self._condition:
+                self._available += threads
+                self._condition.notify_all()
+
+    def available(self):
+        with self._condition:
+            return self._available
+
+_cpu_budget = CpuBudget(config.TRANSCODE_CPU_BUDGET) if config.TRANSCODE_CPU_BUDGET else None
+
+def get_encoder_profile(preset_name=None):
+    # Retorna o perfil de `config.ENCODER_PRESETS` (ou None se o nome for desconhecido).
+    preset_name = preset_name or config.RECORDING_SETTINGS["ENCODER_PRESET"]
+    profile = config.ENCODER_PRESETS.get(preset_name)
+    if profile is None:
+        logger.warning(f"⚠️ Preset de codificação '{preset_name}' desconhecido. A usar o padrão do FFmpeg.")
+    return profile
+
+def build_encoder_args(preset_name=None):
+    # Converte um perfil de `config.ENCODER_PRESETS` nos argumentos de codificação de vídeo do FFmpeg.
+    profile = get_encoder_profile(preset_name)
+    if profile is None:
+        return []
+    args = ["-c:v", profile["video_codec"], "-preset", profile["preset"]]
+    if profile.get("bitrate"):
+        args += ["-b:v", str(profile["bitrate"])]
+    else:
+        args += ["-crf", str(profile["crf"])]
+    if profile.get("threads"):
+        args += ["-threads", str(profile["threads"])]
+    return args
+
+@contextmanager
+def _reserve_cpu(preset_name):
+    # Reserva, no orçamento global, as threads do perfil (todos os núcleos se forem automáticas).
+    if _cpu_budget is None:
+        yield
+        return
+    profile = get_encoder_profile(preset_name) or {}
+    with _cpu_budget.reserve(profile.get("threads") or os.cpu_count() or 1):
+        yield
+
+def build_overlay_filter(max_width=180, margin=20, relative_scale=0.22, poster_at=None):
+    # Filtro para aplicar a marca d'água (entrada 1) sobre o vídeo (entrada 0) sem conhecer a largura
+    # do vídeo de antemão: o `scale2ref` dimensiona a logo em relação ao próprio vídeo.
+    # Saídas: [vout] (vídeo com marca d'água) e, se `poster_at` for dado, [poster] (frame a partir desse instante).
+    # A entrada 1 deve ser lida com `-loop 1`; o `shortest=1` termina o overlay junto com o vídeo.
+    filter_complex = (
+        f"[1:v][0:v]scale2ref=w='min(main_w*{relative_scale},{max_width})':h='ow/a'[wm][base];"
+        f"[base][wm]overlay=W-w-{margin}:{margin}:shortest=1,format=yuv420p"
+    )
+    if poster_at is None:
+        return f"{filter_complex}[vout]"
+    return (
+        f"{filter_complex},split=2[vout][vposter];"
+        f"[vposter]setpts=PTS-STARTPTS,trim=start={poster_at}[poster]"
+    )
+
+def rasterize_svg(svg_path, png_path, output_width=None):
+    # Converte uma marca d'água SVG para PNG (requer a biblioteca cairosvg). Retorna True se conseguiu.
+    try:
+        import cairosvg
+        logger.info(f"Convertendo SVG '{svg_path}' para PNG '{png_path}'.")
+        cairosvg.svg2png(url=svg_path, write_to=png_path, output_width=output_width)
+        return True
+    except ImportError:
+        logger.error("A biblioteca cairosvg é necessária para SVG. Instale com 'pip install cairosvg'.")
+        return False
+    except Exception as e:
+        logger.error(f"Erro ao converter SVG para PNG: {e}")
+        return False
+
+def _scale_image(image_path, png_path, width):
+    # Redimensiona uma imagem raster para `width` px de largura (altura proporcional) com o FFmpeg.
     command = [
-        "ffprobe", "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width",
-        "-of", "json",
-        video_path
+        "ffmpeg", "-v", "error", "-y",
+        "-i", image_path,
+        "-vf", f"scale={width}:-1",
+        "-frames:v", "1",
+        png_path
     ]
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        width = json.loads(result.stdout)["streams"][0]["width"]
-        return int(width)
-    except Exception as e:
-        logger.error(f"❌ Não foi possível obter a largura do vídeo: {e}")
+        subprocess.run(command, check=True, capture_output=True, text=True)
+        return True
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.error(f"Erro ao redimensionar a marca d'água '{image_path}': {getattr(e, 'stderr', e)}")
+        return False
+
+def get_watermark_asset(watermark_image, target_width=None):
+    # Retorna o caminho de um PNG da marca d'água já rasterizado (SVG) e redimensionado para
+    # `target_width`, criado uma única vez por processo e por largura em `config.ASSET_CACHE_PATH`.
+    # O nome inclui um hash do caminho, tamanho e mtime da origem: se a logo mudar, é gerado um novo
+    # asset e os caminhos já entregues nunca são reescritos. Retorna None se não for possível gerá-lo.
+    try:
+        stat = os.stat(watermark_image)
+    except OSError:
+        logger.error(f"Arquivo da marca d'água não encontrado: {watermark_image}")
         return None
+    is_svg = os.path.splitext(watermark_image)[-1].lower() == ".svg"
+    if not is_svg and not target_width:
+        return watermark_image
+
+    key = (os.path.abspath(watermark_image), stat.st_size, stat.st_mtime_ns, target_width)
+    with _asset_cache_lock:
+        cached = _asset_cache.get(key)
+        if cached and os.path.exists(cached):
+            return cached
+        key_lock = _asset_locks.setdefault(key, threading.Lock())
+
+    # Um lock por asset: trabalhadores que pedem a mesma logo esperam pela primeira conversão.
+    with key_lock:
+        with _asset_cache_lock:
+            cached = _asset_cache.get(key)
+        if cached and os.path.exists(cached):
+            return cached
+
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+        stem = os.path.splitext(os.path.basename(watermark_image))[0]
+        asset_path = os.path.join(config.ASSET_CACHE_PATH, f"{stem}_{target_width or 'original'}_{digest}.png")
+        if not os.path.exists(asset_path):
+            os.makedirs(config.ASSET_CACHE_PATH, exist_ok=True)
+            partial_path = f"{asset_path}.{os.getpid()}.{threading.get_ident()}.png"
+            if is_svg:
+                created = rasterize_svg(watermark_image, partial_path, output_width=target_width)
+            else:
+                created = _scale_image(watermark_image, partial_path, target_width)
+            if not created:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                return None
+            # Publicação atómica: quem lê o caminho nunca vê um PNG a meio da escrita.
+            os.replace(partial_path, asset_path)
+            logger.info(f"🖼️ Asset da marca d'água criado: '{asset_path}'.")
+
+        with _asset_cache_lock:
+            _asset_cache[key] = asset_path
+        return asset_path
 
-def add_watermark(input_video, output_video, watermark_image, max_width=180, margin=20, relative_scale=0.22):
+def add_watermark(input_video, output_video, watermark_image, max_width=180, margin=20, relative_scale=0.22, encoder_preset=None, video_width=None):
+    # `video_width` pode vir do `MediaInfo` já sondado no pipeline; se omitido, o vídeo é sondado aqui.
+    encoder_preset = encoder_preset or config.WATERMARK_ENCODER_PRESET
     logger.info(
-        f"🔧 Iniciando adição de marca d'água: input='{input_video}', output='{output_video}', watermark='{watermark_image}', max_width={max_width}, margin={margin}, relative_scale={relative_scale}"
+        f"🔧 Iniciando adição de marca d'água: input='{input_video}', output='{output_video}', watermark='{watermark_image}', max_width={max_width}, margin={margin}, relative_scale={relative_scale}, preset='{encoder_preset}'"
     )
 
     if not os.path.exists(input_video):
@@ -37,40 +206,25 @@ def add_watermark(input_video, output_video, watermark_image, max_width=180, mar
         logger.error(f"Arquivo da marca d'água não encontrado: {watermark_image}")
         return False
 
-    ext = os.path.splitext(watermark_image)[-1].lower()
-    if ext == ".svg":
-        try:
-            import cairosvg
-            png_temp = watermark_image + ".png"
-            logger.info(f"Convertendo SVG '{watermark_image}' para PNG temporário '{png_temp}'.")
-            cairosvg.svg2png(url=watermark_image, write_to=png_temp)
-            watermark_to_use = png_temp
-        except ImportError:
-            logger.error("A biblioteca cairosvg é necessária para SVG. Instale com 'pip install cairosvg'.")
-            return False
-        except Exception as e:
-            logger.error(f"Erro ao converter SVG para PNG: {e}")
-            return False
-    else:
-        watermark_to_use = watermark_image
-
-    # --- Obtém largura real do vídeo para cálculo proporcional ---
-    video_width = get_video_width(input_video)
+    # --- Obtém largura real do vídeo para cálculo proporcional (sondagem em cache) ---
+    video_width = video_width or get_video_width(input_video)
     if not video_width:
         logger.error("❌ Não foi possível determinar a largura do vídeo.")
         return False
     target_logo_width = int(min(video_width * relative_scale, max_width))
 
-    # Filtro: redimensiona a logo para target_logo_width px de largura
-    filter_complex = (
-        f"[1:v]scale={target_logo_width}:-1[wm];[0:v][wm]overlay=W-w-{margin}:{margin}"
-    )
+    # A logo já vem rasterizada e redimensionada da cache de assets: só resta sobrepô-la.
+    watermark_to_use = get_watermark_asset(watermark_image, target_logo_width)
+    if not watermark_to_use:
+        return False
+    filter_complex = f"[0:v][1:v]overlay=W-w-{margin}:{margin}"
 
     command = [
         "ffmpeg",
         "-i", input_video,
         "-i", watermark_to_use,
         "-filter_complex", filter_complex,
+        *build_encoder_args(encoder_preset),
         "-codec:a", "copy",
         "-y",
         output_video
@@ -79,26 +233,38 @@ def add_watermark(input_video, output_video, watermark_image, max_width=180, mar
     logger.info(f"Executando comando FFmpeg para marca d'água: {' '.join(command)}")
 
     try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        with _reserve_cpu(encoder_preset):
+            started = time.monotonic()
+            result = subprocess.run(command, check=True, capture_output=True, text=True)
+            elapsed = time.monotonic() - started
         logger.info(f"Saída completa do FFmpeg:\n{result.stdout}\n{result.stderr}")
-        if ext == ".svg" and os.path.exists(watermark_to_use):
-            os.remove(watermark_to_use)
-            logger.info(f"PNG temporário removido: {watermark_to_use}")
         if not os.path.exists(output_video):
             logger.error(f"Arquivo de saída NÃO foi criado: {output_video}")
+            _report_watermark(output_video, encoder_preset, "error")
             return False
+        fps_values = _FPS_PATTERN.findall(result.stderr or "")
+        fps = float(fps_values[-1]) if fps_values else None
         logger.info(f"Marca d'água inserida com sucesso em '{output_video}'.")
+        _report_watermark(output_video, encoder_preset, "ok", elapsed, fps)
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"Falha ao adicionar marca d'água: {e}")
         logger.error(f"STDOUT:\n{e.stdout}\nSTDERR:\n{e.stderr}")
-        if ext == ".svg" and os.path.exists(watermark_to_use):
-            os.remove(watermark_to_use)
-            logger.info(f"PNG temporário removido: {watermark_to_use}")
+        _report_watermark(output_video, encoder_preset, "error")
         return False
     except Exception as e:
         logger.error(f"Erro inesperado ao rodar FFmpeg: {e}")
-        if ext == ".svg" and os.path.exists(watermark_to_use):
-            os.remove(watermark_to_use)
-            logger.info(f"PNG temporário removido: {watermark_to_use}")
+        _report_watermark(output_video, encoder_preset, "error")
         return False
+
+def _report_watermark(output_video, encoder_preset, result, seconds=None, fps=None):
+    # Regista o resultado (e, se concluída, a duração e os fps) de uma transcodificação.
+    _WATERMARK_RESULTS.inc(result=result, preset=encoder_preset)
+    if seconds is not None:
+        _WATERMARK_SECONDS.observe(seconds, preset=encoder_preset)
+    if fps:
+        _WATERMARK_FPS.observe(fps, preset=encoder_preset)
+    emit_event(
+        "watermark", file=os.path.basename(output_video), preset=encoder_preset, result=result,
+        seconds=round(seconds, 3) if seconds is not None else None, fps=fps
+    )
@@ -7,13 +7,14 @@
 # @titulo:         xcam_api.py
 # @author:         Samuel Passamani / Um Projeto do Estudio A.Sério [AllS Company]
 # @info:           https://aserio.work/
-# @version:        1.6.0
-# @lastupdate:     2025-07-14
+# @version:        1.8.0
+# @lastupdate:     2026-10-18
 # @description:    Este módulo serve como um cliente dedicado para a API do XCam. Ele encapsula
 #                  toda a lógica de comunicação, incluindo a busca de modelos online e a busca
 #                  de informações de stream de um utilizador específico (lógica de fallback).
 #                  Utiliza um logger modular para registo de eventos.
-# @modes:          - Cliente de API RESTful.
+# @modes:          - Cliente de API RESTful (`XCamAPIClient`) com Sessão Keep-Alive Partilhada.
+#                  - Cache TTL/LRU de liveInfo com Pedidos Simultâneos Partilhados.
 
 # ---------------------------------------------------------------------------------------------
 # 2. CONFIGURAÇÕES & VARIÁVEIS GLOBAIS
@@ -23,10 +24,17 @@
 import requests                     # Biblioteca padrão para realizar requisições HTTP em Python.
 import logging                      # Biblioteca padrão para logging.
 import json                         # Para o caso de a resposta da API não ser um JSON válido.
+import threading                    # Locks da cache e do pedido em curso partilhado.
+import time                         # Relógio monotónico para a validade (TTL) da cache.
+from collections import OrderedDict # Cache LRU das respostas de liveInfo.
+from concurrent.futures import Future # Resultado partilhado por pedidos simultâneos ao mesmo utilizador.
 from typing import Dict, Any, List, Optional # Tipos para anotações, melhorando a clareza do código.
 
+from requests.adapters import HTTPAdapter # Pool de ligações keep-alive da sessão.
+from urllib3.util.retry import Retry      # Novas tentativas com backoff para erros transitórios.
+
 # --- Importações de Módulos do Projeto ---
-from config import API_BASE_URL, API_KEY     # Importa a URL base e a chave da API do nosso arquivo de configuração central.
+from config import API_BASE_URL, API_KEY, API_CLIENT_SETTINGS # URL base, chave e afinação do cliente.
 
 # --- Variáveis Globais ---
 # CORREÇÃO: Inicializa um logger específico para este módulo, seguindo o padrão correto.
@@ -35,105 +43,300 @@ logger = logging.getLogger(__name__)
 # Define o tempo máximo em segundos que uma requisição irá esperar por uma resposta da API.
 REQUEST_TIMEOUT = 15
 
+# Cliente partilhado pelo processo (criado sob demanda por `get_api_client`).
+_client = None
+_client_lock = threading.Lock()
+
 # ---------------------------------------------------------------------------------------------
 # 3. CORPO
 # ---------------------------------------------------------------------------------------------
 
-def get_online_models(page: int = 1, limit: int = 1000, country: Optional[str] = None) -> List[Dict[str, Any]]:
+class XCamAPIClient:
     """
-    Busca uma lista paginada de modelos online da API XCam.
+    Cliente da API XCam com uma `requests.Session` partilhada.
 
-    Args:
-        page (int, optional): O número da página a ser consultada. Padrão é 1.
-        limit (int, optional): O número de resultados por página. Padrão é 1000.
-        country (Optional[str], optional): Código do país (ex: 'br', 'us'). Padrão é None (todos).
-
-    Returns:
-        List[Dict[str, Any]]: Uma lista de dicionários, cada um representando um modelo online.
-                              Retorna uma lista vazia em caso de erro.
+    As ligações TCP/TLS ficam abertas num pool (keep-alive) dimensionado para o número de
+    trabalhadores, os erros transitórios são repetidos com backoff e as respostas de
+    `/user/{username}/liveInfo` ficam numa cache com validade (TTL) e limite de entradas (LRU).
+    Pedidos simultâneos para o mesmo utilizador partilham um único pedido em curso.
     """
-    # O endpoint para a lista de modelos online.
-    endpoint = "/"
-    # Constrói o dicionário de parâmetros para a requisição.
-    params = {'page': page, 'limit': limit, 'key': API_KEY} 
-    # Adiciona o país aos parâmetros apenas se for fornecido.
-    if country:
-        params['country'] = country
-    
-    # Constrói a URL completa para a requisição.
-    url = f"{API_BASE_URL}{endpoint}"
-    logger.info(f"📡 Buscando lista de modelos em: {url} com parâmetros: {params}")
-
-    try:
-        # Realiza a requisição HTTP GET.
-        response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-        # Levanta uma exceção para códigos de erro (4xx ou 5xx).
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        api_key: str = API_KEY,
+        pool_size: Optional[int] = None,
+        settings: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            base_url (str, optional): URL base da API.
+            api_key (str, optional): Chave de acesso à API.
+            pool_size (Optional[int], optional): Máximo de ligações abertas (normalmente o número de trabalhadores).
+            settings (Optional[Dict[str, Any]], optional): Substitui `config.API_CLIENT_SETTINGS`.
+        """
+        self.base_url = base_url
+        self.api_key = api_key
+        self.settings = settings or API_CLIENT_SETTINGS
+        pool_size = pool_size or self.settings["POOL_SIZE"]
+
+        retry = Retry(
+            total=self.settings["RETRIES"],
+            backoff_factor=self.settings["BACKOFF_FACTOR"],
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa um GET na sessão partilhada e retorna o JSON (levanta exceção em caso de erro)."""
+        response = self.session.get(f"{self.base_url}{endpoint}", params=params, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        # Converte a resposta JSON em um dicionário Python.
-        data = response.json()
-
-        # Valida a estrutura da resposta e extrai a lista de modelos.
-        if data and isinstance(data.get("broadcasts"), dict) and isinstance(data["broadcasts"].get("items"), list):
-            models = data["broadcasts"]["items"]
-            logger.info(f"✅ {len(models)} modelos encontrados.")
-            return models
-        else:
-            logger.warning(f"⚠️ Formato de resposta inesperado ou lista de modelos vazia em {url}")
+        return response.json()
+
+    def get_online_page(self, page: int = 1, limit: int = 1000, country: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma página da lista de modelos online com os metadados de paginação e o custo do pedido.
+
+        Args:
+            page (int, optional): O número da página a ser consultada. Padrão é 1.
+            limit (int, optional): O número de resultados por página. Padrão é 1000.
+            country (Optional[str], optional): Código do país (ex: 'br', 'us'). Padrão é None (todos).
+
+        Returns:
+            Optional[Dict[str, Any]]: `items`, `page`, `total`, `total_pages` (None se a API não os
+                                      indicar), `payload_bytes` e `parse_seconds`; None em caso de erro.
+        """
+        params = {'page': page, 'limit': limit, 'key': self.api_key}
+        if country:
+            params['country'] = country
+        url = f"{self.base_url}/"
+
+        try:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            payload = response.content
+            started = time.perf_counter()
+            data = json.loads(payload)
+            parse_seconds = time.perf_counter() - started
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Erro de rede/HTTP ao buscar a página {page} de modelos online: {e}")
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.error(f"❌ Falha ao decodificar a resposta JSON da página {page} em: {url}")
+            return None
+
+        broadcasts = data.get("broadcasts") if isinstance(data, dict) else None
+        if not isinstance(broadcasts, dict) or not isinstance(broadcasts.get("items"), list):
+            logger.warning(f"⚠️ Formato de resposta inesperado na página {page} em {url}")
+            return None
+
+        def _meta(key):
+            value = broadcasts.get(key, data.get(key))
+            return int(value) if isinstance(value, (int, float, str)) and str(value).isdigit() else None
+
+        return {
+            "items": broadcasts["items"],
+            "page": page,
+            "total": _meta("total"),
+            "total_pages": _meta("totalPages"),
+            "payload_bytes": len(payload),
+            "parse_seconds": parse_seconds,
+        }
+
+    def get_online_models(self, page: int = 1, limit: int = 1000, country: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Busca uma lista paginada de modelos online da API XCam.
+
+        Args:
+            page (int, optional): O número da página a ser consultada. Padrão é 1.
+            limit (int, optional): O número de resultados por página. Padrão é 1000.
+            country (Optional[str], optional): Código do país (ex: 'br', 'us'). Padrão é None (todos).
+
+        Returns:
+            List[Dict[str, Any]]: Uma lista de dicionários, cada um representando um modelo online.
+                                  Retorna uma lista vazia em caso de erro.
+        """
+        # O endpoint para a lista de modelos online.
+        endpoint = "/"
+        # Constrói o dicionário de parâmetros para a requisição.
+        params = {'page': page, 'limit': limit, 'key': self.api_key}
+        # Adiciona o país aos parâmetros apenas se for fornecido.
+        if country:
+            params['country'] = country
+
+        url = f"{self.base_url}{endpoint}"
+        logger.info(f"📡 Buscando lista de modelos em: {url} com parâmetros: {params}")
+
+        try:
+            data = self._get(endpoint, params)
+
+            # Valida a estrutura da resposta e extrai a lista de modelos.
+            if data and isinstance(data.get("broadcasts"), dict) and isinstance(data["broadcasts"].get("items"), list):
+                models = data["broadcasts"]["items"]
+                logger.info(f"✅ {len(models)} modelos encontrados.")
+                return models
+            else:
+                logger.warning(f"⚠️ Formato de resposta inesperado ou lista de modelos vazia em {url}")
+                return []
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Erro de rede/HTTP ao buscar modelos online: {e}")
+            return []
+        except json.JSONDecodeError:
+            logger.error(f"❌ Falha ao decodificar a resposta JSON da URL: {url}")
+            return []
+        except Exception as e:
+            logger.error(f"❌ Erro inesperado ao buscar modelos online: {e}", exc_info=True)
             return []
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Erro de rede/HTTP ao buscar modelos online: {e}")
-        return []
-    except json.JSONDecodeError:
-        logger.error(f"❌ Falha ao decodificar a resposta JSON da URL: {url}")
-        return []
-    except Exception as e:
-        logger.error(f"❌ Erro inesperado ao buscar modelos online: {e}", exc_info=True)
-        return []
-
-def get_user_live_info(username: str) -> Optional[Dict[str, Any]]:
+    def get_user_live_info(self, username: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Busca informações detalhadas do stream de um utilizador (fallback da URL do stream).
+
+        Args:
+            username (str): O nome do utilizador para o qual buscar as informações.
+            use_cache (bool, optional): Se False, ignora a cache (ex: reconexão após uma quebra),
+                                        mas continua a partilhar um pedido já em curso.
+
+        Returns:
+            Optional[Dict[str, Any]]: Um dicionário com os detalhes do stream, ou None se falhar.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(username)
+            if use_cache and cached and cached[0] > now:
+                self._cache.move_to_end(username)
+                self._hits += 1
+                return cached[1]
+            future = self._inflight.get(username)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[username] = future
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not owner:
+            logger.debug(f"🔗 Pedido de liveInfo para '{username}' já em curso. A aguardar o resultado partilhado.")
+            return future.result()
+
+        live_info = None
+        try:
+            live_info = self._fetch_live_info(username)
+        finally:
+            with self._lock:
+                if live_info is not None:
+                    self._cache[username] = (time.monotonic() + self.settings["LIVE_INFO_TTL_SECONDS"], live_info)
+                    self._cache.move_to_end(username)
+                    while len(self._cache) > self.settings["LIVE_INFO_CACHE_SIZE"]:
+                        self._cache.popitem(last=False)
+                self._inflight.pop(username, None)
+            future.set_result(live_info)
+        return live_info
+
+    def _fetch_live_info(self, username: str) -> Optional[Dict[str, Any]]:
+        """Executa o pedido a `/user/{username}/liveInfo` (sem cache)."""
+        # Constrói o endpoint dinâmico para o utilizador específico.
+        endpoint = f"/user/{username}/liveInfo"
+        url = f"{self.base_url}{endpoint}"
+        params = {'key': self.api_key}
+        logger.info(f"📡 Buscando URL de fallback para '{username}' em: {url} com parâmetros: {params}")
+
+        try:
+            live_info = self._get(endpoint, params)
+            logger.info(f"✅ Informações de stream encontradas para '{username}'.")
+            return live_info
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Erro de rede/HTTP ao buscar live info para '{username}': {e}")
+            return None
+        except json.JSONDecodeError:
+            logger.error(f"❌ Falha ao decodificar a resposta JSON para live info de '{username}' em: {url}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Erro inesperado ao buscar live info para '{username}': {e}", exc_info=True)
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Acertos e falhas da cache de liveInfo, pedidos partilhados e entradas em cache.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "cached": len(self._cache),
+            }
+
+    def close(self):
+        """Fecha as ligações abertas da sessão."""
+        self.session.close()
+
+
+def configure_api_client(pool_size: Optional[int] = None, **kwargs: Any) -> XCamAPIClient:
     """
-    FEATURE: Busca informações detalhadas do stream de um utilizador específico.
-    Esta função serve como fallback para quando a URL do stream não vem na lista principal.
+    Substitui o cliente partilhado por um novo (ex: com o pool dimensionado para os trabalhadores).
 
     Args:
-        username (str): O nome do utilizador para o qual buscar as informações.
+        pool_size (Optional[int], optional): Máximo de ligações abertas.
+        **kwargs: Outros argumentos de `XCamAPIClient`.
 
     Returns:
-        Optional[Dict[str, Any]]: Um dicionário com os detalhes do stream, ou None se falhar.
+        XCamAPIClient: O novo cliente partilhado.
     """
-    # Constrói o endpoint dinâmico para o utilizador específico.
-    endpoint = f"/user/{username}/liveInfo"
-    # Constrói a URL completa para a requisição.
-    url = f"{API_BASE_URL}{endpoint}"
-    params = {'key': API_KEY}
-    logger.info(f"📡 Buscando URL de fallback para '{username}' em: {url} com parâmetros: {params}")
-
-    try:
-        # Realiza a requisição HTTP GET.
-        response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-        # Levanta uma exceção para códigos de erro.
-        response.raise_for_status()
-        # Retorna os dados do stream se a requisição for bem-sucedida.
-        live_info = response.json()
-        logger.info(f"✅ Informações de stream encontradas para '{username}'.")
-        return live_info
+    global _client
+    with _client_lock:
+        previous, _client = _client, XCamAPIClient(pool_size=pool_size, **kwargs)
+    if previous is not None:
+        previous.close()
+    return _client
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Erro de rede/HTTP ao buscar live info para '{username}': {e}")
-        return None
-    except json.JSONDecodeError:
-        logger.error(f"❌ Falha ao decodificar a resposta JSON para live info de '{username}' em: {url}")
-        return None
-    except Exception as e:
-        logger.error(f"❌ Erro inesperado ao buscar live info para '{username}': {e}", exc_info=True)
-        return None
+def get_api_client() -> XCamAPIClient:
+    """Retorna o cliente partilhado pelo processo, criando-o na primeira chamada."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = XCamAPIClient()
+        return _client
+
+def get_online_models(page: int = 1, limit: int = 1000, country: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Atalho para `XCamAPIClient.get_online_models` no cliente partilhado."""
+    return get_api_client().get_online_models(page=page, limit=limit, country=country)
+
+def get_user_live_info(username: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """Atalho para `XCamAPIClient.get_user_live_info` no cliente partilhado."""
+    return get_api_client().get_user_live_info(username, use_cache=use_cache)
 
 # ---------------------------------------------------------------------------------------------
 # 4. RODAPÉ / FIM DO CÓDIGO
 # ---------------------------------------------------------------------------------------------
 
 # @log de mudanças:
+# 2026-10-18 (v1.8.0):
+# - FEATURE: `XCamAPIClient.get_online_page` retorna uma página com os metadados de paginação, o tamanho
+#   da resposta e o tempo de análise do JSON (usado pela descoberta em utils/discovery.py).
+#
+# 2026-10-18 (v1.7.0):
+# - FEATURE: Novo `XCamAPIClient` com uma `requests.Session` partilhada (pool keep-alive dimensionado
+#   para os trabalhadores), novas tentativas com backoff (urllib3 `Retry`) e cache TTL/LRU de liveInfo.
+#   Pedidos simultâneos de liveInfo para o mesmo utilizador partilham um único pedido em curso.
+# - REFACTOR: `get_online_models` e `get_user_live_info` passam a ser atalhos sobre o cliente partilhado.
+#
 # 2025-07-14 (v1.6.0):
 # - FEATURE: Adicionada a nova função `get_user_live_info(username)` para buscar a URL do stream
 #   num endpoint secundário, implementando a lógica de fallback.
@@ -148,6 +351,4 @@ def get_user_live_info(username: str) -> Optional[Dict[str, Any]]:
 # - REFACTOR: Padronizado o uso do logger e renomeada a função principal.
 
 # @roadmap futuro:
-# - Implementar um modelo de classes (ex: `XCamAPIClient`) para organizar melhor as chamadas se a API crescer.
-# - Adicionar caching (com TTL) para requisições, especialmente para `get_user_live_info`.
 # - Criar modelos de dados (ex: com Pydantic) para validar as respostas da API de forma mais robusta.